@@ -1,34 +1,37 @@
+import os
 import network
 import routing
 import spectrum_assignment
 import modulation
-import numpy as np
 import metrics
-import visualization
+import event_log
+
+def run_rmsa(topology_file, traffic_file, grid=None, log=None, store=None):
+    # 事件日志（event_log.EventLog），默认不记录；store 为可选的 results_store.ResultsStore（每条光路一行）
+    if log is None:
+        log = event_log.DISABLED
 
-def run_rmsa(topology_file, traffic_file):
     # 1️⃣ **解析拓扑**
     G = network.load_topology(topology_file)
 
     # 2️⃣ **解析流量需求**
     traffic_matrix = network.load_traffic(traffic_file)
 
-    # 3️⃣ **初始化 320 个 FSU 频谱**
-    spectrum = {}
-    for u, v in G.edges():
-        spectrum[(u, v)] = np.ones(320)
-        spectrum[(v, u)] = np.ones(320)  # 🚀 确保存储双向链路
+    # 3️⃣ **初始化频谱（默认 C 波段 320 个 FSU，可通过 grid 配置）**
+    spectrum = network.init_spectrum(G, grid)  # 🚀 双向链路
+    slot_width = spectrum.grid.slot_width_ghz
 
     results = []
 
     # 4️⃣ **遍历流量需求，计算路径、拆分流量、分配频谱**
     for src, dst, demand in traffic_matrix:
-        print('---------------------------------------')
+        log.demand(src, dst, demand)
+        demand_id = store.new_demand() if store is not None else None
         # 计算 K 条最短路径
         paths = routing.k_shortest_paths_routing(G, src, dst)
 
         if not paths:
-            print(f"🚨 无法找到从 {src} 到 {dst} 的路径")
+            log.no_path(src, dst, demand)
             continue
 
         # ---------------------------------- 选择 routing 策略 -------------------------------------------
@@ -51,9 +54,13 @@ def run_rmsa(topology_file, traffic_file):
 
         # 拆分primary path 流量
         primary_sub_requests = spectrum_assignment.split_traffic(demand, primary_path_length)
+        if len(primary_sub_requests) > 1:
+            log.split(src, dst, demand, len(primary_sub_requests), primary_path_length)
 
         # 拆分backup path流量
         backup_sub_requests = spectrum_assignment.split_traffic(demand, backup_path_length)
+        if len(backup_sub_requests) > 1:
+            log.split(src, dst, demand, len(backup_sub_requests), backup_path_length)
 
         # 存储该流量的所有 lightpaths
         fsu_starts = []
@@ -61,63 +68,64 @@ def run_rmsa(topology_file, traffic_file):
         # ---------------------------------- 先给 primary path 分配频谱 ----------------------------------
         for sub_demand in primary_sub_requests:
             # 计算所需 FSU 数量 & 选择调制格式
-            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, backup_path_length)
+            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, primary_path_length, slot_width)
 
             # 进行频谱分配
             fsu_start = spectrum_assignment.best_fit_spectrum_assignment(G, primary_path, sub_demand, spectrum)
 
             if fsu_start == -1:
-                print(f"🚨 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 失败！无法分配频谱！")
+                log.blocked(src, dst, sub_demand, primary_path)
             else:
                 fsu_starts.append(fsu_start)
-                print(
-                    f"✅ 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 成功！主路径：{primary_path}, 调制方式: {modulation_used}, 需要 {num_fsus} FSU, 频谱起始位置: {fsu_start}")
+                log.allocated(src, dst, sub_demand, primary_path, modulation_used, fsu_start, num_fsus)
+                if store is not None:
+                    store.append(demand_id, src, dst, sub_demand, primary_path, modulation_used, fsu_start, num_fsus)
 
         # ---------------------------------- 再给 backup path 分配频谱 ----------------------------------
         for sub_demand in backup_sub_requests:
             # 计算所需 FSU 数量 & 选择调制格式
-            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, backup_path_length)
+            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, backup_path_length, slot_width)
 
             # 进行频谱分配
             fsu_start = spectrum_assignment.best_fit_spectrum_assignment(G, backup_path, sub_demand, spectrum)
 
             if fsu_start == -1:
-                print(f"🚨 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 失败！无法分配频谱！")
+                log.blocked(src, dst, sub_demand, backup_path, role="backup")
             else:
                 fsu_starts.append(fsu_start)
-                print(
-                    f"✅ 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 成功！[1+1]备用路径：{backup_path}, 调制方式: {modulation_used}, 需要 {num_fsus} FSU, 频谱起始位置: {fsu_start}")
+                log.allocated(src, dst, sub_demand, backup_path, modulation_used, fsu_start, num_fsus, role="backup")
+                if store is not None:
+                    store.append(demand_id, src, dst, sub_demand, backup_path, modulation_used, fsu_start, num_fsus,
+                                 role="backup")
 
         # **如果所有子流量都成功分配，则存储结果**
         if fsu_starts:
-            results.append((src, dst, demand, backup_path , modulation_used, fsu_starts))
+            results.append((src, dst, demand, primary_path, modulation_used, fsu_starts))
 
     return results, spectrum
 
 if __name__ == "__main__":
-    # **修改文件路径为你的拓扑和流量矩阵**
-    topology_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-topology.txt"
-    traffic_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-matrix-5.txt"
+    # **修改文件路径为你的拓扑和流量矩阵（相对于仓库目录）**
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+    topology_file = os.path.join(DATA_DIR, "Germany-7nodes", "G7-topology.txt")
+    traffic_file = os.path.join(DATA_DIR, "Germany-7nodes", "G7-matrix-5.txt")
 
     print("🚀 运行 RMSA 仿真...")
-    results, spectrum = run_rmsa(topology_file, traffic_file)
+    # 逐条事件由控制台渲染器输出；写文件可改用 event_log.JsonlSink / event_log.BinarySink
+    with event_log.EventLog([event_log.ConsoleSink()], level=event_log.DEBUG) as log:
+        results, spectrum = run_rmsa(topology_file, traffic_file, log=log)
 
-    # 📌 计算每条链路的最高 FSU
-    link_fsu = metrics.highest_fsu_per_link(spectrum)
+    # 🚀 一次扫描计算所有指标
+    report = metrics.report(spectrum)
+    total_fsus = report.total_used_fsus
+    max_entropy = report.max_fragmentation_entropy
+    utilization_H = report.utilization_entropy
 
+    # 📌 **每条链路的最高 FSU**
     print("\n📊 最高 FSU 索引（每条链路）:")
-    for link, max_fsu in link_fsu.items():
+    for link, max_fsu in report.highest_fsu_per_link().items():
         print(f"链路 {link}: 最高 FSU = {max_fsu}")
 
-    # 🚀 计算关键指标
-    total_fsus = metrics.total_used_fsus(spectrum)
-
-    max_entropy = max(metrics.calculate_fragmentation_entropy(spectrum)
-                      for spectrum in spectrum.values())
-
-    #shannon_H = metrics.calculate_shannon_entropy(spectrum)
-    utilization_H = metrics.calculate_network_utilization_entropy(spectrum)
-
     print("\n📊 Task4 仿真完成！")
     print(f"✅ 总使用的 FSU 数量: {total_fsus}")
     print(f"✅ Shannon 熵: {max_entropy:.4f}")
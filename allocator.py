@@ -0,0 +1,139 @@
+import routing
+import modulation
+import spectrum_assignment
+import spectrum_grid
+import event_log
+
+# 可选的路径选择策略（与 ks_main 中注释切换的四种策略一致）
+PATH_SELECTORS = {
+    "entropy_max": routing.entropy_minimization_path_routing_max,
+    "entropy_avg": routing.entropy_minimization_path_routing_avg,
+    "highest_loaded": routing.highest_loaded_path_routing_avg,
+    "least_loaded": routing.least_loaded_path_routing_avg,
+}
+
+# 可选的频谱分配算法
+SPECTRUM_ASSIGNERS = {
+    "first_fit": spectrum_assignment.first_fit_spectrum_assignment,
+    "best_fit": spectrum_assignment.best_fit_spectrum_assignment,
+    "most_used": spectrum_assignment.most_used_spectrum_assignment,
+    "fragmentation_aware": spectrum_assignment.fragmentation_aware_spectrum_assignment,
+}
+
+
+def path_length(G, path):
+    """ 计算路径长度 (km) """
+    return sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+
+
+def path_links(path):
+    """ 路径 → 有向链路列表 """
+    return [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+
+
+def get_candidate_paths(G, src, dst, path_cache, k=5):
+    """
+    获取 (src, dst) 的 K 条候选路径，结果缓存在 path_cache 中，只计算一次
+    :param path_cache: 字典 {(src, dst): [path, ...]}
+    """
+    key = (src, dst)
+    paths = path_cache.get(key)
+    if paths is None:
+        paths = routing.k_shortest_paths_routing(G, src, dst, k=k)
+        path_cache[key] = paths
+    return paths
+
+
+def select_path(G, paths, spectrum, selector="least_loaded", use_mod_aware=True, reach=None):
+    """
+    在候选路径中按策略选路，可选地再结合调制方式 (routing.mod_aware) 修正
+    :param reach: 可选的 reach_tables.ReachTable；提供时 mod_aware 改为查表
+    """
+    path = PATH_SELECTORS[selector](G, paths, spectrum)
+    if use_mod_aware:
+        path = reach.mod_aware(paths, path) if reach is not None else routing.mod_aware(G, paths, path)
+    return path
+
+
+def allocate_on_path(G, path, src, dst, demand, spectrum, assigner="best_fit", index=None, log=None, reach=None):
+    """
+    在给定路径上为一个流量分配频谱（超过单通道容量时拆分）
+    :param index: 可选的 path_index.PathAvailabilityIndex；提供时改用索引查询起点并同步更新索引
+    :param log: 可选的 event_log.EventLog，记录拆分 / 分配 / 阻塞事件
+    :param reach: 可选的 reach_tables.ReachTable；提供时路径长度、拆分和 FSU 数改为查表
+    :return: (lightpaths, blocked)
+             lightpaths: 成功分配的光路列表，每条为字典
+                         {src, dst, demand, path, modulation, start, num_slots}
+             blocked:    分配失败的子流量 (Gbps) 列表
+    """
+    assign = SPECTRUM_ASSIGNERS[assigner]
+    slot_width = spectrum_grid.grid_of(spectrum).slot_width_ghz
+    length_km = reach.path_length(path) if reach is not None else path_length(G, path)
+    lightpaths = []
+    blocked = []
+    if log is None:
+        log = event_log.DISABLED
+
+    if reach is not None:
+        sub_requests = reach.split(demand, path)
+    else:
+        sub_requests = spectrum_assignment.split_traffic(demand, length_km)
+    if len(sub_requests) > 1:
+        log.split(src, dst, demand, len(sub_requests), length_km)
+    for sub_demand in sub_requests:
+        if reach is not None:
+            num_slots, modulation_used = reach.required_fsus(sub_demand, path)
+        else:
+            num_slots, modulation_used = modulation.compute_required_fsus(sub_demand, length_km, slot_width)
+        if index is not None and assigner in index.QUERIES:
+            start = index.assign(G, path, sub_demand, assigner)
+        else:
+            if reach is not None:  # FSU 数已经查表得到，SA 不再重复计算路径长度和调制格式
+                start = assign(G, path, sub_demand, spectrum, num_slots=num_slots)
+            else:
+                start = assign(G, path, sub_demand, spectrum)
+            if index is not None and start != -1:  # 索引不支持的策略：直接分配后通知索引
+                index.links_changed(path_links(path), start, start + num_slots)
+        if start == -1:
+            blocked.append(sub_demand)
+            log.blocked(src, dst, sub_demand, path)
+        else:
+            log.allocated(src, dst, sub_demand, path, modulation_used, start, num_slots)
+            lightpaths.append({
+                "src": src,
+                "dst": dst,
+                "demand": sub_demand,
+                "path": list(path),
+                "modulation": modulation_used,
+                "start": int(start),
+                "num_slots": int(num_slots),
+            })
+    return lightpaths, blocked
+
+
+def allocate_demand(G, paths, src, dst, demand, spectrum, selector="least_loaded",
+                    assigner="best_fit", use_mod_aware=True, index=None, log=None, reach=None):
+    """
+    完整的两阶段 RMSA：先在候选路径中选路，再在该路径上进行频谱分配
+    :return: (lightpaths, blocked)，见 allocate_on_path
+    """
+    if not paths:
+        if log is not None:
+            log.no_path(src, dst, demand)
+        return [], [demand]
+    path = select_path(G, paths, spectrum, selector, use_mod_aware, reach)
+    return allocate_on_path(G, path, src, dst, demand, spectrum, assigner, index, log, reach)
+
+
+def release_lightpath(spectrum, lightpath, index=None, log=None):
+    """ 释放一条光路在其路径上占用的所有 FSU（提供 index 时同步更新索引，提供 log 时记录释放事件） """
+    start = lightpath["start"]
+    end = start + lightpath["num_slots"]
+    links = path_links(lightpath["path"])
+    for link in links:
+        spectrum[link][start:end] = 1
+    if index is not None:
+        index.links_changed(links, start, end)
+    if log is not None:
+        log.released(lightpath["src"], lightpath["dst"], lightpath["demand"], lightpath["path"], start,
+                     lightpath["num_slots"])
@@ -0,0 +1,252 @@
+import functools
+import operator
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+import network
+import modulation
+import routing
+import allocator
+import csr_graph
+import spectrum_grid
+
+
+def resolve_shortest_paths(csr, src, dst):
+    """
+    一次性为所有流量求最短路：对所有不同的源节点调用 scipy 的多源 Dijkstra
+    :param csr: CSRGraph
+    :param src: 源节点编号数组
+    :param dst: 目的节点编号数组
+    :return: (路径列表（节点编号列表）, 路径长度数组 km)；不可达的流量路径为 None、长度为 inf
+    """
+    graph = csr_matrix((csr.weights, csr.indices, csr.indptr), shape=(csr.num_nodes, csr.num_nodes))
+    src_idx = np.array([csr.node_index[s] for s in src.tolist()], dtype=np.int64)
+    dst_idx = np.array([csr.node_index[d] for d in dst.tolist()], dtype=np.int64)
+    sources, row_of = np.unique(src_idx, return_inverse=True)
+    dist, pred = dijkstra(graph, directed=True, indices=sources, return_predecessors=True)
+
+    lengths = dist[row_of, dst_idx]
+    paths = []
+    cache = {}
+    nodes = csr._nodes
+    for row, s, t in zip(row_of.tolist(), src_idx.tolist(), dst_idx.tolist()):
+        key = (row, t)
+        if key not in cache:
+            if pred[row, t] < 0:
+                cache[key] = None
+            else:
+                path = [t]
+                while path[-1] != s:
+                    path.append(int(pred[row, path[-1]]))
+                cache[key] = [nodes[i] for i in reversed(path)]
+        paths.append(cache[key])
+    return paths, lengths
+
+
+def split_demands(demand, lengths):
+    """
+    向量化的 split_traffic：超过单通道容量的流量拆分为等量的子流量
+    :return: (每个子流量所属的流量下标, 子流量 Gbps)
+    """
+    rates = np.array([m["rate"] for m in modulation.MODULATION_FORMATS], dtype=float)
+    capacity = rates[modulation.select_modulation_index(lengths)]
+    parts = np.where(demand > capacity, np.ceil(demand / capacity), 1).astype(np.int64)
+    owner = np.repeat(np.arange(len(demand)), parts)
+    return owner, demand[owner] / parts[owner]
+
+
+def incidence_matrix(csr, paths, owner):
+    """
+    构造稀疏的 光路 × 链路 关联矩阵（行：子流量光路，列：有向链路编号）
+    """
+    path_ids = [csr.path_link_ids(p) if p is not None else np.zeros(0, dtype=np.int64) for p in paths]
+    counts = np.array([len(ids) for ids in path_ids], dtype=np.int64)[owner]
+    indptr = np.concatenate(([0], np.cumsum(counts)))
+    indices = np.concatenate([path_ids[i] for i in owner.tolist()]) if len(owner) else np.zeros(0, dtype=np.int64)
+    return csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(len(owner), csr.num_links))
+
+
+def _first_fit_bits(occupied, width, full, valid):
+    """
+    在位集上找第一个连续 width 个空闲位（位 s 为 1 表示 FSU s 已占用）
+    :param valid: 允许的起点位集（不跨越波段边界）
+    :return: 起点，找不到返回 -1
+    """
+    free = full & ~occupied
+    length = 1
+    while length < width and free:
+        step = min(length, width - length)
+        free &= free >> step
+        length += step
+    free &= valid
+    if not free:
+        return -1
+    return (free & -free).bit_length() - 1
+
+
+def _valid_start_bits(grid, width):
+    """ grid.valid_starts(width) 的位集形式：位 s 为 1 表示起点 s 不跨越波段边界 """
+    valid = grid.valid_starts(width)
+    return int.from_bytes(np.packbits(valid, bitorder="little").tobytes(), "little") if len(valid) else 0
+
+
+def pack_slots(incidence, widths, num_links, grid=spectrum_grid.DEFAULT_GRID):
+    """
+    在关联矩阵上按顺序做区间打包（First-Fit 着色）：每条链路维护一个占用位集，
+    光路的可用频谱为其所有链路位集之并的补集
+    :param widths: 每条光路所需的 FSU 数
+    :return: 每条光路的起始 FSU（-1 表示未能打包，留给逐条分配回退）
+    """
+    link_bits = [0] * num_links
+    full = (1 << grid.num_slots) - 1
+    valid_bits = {}
+    starts = np.full(len(widths), -1, dtype=np.int64)
+    indptr, indices = incidence.indptr.tolist(), incidence.indices.tolist()
+
+    for i, width in enumerate(widths.tolist()):
+        links = indices[indptr[i]:indptr[i + 1]]
+        if not links:
+            continue
+        occupied = 0
+        for link in links:
+            occupied |= link_bits[link]
+        if width not in valid_bits:
+            valid_bits[width] = _valid_start_bits(grid, width)
+        start = _first_fit_bits(occupied, width, full, valid_bits[width])
+        if start == -1:
+            continue
+        block = ((1 << width) - 1) << start
+        for link in links:
+            link_bits[link] |= block
+        starts[i] = start
+    return starts
+
+
+def _row_bits(row):
+    """ 一条链路的空闲位集：位 s 为 1 表示 FSU s 空闲 """
+    return int.from_bytes(np.packbits(row == 1, bitorder="little").tobytes(), "little")
+
+
+def _has_window(free, width, valid):
+    """ 空闲位集中是否有连续 width 个空闲位（起点不跨越波段边界） """
+    length = 1
+    while length < width and free:
+        step = min(length, width - length)
+        free &= free >> step
+        length += step
+    return bool(free & valid)
+
+
+def plan(G, traffic_matrix, grid=None, selector="least_loaded", assigner="best_fit", fallback=True):
+    """
+    批量静态规划：一次处理整张流量矩阵
+      1. 所有流量的最短路一次求出，长度 / 调制 / 拆分 / FSU 全部向量化计算
+      2. 构造稀疏的 光路 × 链路 关联矩阵
+      3. 在关联矩阵上按流量顺序做区间打包 (First-Fit)
+      4. 打包失败的子流量回退到逐条的两阶段分配 (allocator.allocate_demand，K 最短路)
+    步骤 1-3 与 fs_main 的流程（固定最短路 + First-Fit）结果相同；回退在此基础上降低阻塞，
+    但每个新的节点对都要计算一次 Yen，拥塞时回退的开销远大于打包本身
+    :param traffic_matrix: network.load_traffic 的输出 [(src, dst, demand), ...]，按其顺序处理
+    :param grid: 频谱网格（同 network.init_spectrum）
+    :param fallback: False 时不做回退，打包失败的子流量直接判为阻塞
+    :return: (results, spectrum, stats)；results 与各 runner 格式相同
+    """
+    csr = csr_graph.build_csr(G)
+    spectrum = network.init_spectrum(G, grid)
+    grid = spectrum.grid
+    total_slots = grid.num_slots
+    stats = {"demands": len(traffic_matrix), "lightpaths": 0, "packed": 0, "fallback": 0, "blocked": 0}
+    if not traffic_matrix:
+        return [], spectrum, stats
+
+    demands = np.array(traffic_matrix, dtype=float)
+    src, dst, demand = demands[:, 0].astype(np.int64), demands[:, 1].astype(np.int64), demands[:, 2]
+
+    paths, lengths = resolve_shortest_paths(csr, src, dst)
+    owner, sub_demand = split_demands(demand, lengths)
+    widths, mod_idx = modulation.compute_required_fsus_array(sub_demand, lengths[owner], grid.slot_width_ghz)
+    incidence = incidence_matrix(csr, paths, owner)
+    starts = pack_slots(incidence, widths, csr.num_links, grid)
+    stats["lightpaths"] = len(owner)
+    stats["packed"] = int(np.sum(starts >= 0))
+
+    # 把打包结果一次性写入频谱：占用矩阵按链路编号排列
+    free = np.ones((csr.num_links, total_slots))
+    packed = np.flatnonzero(starts >= 0)
+    rows = incidence[packed].tocoo()
+    for lp, link in zip(packed[rows.row].tolist(), rows.col.tolist()):
+        free[link, starts[lp]:starts[lp] + widths[lp]] = 0
+    for link_id, link in enumerate(csr.links):
+        spectrum[link] = free[link_id]
+
+    # 汇总每个流量的结果；未打包的子流量回退到逐条分配
+    fsu_starts = [[] for _ in range(len(demand))]
+    modulation_used = [None] * len(demand)
+    leftovers = []
+    for lp, d in enumerate(owner.tolist()):
+        if starts[lp] >= 0:
+            fsu_starts[d].append(int(starts[lp]))
+            modulation_used[d] = modulation.MODULATION_FORMATS[mod_idx[lp]]["name"]
+        else:
+            leftovers.append((d, float(sub_demand[lp])))
+    if not fallback:
+        stats["blocked"] = len(leftovers)
+        leftovers = []
+
+    # 回退前的快速过滤（每条链路的空闲位集只构建一次，之后只更新回退分配占用的链路）：
+    #   - 源节点所有出链路（或目的节点所有入链路）都放不下最窄的窗口时，任何候选路径都不可行，省去 K 最短路计算
+    #   - 所有候选路径上都没有公共的空闲窗口时，省去选路和频谱分配
+    link_free = [_row_bits(row) for row in free] if leftovers else None
+    out_links = {s: [csr.link_index[(s, v)] for v in G.neighbors(s)] for s in set(src.tolist())}
+    in_links = {t: [csr.link_index[(v, t)] for v in G.neighbors(t)] for t in set(dst.tolist())}
+    valid_bits = {}
+
+    path_cache = {}
+    used_paths = list(paths)
+    for d, amount in leftovers:
+        s, t = int(src[d]), int(dst[d])
+        min_width, _ = modulation.compute_required_fsus(amount, 0, grid.slot_width_ghz)
+        if min_width not in valid_bits:
+            valid_bits[min_width] = _valid_start_bits(grid, min_width)
+        valid = valid_bits[min_width]
+        # 没有链路的节点 / 不可达的节点对同样直接判为阻塞
+        if paths[d] is None or not any(_has_window(link_free[l], min_width, valid) for l in out_links[s]) \
+                or not any(_has_window(link_free[l], min_width, valid) for l in in_links[t]):
+            stats["blocked"] += 1
+            continue
+        if (s, t) not in path_cache:
+            # Yen 的第一条路径就是已经求出的最短路，不再重新计算
+            candidates = routing.csr_k_shortest_paths_routing(csr, s, t, first_path=paths[d])
+            path_cache[(s, t)] = (candidates, [csr.path_link_ids(p).tolist() for p in candidates])
+        candidates, candidate_links = path_cache[(s, t)]
+        if not any(_has_window(functools.reduce(operator.and_, (link_free[l] for l in links)), min_width, valid)
+                   for links in candidate_links):
+            stats["blocked"] += 1
+            continue
+        lightpaths, blocked = allocator.allocate_demand(G, candidates, s, t, amount, spectrum, selector, assigner)
+        stats["fallback"] += len(lightpaths)
+        stats["blocked"] += len(blocked)
+        for lightpath in lightpaths:
+            block = ((1 << lightpath["num_slots"]) - 1) << lightpath["start"]
+            for link in allocator.path_links(lightpath["path"]):
+                link_free[csr.link_index[link]] &= ~block
+            fsu_starts[d].append(lightpath["start"])
+            modulation_used[d] = lightpath["modulation"]
+            used_paths[d] = lightpath["path"]
+
+    results = []
+    for d in range(len(demand)):
+        if fsu_starts[d]:
+            results.append((int(src[d]), int(dst[d]), traffic_matrix[d][2], used_paths[d],
+                            modulation_used[d], fsu_starts[d]))
+    return results, spectrum, stats
+
+
+def run_rmsa(topology_file, traffic_file, grid=None):
+    """ 批量规划模式的入口，返回值与其他 runner 一致：(results, spectrum) """
+    G = network.load_topology(topology_file)
+    traffic_matrix = network.load_traffic(traffic_file)
+    results, spectrum, _ = plan(G, traffic_matrix, grid)
+    return results, spectrum
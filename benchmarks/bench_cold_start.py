@@ -0,0 +1,50 @@
+"""
+冷启动基准：在全新的解释器中导入各模块 / 执行一次无界面运行的耗时（取多次中位数），
+并检查是否误加载了 matplotlib / scipy
+    python benchmarks/bench_cold_start.py --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TARGETS = ["network", "metrics", "routing", "allocator", "fs_main", "ks_main", "Task4_1+1", "sweep", "rmsa_cli"]
+HEAVY = ("matplotlib", "scipy")
+
+
+def _python(code_or_args, env):
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable] + code_or_args, cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr)
+    return time.perf_counter() - t0, out.stdout
+
+
+def main(args):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE="0")
+    baseline = statistics.median(_python(["-c", "pass"], env)[0] for _ in range(args.repeat))
+    print(f"{'target':<40} {'median ms':>10} {'+ over bare':>12}  heavy modules loaded")
+
+    for target in IMPORT_TARGETS:
+        code = (f"import importlib, sys; importlib.import_module({target!r}); "
+                f"print(','.join(m for m in {HEAVY!r} if m in sys.modules))")
+        runs = [_python(["-c", code], env) for _ in range(args.repeat)]
+        median = statistics.median(t for t, _ in runs)
+        print(f"{'import ' + target:<40} {1000 * median:>10.1f} {1000 * (median - baseline):>12.1f}  "
+              f"{runs[0][1].strip() or '-'}")
+
+    command = ["-m", "rmsa_cli", "run", "--no-cache", "--json", "--traffic", args.traffic]
+    median = statistics.median(_python(command, env)[0] for _ in range(args.repeat))
+    print(f"{'rmsa_cli run (' + os.path.basename(args.traffic) + ')':<40} {1000 * median:>10.1f} "
+          f"{1000 * (median - baseline):>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--traffic", default="Germany-7nodes/G7-matrix-1.txt")
+    main(parser.parse_args())
@@ -0,0 +1,60 @@
+"""
+CSR 路由与 networkx 路由的对比基准：
+    python benchmarks/bench_csr_routing.py --nodes 500 --pairs 200 --k 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import routing
+import csr_graph
+from synthetic_topology import random_topology
+
+
+def main(args):
+    G = random_topology(args.nodes, seed=args.seed)
+    t0 = time.perf_counter()
+    csr = csr_graph.build_csr(G)
+    build = time.perf_counter() - t0
+
+    rng = np.random.default_rng(args.seed)
+    nodes = np.array(sorted(G.nodes()))
+    pairs = [tuple(int(x) for x in rng.choice(nodes, 2, replace=False)) for _ in range(args.pairs)]
+
+    t0 = time.perf_counter()
+    nx_sp = [routing.fixed_shortest_path_routing(G, s, d) for s, d in pairs]
+    t_nx_sp = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    csr_sp = [routing.csr_shortest_path_routing(csr, s, d) for s, d in pairs]
+    t_csr_sp = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    nx_k = [routing.k_shortest_paths_routing(G, s, d, args.k) for s, d in pairs]
+    t_nx_k = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    csr_k = [routing.csr_k_shortest_paths_routing(csr, s, d, args.k) for s, d in pairs]
+    t_csr_k = time.perf_counter() - t0
+
+    # 校验：最短路长度、K 条路径的长度序列一致
+    for a, b in zip(nx_sp, csr_sp):
+        assert abs(csr.path_length(a) - csr.path_length(b)) < 1e-6
+    for a, b in zip(nx_k, csr_k):
+        assert np.allclose([csr.path_length(p) for p in a], [csr.path_length(p) for p in b])
+
+    print(f"topology: {csr.num_nodes} nodes, {csr.num_links} directed links, CSR build {build * 1000:.1f} ms")
+    print(f"shortest path  networkx {t_nx_sp / len(pairs) * 1000:.3f} ms/pair  csr {t_csr_sp / len(pairs) * 1000:.3f} ms/pair")
+    print(f"k={args.k} shortest  networkx {t_nx_k / len(pairs) * 1000:.3f} ms/pair  csr {t_csr_k / len(pairs) * 1000:.3f} ms/pair")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,268 @@
+"""
+差分校验 + 性能回归：用固定种子生成随机频谱状态和路径，参考实现与快速实现并排运行，
+要求决策（起始 FSU、分配后的频谱）和指标数值完全相同，并记录加速比：
+    python benchmarks/bench_differential.py                      # 校验并与基线对比
+    python benchmarks/bench_differential.py --update-baseline    # 重新记录基线（多次测量的中位数）
+对比的实现：
+    first_fit / best_fit / most_used     spectrum_assignment.*_spectrum_assignment  vs  PathAvailabilityIndex.assign
+    fragmentation_entropy                metrics.calculate_fragmentation_entropy（逐链路） vs  metrics.report
+    utilization_entropy                  metrics.utilization_entropy + calculate_network_utilization_entropy  vs  metrics.report
+    fragmentation_aware                  逐窗口复制频谱并调用两种熵函数  vs  spectrum_assignment.fragmentation_aware_spectrum_assignment
+任何不一致，或某个实现的加速比低于基线的 --tolerance 倍时，以非零状态退出。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import network
+import csr_graph
+import metrics
+import modulation
+import spectrum_assignment
+from path_index import PathAvailabilityIndex
+from synthetic_topology import random_topology
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "differential_baseline.json")
+
+# 影响加速比的参数；与基线记录的不同时不做回归比较
+CONFIG_KEYS = ("nodes", "states", "demands", "pairs", "seed")
+
+
+def random_state(G, grid, fill, rng):
+    """ 随机占用宽 1~8 FSU 的频谱块，直到每条链路的占用比例约为 fill """
+    spectrum = network.init_spectrum(G, grid)
+    num_slots = spectrum.grid.num_slots
+    for slots in spectrum.values():
+        while (slots == 0).mean() < fill:
+            width = int(rng.integers(1, 9))
+            start = int(rng.integers(0, num_slots - width + 1))
+            slots[start:start + width] = 0
+    return spectrum
+
+
+def copy_state(spectrum):
+    """ 深拷贝（SpectrumState.copy 只复制字典） """
+    state = spectrum.copy()
+    for link in state:
+        state[link] = state[link].copy()
+    return state
+
+
+def make_workload(args):
+    """
+    :return: (G, [(频谱状态, [(path, demand), ...]), ...])；网格在 C 与 C+L 之间交替，覆盖波段边界。
+             每个状态的请求来自固定的 pairs 个节点对（与流量矩阵相同，候选路径会被反复使用）
+    """
+    rng = np.random.default_rng(args.seed)
+    G = random_topology(args.nodes, seed=args.seed)
+    csr = csr_graph.build_csr(G)
+    nodes = np.array(sorted(G.nodes()))
+    workload = []
+    for i in range(args.states):
+        spectrum = random_state(G, "C" if i % 2 == 0 else "C+L", float(rng.uniform(0.1, 0.8)), rng)
+        candidates = []
+        for _ in range(args.pairs):
+            src, dst = (int(x) for x in rng.choice(nodes, 2, replace=False))
+            candidates.append(csr_graph.k_shortest_paths(csr, src, dst, 3))
+        requests = []
+        for _ in range(args.demands):
+            paths = candidates[int(rng.integers(args.pairs))]
+            path = paths[int(rng.integers(len(paths)))][0]
+            requests.append((path, float(rng.choice([10, 40, 100, 200, 400]))))
+        workload.append((spectrum, requests))
+    return G, workload
+
+
+# ----------------------------------------- 各实现 -----------------------------------------
+def _assign_reference(function):
+    def run(G, workload):
+        out = []
+        for spectrum, requests in workload:
+            state = copy_state(spectrum)
+            starts = [function(G, path, demand, state) for path, demand in requests]
+            out.append((starts, state))
+        return out
+    return run
+
+
+def _assign_fast(policy):
+    def run(G, workload):
+        out = []
+        for spectrum, requests in workload:
+            state = copy_state(spectrum)
+            index = PathAvailabilityIndex(state)
+            starts = [index.assign(G, path, demand, policy) for path, demand in requests]
+            out.append((starts, state))
+        return out
+    return run
+
+
+def _fragmentation_reference(G, workload):
+    return [[metrics.calculate_fragmentation_entropy(slots) for slots in spectrum.values()]
+            for spectrum, _ in workload]
+
+
+def _fragmentation_fast(G, workload):
+    return [metrics.report(spectrum).fragmentation_entropy.tolist() for spectrum, _ in workload]
+
+
+def _utilization_reference(G, workload):
+    return [(list(metrics.utilization_entropy(spectrum).values()),
+             metrics.calculate_network_utilization_entropy(spectrum)) for spectrum, _ in workload]
+
+
+def _utilization_fast(G, workload):
+    out = []
+    for spectrum, _ in workload:
+        report = metrics.report(spectrum)
+        out.append((report.link_utilization_entropy.tolist(), report.utilization_entropy))
+    return out
+
+
+def _fragmentation_aware_reference(G, path, demand, spectrum):
+    """ 逐个候选窗口复制路径上的频谱、占用窗口后重新计算两种熵，取增量之和最小者 """
+    grid = spectrum.grid
+    length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+    num_slots, _ = modulation.compute_required_fsus(demand, length_km, grid.slot_width_ghz)
+    available = spectrum_assignment.path_available_slots(path, spectrum, grid.num_slots)
+    feasible = spectrum_assignment.feasible_window_starts(available, num_slots, grid)
+    links = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+
+    def entropy(state):
+        return (sum(metrics.calculate_fragmentation_entropy(state[link]) for link in links)
+                + sum(metrics.utilization_entropy(state).values()))
+
+    before = entropy({link: spectrum[link] for link in links})
+    best = None
+    for start in np.flatnonzero(feasible).tolist():
+        state = {link: spectrum[link].copy() for link in links}
+        for link in links:
+            state[link][start:start + num_slots] = 0
+        score = round(entropy(state) - before, 12)
+        if best is None or score < best[0]:
+            best = (score, start)
+    if best is None:
+        return -1
+    for link in links:
+        spectrum[link][best[1]:best[1] + num_slots] = 0
+    return best[1]
+
+
+def _same_assignments(reference, fast):
+    for (ref_starts, ref_state), (fast_starts, fast_state) in zip(reference, fast):
+        if ref_starts != fast_starts:
+            return False
+        if any(not np.array_equal(ref_state[link], fast_state[link]) for link in ref_state):
+            return False
+    return len(reference) == len(fast)
+
+
+ENGINES = {
+    # 名称: (参考实现, 快速实现, 结果是否一致, 每个状态使用的请求数上限)
+    "first_fit": (_assign_reference(spectrum_assignment.first_fit_spectrum_assignment), _assign_fast("first_fit"),
+                  _same_assignments, None),
+    "best_fit": (_assign_reference(spectrum_assignment.best_fit_spectrum_assignment), _assign_fast("best_fit"),
+                 _same_assignments, None),
+    "most_used": (_assign_reference(spectrum_assignment.most_used_spectrum_assignment), _assign_fast("most_used"),
+                  _same_assignments, None),
+    # 参考实现逐窗口重算熵，非常慢：只用每个状态的前 20 个请求
+    "fragmentation_aware": (_assign_reference(_fragmentation_aware_reference),
+                            _assign_reference(spectrum_assignment.fragmentation_aware_spectrum_assignment),
+                            _same_assignments, 20),
+    "fragmentation_entropy": (_fragmentation_reference, _fragmentation_fast, lambda a, b: a == b, None),
+    "utilization_entropy": (_utilization_reference, _utilization_fast, lambda a, b: a == b, None),
+}
+
+
+def _timed_pair(reference, fast, G, workload, repeat):
+    """
+    参考实现与快速实现交替运行：先各运行一次预热（不计时），之后每轮两者各运行一次、轮流先后，
+    各取最短耗时，使缓存 / 频率变化对两者的影响相同
+    :return: (参考结果, 快速结果, 参考耗时, 快速耗时)
+    """
+    ref_out, fast_out = reference(G, workload), fast(G, workload)
+    t_ref = t_fast = float("inf")
+    for i in range(repeat):
+        for function in ((reference, fast) if i % 2 == 0 else (fast, reference)):
+            t0 = time.perf_counter()
+            function(G, workload)
+            elapsed = time.perf_counter() - t0
+            if function is reference:
+                t_ref = min(t_ref, elapsed)
+            else:
+                t_fast = min(t_fast, elapsed)
+    return ref_out, fast_out, t_ref, t_fast
+
+
+def measure(names, G, workload, repeat):
+    """ :return: {名称: (结果是否一致, 参考耗时, 快速耗时)} """
+    out = {}
+    for name in names:
+        reference, fast, same, limit = ENGINES[name]
+        engine_workload = [(spectrum, requests[:limit]) for spectrum, requests in workload] if limit else workload
+        ref_out, fast_out, t_ref, t_fast = _timed_pair(reference, fast, G, engine_workload, repeat)
+        out[name] = (same(ref_out, fast_out), t_ref, t_fast)
+    return out
+
+
+def main(args):
+    G, workload = make_workload(args)
+    config = {key: getattr(args, key) for key in CONFIG_KEYS}
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"baseline recorded with {baseline.get('config')}, running {config}: regression check skipped")
+            baseline = None
+
+    names = args.engines or list(ENGINES)
+    # 记录基线时重复测量 baseline_runs 次取加速比的中位数，避免把一次偶然偏快或偏慢的结果当作基线
+    runs = [measure(names, G, workload, args.repeat) for _ in range(args.baseline_runs if args.update_baseline else 1)]
+    speedups, failures = {}, []
+    print(f"{'engine':<24} {'identical':>9} {'reference ms':>13} {'fast ms':>9} {'speedup':>8} {'baseline':>9}")
+    for name in names:
+        identical = all(run[name][0] for run in runs)
+        t_ref, t_fast = float(np.median([run[name][1] for run in runs])), float(np.median([run[name][2] for run in runs]))
+        speedups[name] = float(np.median([run[name][1] / run[name][2] for run in runs]))
+        expected = baseline["speedup"].get(name) if baseline else None
+        print(f"{name:<24} {str(identical):>9} {1000 * t_ref:>13.1f} {1000 * t_fast:>9.1f} {speedups[name]:>7.2f}x "
+              f"{f'{expected:.2f}x' if expected else '-':>9}")
+        if not identical:
+            failures.append(f"{name}: fast engine differs from the reference")
+        if expected and speedups[name] < args.tolerance * expected:
+            failures.append(f"{name}: speedup {speedups[name]:.2f}x below {args.tolerance:g} x baseline {expected:.2f}x")
+
+    if args.update_baseline:
+        if any("differs" in failure for failure in failures):
+            raise SystemExit("refusing to record a baseline while engines disagree")
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "runs": len(runs), "repeat": args.repeat,
+                       "speedup": {k: round(v, 2) for k, v in speedups.items()}}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {args.baseline} (median of {len(runs)} runs)")
+    elif failures:
+        print("\n".join(failures), file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=60)
+    parser.add_argument("--states", type=int, default=20)
+    parser.add_argument("--demands", type=int, default=200, help="每个频谱状态上依次分配的请求数")
+    parser.add_argument("--pairs", type=int, default=10, help="每个频谱状态上请求的节点对数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="预热后两个实现交替运行的轮数，各取最短耗时")
+    parser.add_argument("--baseline-runs", type=int, default=5, help="--update-baseline 时完整测量的次数，记录中位数")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=None)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.7, help="加速比低于 基线 × tolerance 时失败")
+    parser.add_argument("--update-baseline", action="store_true")
+    main(parser.parse_args())
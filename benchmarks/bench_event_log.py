@@ -0,0 +1,89 @@
+"""
+事件日志开销基准：同一个 runner 在不同日志配置下的总耗时（预热一次后各配置交替运行，取多次中位数）
+    python benchmarks/bench_event_log.py --runner ks_main --repeat 5
+  - disabled: 默认的 event_log.DISABLED
+  - print:    在热循环中同步格式化并 print（原先各 runner 的做法，输出到 /dev/null）
+  - console / jsonl / binary: 后台线程写出
+"""
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_log
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PrintLog(event_log.EventLog):
+    """ 同步渲染并 print 每个事件，模拟原先逐条 print 的开销 """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.level = event_log.DEBUG
+        self.stream = stream
+
+    def _record(self, level, record):
+        print(event_log.render(event_log.to_dict(record)), file=self.stream)
+
+
+def make_log(mode, directory, devnull):
+    if mode == "disabled":
+        return None
+    if mode == "print":
+        return PrintLog(devnull)
+    sink = {
+        "console": lambda: event_log.ConsoleSink(devnull),
+        "jsonl": lambda: event_log.JsonlSink(os.path.join(directory, "events.jsonl")),
+        "binary": lambda: event_log.BinarySink(os.path.join(directory, "events.bin")),
+    }[mode]()
+    return event_log.EventLog([sink], level=event_log.DEBUG)
+
+
+def run_once(runner, topology, traffic, mode, directory, devnull):
+    log = make_log(mode, directory, devnull)
+    t0 = time.perf_counter()
+    for traffic_file in traffic:
+        runner.run_rmsa(topology, traffic_file, log=log)
+    if log is not None:
+        log.close()
+    return time.perf_counter() - t0
+
+
+def main(args):
+    runner = importlib.import_module(args.runner)
+    topology = os.path.join(REPO_DIR, args.topology)
+    traffic = [os.path.join(REPO_DIR, t) for t in args.traffic]
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        # 预热（不计时）：每种配置先运行一次，导入、缓存和首次分配的开销不落在先运行的配置上
+        for mode in args.modes:
+            run_once(runner, topology, traffic, mode, directory, devnull)
+        # 各配置在每一轮中交替运行（每轮轮换起始配置），机器负载的波动对各配置的影响相同
+        times = {mode: [] for mode in args.modes}
+        for i in range(args.repeat):
+            order = args.modes[i % len(args.modes):] + args.modes[:i % len(args.modes)]
+            for mode in order:
+                times[mode].append(run_once(runner, topology, traffic, mode, directory, devnull))
+
+        print(f"{'mode':<10} {'median ms':>10} {'events':>8} {'file KB':>8}")
+        for mode in args.modes:
+            path = {"jsonl": "events.jsonl", "binary": "events.bin"}.get(mode)
+            path = os.path.join(directory, path) if path else None
+            events = sum(1 for _ in event_log.read_events(path)) if path else "-"
+            size = f"{os.path.getsize(path) / 1024:.0f}" if path else "-"
+            print(f"{mode:<10} {1000 * statistics.median(times[mode]):>10.1f} {events:>8} {size:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runner", default="ks_main", choices=["fs_main", "ks_main", "Task4_1+1"])
+    parser.add_argument("--topology", default="Italian-10nodes/IT10-topology.txt")
+    parser.add_argument("--traffic", nargs="+", default=[f"Italian-10nodes/IT10-matrix-{i}.txt" for i in range(1, 6)])
+    parser.add_argument("--modes", nargs="+", default=["disabled", "print", "console", "jsonl", "binary"])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
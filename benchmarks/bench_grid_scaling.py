@@ -0,0 +1,73 @@
+"""
+频谱网格规模基准：同一拓扑、同一流量在不同 FSU 数下的单次分配耗时
+    python benchmarks/bench_grid_scaling.py --nodes 50 --demands 2000
+FSU 宽度固定为 12.5 GHz，只扩大网格（单波段 320 → 2560 FSU），因此每个流量所需的 FSU 数不变；
+分配耗时应基本持平或次线性增长。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import network
+import routing
+import spectrum_assignment
+import spectrum_grid
+from synthetic_topology import random_topology
+
+ASSIGNERS = {
+    "first_fit": spectrum_assignment.first_fit_spectrum_assignment,
+    "best_fit": spectrum_assignment.best_fit_spectrum_assignment,
+    "most_used": spectrum_assignment.most_used_spectrum_assignment,
+}
+
+
+def run(G, traffic, paths, grid, assign):
+    """ 逐条分配，返回 (每个子流量的平均耗时 us, 阻塞数) """
+    spectrum = network.init_spectrum(G, grid)
+    blocked, count, elapsed = 0, 0, 0.0
+    for (src, dst, demand), path in zip(traffic, paths):
+        length = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+        for sub_demand in spectrum_assignment.split_traffic(demand, length):
+            t0 = time.perf_counter()
+            if assign(G, path, sub_demand, spectrum) == -1:
+                blocked += 1
+            elapsed += time.perf_counter() - t0
+            count += 1
+    return 1e6 * elapsed / max(count, 1), blocked
+
+
+def main(args):
+    G = random_topology(args.nodes, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    nodes = np.array(sorted(G.nodes()))
+    traffic = []
+    for _ in range(args.demands):
+        s, d = rng.choice(nodes, 2, replace=False)
+        traffic.append((int(s), int(d), 10 * int(rng.integers(1, args.max_units + 1))))
+    traffic.sort(key=lambda x: x[2], reverse=True)
+    paths = [routing.fixed_shortest_path_routing(G, s, d) for s, d, _ in traffic]
+
+    print(f"{'slots':>6} " + " ".join(f"{name + ' us':>14} {'blocked':>8}" for name in args.assigners))
+    for num_slots in args.slots:
+        grid = spectrum_grid.SpectrumGrid([("C", num_slots)], 12.5)
+        cells = []
+        for name in args.assigners:
+            per_lp, blocked = run(G, traffic, paths, grid, ASSIGNERS[name])
+            cells.append(f"{per_lp:>14.1f} {blocked:>8d}")
+        print(f"{num_slots:>6} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=50)
+    parser.add_argument("--demands", type=int, default=2000)
+    parser.add_argument("--max-units", type=int, default=4, help="demand drawn from 10..10*max_units Gbps")
+    parser.add_argument("--slots", type=int, nargs="+", default=[320, 640, 1280, 2560])
+    parser.add_argument("--assigners", nargs="+", default=sorted(ASSIGNERS), choices=sorted(ASSIGNERS))
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+"""
+路径表构建基准：合成拓扑上串行 / 进程池 / 线程池构建 K 条候选路径表的耗时，
+并与逐个节点对调用 routing.k_shortest_paths_routing (networkx) 对比
+    python benchmarks/bench_path_table.py --nodes 500 --pairs 500 --k 5 --workers 1 2 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import routing
+import csr_graph
+import path_table
+from synthetic_topology import random_topology
+
+
+def main(args):
+    G = random_topology(args.nodes, seed=args.seed)
+    csr = csr_graph.build_csr(G)
+    rng = np.random.default_rng(args.seed)
+    nodes = np.array(sorted(G.nodes()))
+    pairs = sorted({tuple(int(x) for x in rng.choice(nodes, 2, replace=False)) for _ in range(args.pairs)})
+    print(f"topology: {csr.num_nodes} nodes, {csr.num_links} directed links, {len(pairs)} pairs, k={args.k}, "
+          f"{os.cpu_count()} CPUs")
+
+    sample = pairs[:args.nx_pairs]
+    t0 = time.perf_counter()
+    for s, d in sample:
+        routing.k_shortest_paths_routing(G, s, d, args.k)
+    t_nx = (time.perf_counter() - t0) / len(sample)
+    print(f"{'networkx per pair (serial)':<28} {1000 * t_nx:>8.3f} ms/pair  (est. {t_nx * len(pairs):.2f} s)")
+
+    reference = None
+    for executor in ("process", "thread"):
+        for workers in args.workers:
+            if workers == 1 and executor == "thread":
+                continue
+            t0 = time.perf_counter()
+            table = path_table.build_path_table(csr, args.k, pairs, workers, executor)
+            elapsed = time.perf_counter() - t0
+            label = "serial" if workers == 1 else f"{executor} x{workers}"
+            print(f"{label:<28} {1000 * elapsed / len(pairs):>8.3f} ms/pair  total {elapsed:.2f} s, "
+                  f"{table.num_paths} paths, {table.nbytes() / 2 ** 20:.1f} MB")
+            arrays = table.arrays()
+            if reference is None:
+                reference = arrays
+            else:
+                assert all(np.array_equal(reference[name], arrays[name]) for name in path_table.ARRAY_NAMES)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--nx-pairs", type=int, default=200, help="networkx 对照只测这么多节点对")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
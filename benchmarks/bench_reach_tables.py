@@ -0,0 +1,113 @@
+"""
+调制感知选路 + 流量拆分的开销：逐个流量调用 routing.mod_aware / split_traffic / compute_required_fsus，
+与 ReachTable 的逐个查表、整批向量化计算对比（结果逐项校验一致）；
+另外校验经 allocator 逐个流量使用后的 ReachTable，mod_aware_batch 与 mod_aware 仍然一致
+    python benchmarks/bench_reach_tables.py --nodes 200 --pairs 500 --demands 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import routing
+import modulation
+import allocator
+import network
+import csr_graph
+import path_table
+import reach_tables
+import spectrum_assignment
+from synthetic_topology import random_topology
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    G = random_topology(args.nodes, seed=args.seed)
+    csr = csr_graph.build_csr(G)
+    nodes = np.array(sorted(G.nodes()))
+    pairs = sorted({tuple(int(x) for x in rng.choice(nodes, 2, replace=False)) for _ in range(args.pairs)})
+    path_cache = path_table.build_path_table(csr, args.k, pairs=pairs).as_path_cache()
+
+    pick = rng.integers(len(pairs), size=args.demands)
+    src = np.array([pairs[i][0] for i in pick.tolist()])
+    dst = np.array([pairs[i][1] for i in pick.tolist()])
+    demand = rng.choice([10.0, 40.0, 100.0, 200.0, 400.0, 800.0], size=args.demands)
+    # 选路策略的结果用随机候选代替（只比较 mod_aware 及之后的开销）
+    choice = [int(rng.integers(len(path_cache[pairs[i]]))) for i in pick.tolist()]
+
+    def scalar():
+        out = []
+        for s, d, x, c in zip(src.tolist(), dst.tolist(), demand.tolist(), choice):
+            paths = path_cache[(s, d)]
+            path = routing.mod_aware(G, paths, paths[c])
+            length_km = allocator.path_length(G, path)
+            for sub in spectrum_assignment.split_traffic(x, length_km):
+                out.append(modulation.compute_required_fsus(sub, length_km)[0])
+        return out
+
+    t0 = time.perf_counter()
+    reach = reach_tables.ReachTable(G)
+    reach.register_path_cache(path_cache)
+    t_build = time.perf_counter() - t0
+
+    def lookup():
+        out = []
+        for s, d, x, c in zip(src.tolist(), dst.tolist(), demand.tolist(), choice):
+            paths = path_cache[(s, d)]
+            path = reach.mod_aware(paths, paths[c])
+            for sub in reach.split(x, path):
+                out.append(reach.required_fsus(sub, path)[0])
+        return out
+
+    chosen_ids = np.array([reach.path_ids[tuple(path_cache[(s, d)][c])]
+                           for s, d, c in zip(src.tolist(), dst.tolist(), choice)])
+
+    def batch():
+        path_ids = reach.mod_aware_batch(chosen_ids, src, dst)
+        return reach.split_batch(demand, path_ids)[2].tolist()
+
+    results, times = [], []
+    for function in (scalar, lookup, batch):
+        t0 = time.perf_counter()
+        results.append(function())
+        times.append(time.perf_counter() - t0)
+    assert results[0] == results[1] == results[2]
+
+    print(f"topology: {csr.num_nodes} nodes, {reach.num_paths} candidate paths, {args.demands} demands "
+          f"({len(results[0])} sub-requests); table build {1000 * t_build:.1f} ms")
+    for name, seconds in zip(("per-demand functions", "ReachTable lookups", "ReachTable batch"), times):
+        print(f"{name:<24} {1000 * seconds:>9.1f} ms  {times[0] / seconds:>6.1f}x")
+    check_allocator_driven(G, path_cache, pairs, src, dst, choice)
+
+
+def check_allocator_driven(G, path_cache, pairs, src, dst, choice):
+    """
+    ReachTable 经 allocator 逐个流量使用后（select_path → mod_aware，allocate_on_path → path_length 等），
+    mod_aware_batch 的结果仍须与逐个流量的 routing.mod_aware 一致
+    """
+    reach = reach_tables.ReachTable(G)
+    spectrum = network.init_spectrum(G)
+    for s, d in pairs:
+        # 先让单条路径查询登记非最短的候选，再走正常的分配流程
+        reach.path_length(path_cache[(s, d)][-1])
+        allocator.allocate_demand(G, path_cache[(s, d)], s, d, 100.0, spectrum, reach=reach)
+    chosen_ids = np.array([reach.path_id(path_cache[(s, d)][c]) for s, d, c in zip(src.tolist(), dst.tolist(), choice)])
+    expected = [reach.path_id(routing.mod_aware(G, path_cache[(s, d)], path_cache[(s, d)][c]))
+                for s, d, c in zip(src.tolist(), dst.tolist(), choice)]
+    mismatches = int(np.count_nonzero(reach.mod_aware_batch(chosen_ids, src, dst) != np.array(expected)))
+    assert mismatches == 0, f"mod_aware_batch disagrees with mod_aware in {mismatches} demands after allocator use"
+    print(f"allocator-driven table: mod_aware_batch matches mod_aware for all {len(expected)} demands")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--demands", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""
+结果存储基准：N 条光路分别存为 runner 式的元组列表和 ResultsStore，比较内存、追加、筛选 / 汇总耗时
+    python benchmarks/bench_results_store.py --lightpaths 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import routing
+import modulation
+import results_store
+from synthetic_topology import random_topology
+
+
+def synthetic_lightpaths(n, nodes, seed):
+    """ 在合成拓扑上生成 n 条光路（路径取自少量节点对的最短路，模拟真实运行中路径的重复） """
+    G = random_topology(nodes, seed=seed)
+    rng = np.random.default_rng(seed)
+    names = [m["name"] for m in modulation.MODULATION_FORMATS]
+    pairs = [tuple(int(x) for x in rng.choice(np.arange(1, nodes + 1), 2, replace=False)) for _ in range(2000)]
+    paths = [routing.fixed_shortest_path_routing(G, s, d) for s, d in pairs]
+    choice = rng.integers(len(pairs), size=n)
+    for i in range(n):
+        j = int(choice[i])
+        yield (i // 4, pairs[j][0], pairs[j][1], float(10 * (1 + i % 40)), paths[j], names[i % 3],
+               int(i % 300), 1 + i % 8, "backup" if i % 5 == 0 else "primary")
+
+
+def main(args):
+    rows = list(synthetic_lightpaths(args.lightpaths, args.nodes, args.seed))
+
+    def build_tuples():
+        return [(src, dst, demand, list(path), mod, [start]) for _, src, dst, demand, path, mod, start, _, _ in rows]
+
+    def build_store():
+        store = results_store.ResultsStore()
+        for row in rows:
+            store.append(*row)
+        return store
+
+    t0 = time.perf_counter()
+    tuples = build_tuples()
+    t_tuples = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    store = build_store()
+    t_store = time.perf_counter() - t0
+
+    # 内存单独测量（tracemalloc 会拖慢构建）
+    memory = []
+    for build in (build_tuples, build_store):
+        tracemalloc.start()
+        kept = build()
+        memory.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        del kept
+    mem_tuples, mem_store = memory
+
+    print(f"{'':<28} {'list of tuples':>16} {'ResultsStore':>14}")
+    print(f"{'build (s)':<28} {t_tuples:>16.2f} {t_store:>14.2f}")
+    print(f"{'memory (MB)':<28} {mem_tuples / 2 ** 20:>16.1f} {mem_store / 2 ** 20:>14.1f}")
+
+    # 筛选 + 汇总：DP-16QAM 光路按源节点汇总流量
+    t0 = time.perf_counter()
+    totals = {}
+    for src, dst, demand, path, mod, starts in tuples:
+        if mod == "DP-16QAM":
+            totals[src] = totals.get(src, 0.0) + demand
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    keys, sums = store.group_sum("src", "demand", mask=store.select(modulation="DP-16QAM"))
+    t_vec = time.perf_counter() - t0
+    assert dict(zip(keys.tolist(), sums.tolist())) == totals
+    print(f"{'filter + group_sum (ms)':<28} {1000 * t_loop:>16.1f} {1000 * t_vec:>14.1f}")
+
+    # 每条链路的 FSU 负载
+    t0 = time.perf_counter()
+    loads = {}
+    for (_, _, _, _, path, _, _, num_slots, _) in rows:
+        for i in range(len(path) - 1):
+            loads[(path[i], path[i + 1])] = loads.get((path[i], path[i + 1]), 0) + num_slots
+    t_loop = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    vec_loads = store.link_load()
+    t_vec = time.perf_counter() - t0
+    assert vec_loads == loads
+    print(f"{'link_load (ms)':<28} {1000 * t_loop:>16.1f} {1000 * t_vec:>14.1f}")
+    print(f"{len(store)} lightpaths, {store.summary()['paths']} distinct paths")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lightpaths", type=int, default=1000000)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
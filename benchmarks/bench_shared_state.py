@@ -0,0 +1,106 @@
+"""
+共享内存快照基准：进程池中的 what-if 任务（在当前网络状态上试分配一批流量），
+对比 每个任务序列化一份 spectrum 字典 与 任务只携带 SnapshotHandle 的每任务字节数和总耗时
+    python benchmarks/bench_shared_state.py --nodes 200 --tasks 64 --workers 2
+"""
+import argparse
+import copy
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import network
+import allocator
+import csr_graph
+import path_table
+import shared_state
+from synthetic_topology import random_topology
+
+_G = None
+
+
+def _init_pickled(G):
+    global _G
+    _G = G
+
+
+def _evaluate_pickled(args):
+    """ 旧方式：任务携带完整的 spectrum 字典，worker 深拷贝后试分配 """
+    spectrum, demands, paths = args
+    spectrum = copy.deepcopy(spectrum)
+    blocked = 0
+    for (src, dst, demand), candidates in zip(demands, paths):
+        _, failed = allocator.allocate_demand(_G, candidates, src, dst, demand, spectrum)
+        blocked += len(failed)
+    return blocked
+
+
+def main(args):
+    rng = np.random.default_rng(args.seed)
+    G = random_topology(args.nodes, seed=args.seed)
+    csr = csr_graph.build_csr(G)
+    nodes = np.array(sorted(G.nodes()))
+    pairs = sorted({tuple(int(x) for x in rng.choice(nodes, 2, replace=False)) for _ in range(args.pairs)})
+    table = path_table.build_path_table(csr, args.k, pairs=pairs)
+
+    # 当前网络状态：先分配一部分流量
+    spectrum = network.init_spectrum(G, args.grid)
+    for src, dst in pairs:
+        allocator.allocate_demand(G, table.paths(src, dst), src, dst, float(rng.choice([100, 200, 400])), spectrum)
+
+    # 每个任务：随机顺序的一批新流量
+    tasks = []
+    for _ in range(args.tasks):
+        picked = rng.choice(len(pairs), args.demands)
+        tasks.append([(pairs[i][0], pairs[i][1], float(rng.choice([10, 40, 100]))) for i in picked.tolist()])
+
+    pickled_args = [(spectrum, demands, [table.paths(s, d) for s, d, _ in demands]) for demands in tasks]
+    with ProcessPoolExecutor(args.workers, initializer=_init_pickled, initargs=(G,)) as pool:
+        list(pool.map(_evaluate_pickled, pickled_args[:args.workers]))  # 预热
+        t0 = time.perf_counter()
+        blocked_pickled = list(pool.map(_evaluate_pickled, pickled_args))
+        t_pickled = time.perf_counter() - t0
+
+    with shared_state.SnapshotPublisher() as publisher, ProcessPoolExecutor(args.workers) as pool:
+        handle = publisher.publish(spectrum, csr, table)
+        items = [(demands, "least_loaded", "best_fit", args.k) for demands in tasks]
+        shared_state.map_snapshot(pool, shared_state.evaluate_ordering, handle, items[:args.workers])  # 预热并映射
+        t0 = time.perf_counter()
+        results = shared_state.map_snapshot(pool, shared_state.evaluate_ordering, handle, items)
+        t_shared = time.perf_counter() - t0
+        # 前滚：采纳第一个结果并发布新版本，进程池继续使用
+        shared_state.apply_delta(spectrum, results[0]["delta"])
+        t0 = time.perf_counter()
+        handle = publisher.publish(spectrum, csr, table)
+        t_publish = time.perf_counter() - t0
+        rolled = shared_state.map_snapshot(pool, shared_state.evaluate_ordering, handle, items[:args.workers])
+    assert [r["blocked"] for r in results] == blocked_pickled
+
+    bytes_pickled = np.mean([len(pickle.dumps(a)) for a in pickled_args])
+    bytes_shared = np.mean([len(pickle.dumps((shared_state.evaluate_ordering, handle, item))) for item in items])
+    print(f"topology: {csr.num_nodes} nodes, {csr.num_links} links, grid {args.grid}, {table.num_paths} paths, "
+          f"{args.tasks} tasks x {args.demands} demands, {args.workers} workers")
+    print(f"{'':<24} {'bytes/task':>12} {'total s':>9}")
+    print(f"{'pickled spectrum':<24} {bytes_pickled:>12.0f} {t_pickled:>9.3f}")
+    print(f"{'shared snapshot':<24} {bytes_shared:>12.0f} {t_shared:>9.3f}")
+    print(f"publish v{handle.version}: {1000 * t_publish:.1f} ms, blocked after roll-forward "
+          f"{[r['blocked'] for r in rolled]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=300)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--grid", default="C+L")
+    parser.add_argument("--tasks", type=int, default=64)
+    parser.add_argument("--demands", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    main(parser.parse_args())
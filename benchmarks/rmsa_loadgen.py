@@ -0,0 +1,94 @@
+"""
+RMSA 服务压测脚本：在本机启动（或连接到已有的）RMSA 服务，
+用多个并发客户端发送 allocate / release 请求，统计吞吐量与尾延迟。
+
+    python benchmarks/rmsa_loadgen.py --clients 16 --requests 500
+    python benchmarks/rmsa_loadgen.py --connect 127.0.0.1:5555
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import network
+from rmsa_service import RMSAService, RMSAClient
+
+
+async def _client_worker(client, pairs, num_requests, hold, rng, latencies, results):
+    active = []
+    for _ in range(num_requests):
+        if active and (len(active) >= hold or rng.random() < 0.3):
+            conn_id = active.pop(rng.randrange(len(active)))
+            t0 = time.perf_counter()
+            await client.release(conn_id)
+            latencies.append(time.perf_counter() - t0)
+            continue
+        src, dst, demand = pairs[rng.randrange(len(pairs))]
+        t0 = time.perf_counter()
+        response = await client.allocate(src, dst, demand)
+        latencies.append(time.perf_counter() - t0)
+        if response.get("ok"):
+            active.append(response["id"])
+            results["allocated"] += 1
+        else:
+            results["blocked"] += 1
+
+
+async def run_load(args):
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    else:
+        service = RMSAService(args.topology, batch_window=args.batch_window_ms / 1000.0)
+        server = await service.serve("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    pairs = network.load_traffic(args.traffic)
+    latencies = []
+    results = {"allocated": 0, "blocked": 0}
+    clients = [await RMSAClient.connect(host, port) for _ in range(args.clients)]
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[
+        _client_worker(c, pairs, args.requests, args.hold, random.Random(args.seed + i), latencies, results)
+        for i, c in enumerate(clients)
+    ])
+    elapsed = time.perf_counter() - t0
+    final_metrics = await clients[0].metrics()
+
+    for c in clients:
+        await c.close()
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+    lat_ms = np.array(latencies) * 1000.0
+    print(f"requests:     {len(latencies)}  ({args.clients} clients)")
+    print(f"elapsed:      {elapsed:.3f} s")
+    print(f"throughput:   {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency p50:  {np.percentile(lat_ms, 50):.2f} ms")
+    print(f"latency p95:  {np.percentile(lat_ms, 95):.2f} ms")
+    print(f"latency p99:  {np.percentile(lat_ms, 99):.2f} ms")
+    print(f"latency max:  {lat_ms.max():.2f} ms")
+    print(f"allocated / blocked: {results['allocated']} / {results['blocked']}")
+    print(f"batches:      {final_metrics['stats']['batches']}")
+
+
+if __name__ == "__main__":
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="RMSA service load generator")
+    parser.add_argument("--topology", default=os.path.join(root, "Germany-7nodes", "G7-topology.txt"))
+    parser.add_argument("--traffic", default=os.path.join(root, "Germany-7nodes", "G7-matrix-1.txt"))
+    parser.add_argument("--connect", default=None, help="host:port of a running service")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per client")
+    parser.add_argument("--hold", type=int, default=4, help="max active connections per client")
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run_load(parser.parse_args()))
@@ -0,0 +1,35 @@
+"""
+生成用于基准测试的大规模合成拓扑（随机几何图 + 最近邻连边，保证连通）
+"""
+import networkx as nx
+import numpy as np
+
+
+def random_topology(num_nodes=500, degree=3, seed=0, scale_km=3000.0):
+    """
+    :param num_nodes: 节点数
+    :param degree: 每个节点连向最近邻的数量（平均度约为 2*degree）
+    :param scale_km: 节点分布区域的边长 (km)
+    :return: 与 network.load_topology 相同格式的 nx.Graph（节点编号从 1 开始，边权 weight 为 km）
+    """
+    rng = np.random.default_rng(seed)
+    pos = rng.random((num_nodes, 2)) * scale_km
+    dist = np.sqrt(((pos[:, None, :] - pos[None, :, :]) ** 2).sum(axis=2))
+
+    G = nx.Graph()
+    G.add_nodes_from(range(1, num_nodes + 1))
+    nearest = np.argsort(dist, axis=1)[:, 1:degree + 1]
+    for i in range(num_nodes):
+        for j in nearest[i]:
+            G.add_edge(i + 1, int(j) + 1, weight=float(round(dist[i, j], 1)))
+
+    # 把各连通分量用最短的跨分量边连起来
+    components = [sorted(c) for c in nx.connected_components(G)]
+    while len(components) > 1:
+        a = np.array(components[0]) - 1
+        b = np.array([n for c in components[1:] for n in c]) - 1
+        sub = dist[np.ix_(a, b)]
+        i, j = np.unravel_index(np.argmin(sub), sub.shape)
+        G.add_edge(int(a[i]) + 1, int(b[j]) + 1, weight=float(round(sub[i, j], 1)))
+        components = [sorted(c) for c in nx.connected_components(G)]
+    return G
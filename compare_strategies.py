@@ -0,0 +1,191 @@
+import argparse
+
+import numpy as np
+import network
+import modulation
+import metrics
+import allocator
+import spectrum_assignment
+import spectrum_grid
+
+# 默认对比：ks_main 中注释切换的四种选路策略，频谱分配均为 Best-Fit
+DEFAULT_STRATEGIES = [(selector, "best_fit") for selector in allocator.PATH_SELECTORS]
+
+
+class StrategyStack:
+    """
+    N 个策略的频谱状态堆叠成一个三维数组 free[策略, 链路, FSU]（1=空闲, 0=占用）：
+      - states[n] 是第 n 个策略的 SpectrumState，其中每条链路的数组都是 free[n, l] 的视图，
+        因此现有的 SA 函数原地修改 states[n] 时，三维数组同步更新
+      - 选路打分（负载 / 碎片化熵）直接在三维数组上对所有策略一起向量化计算
+    """
+
+    def __init__(self, G, num_strategies, grid=None):
+        template = network.init_spectrum(G, grid)
+        self.grid = template.grid
+        self.links = list(template.keys())
+        self.link_index = {link: i for i, link in enumerate(self.links)}
+        self.free = np.ones((num_strategies, len(self.links), self.grid.num_slots))
+        self.states = []
+        for n in range(num_strategies):
+            state = spectrum_grid.SpectrumState(grid=self.grid)
+            for i, link in enumerate(self.links):
+                state[link] = self.free[n, i]
+            self.states.append(state)
+
+    def path_link_ids(self, path):
+        return np.array([self.link_index[(path[i], path[i + 1])] for i in range(len(path) - 1)], dtype=np.int64)
+
+
+def _score_paths(stack, link_ids, need_load, need_entropy):
+    """
+    对所有策略、所有候选路径一次性打分
+    :param link_ids: 每条候选路径的链路编号数组
+    :return: dict，键为 "load_avg" / "entropy_max" / "entropy_avg"，值为 (策略数, 路径数) 矩阵
+    """
+    hops = np.array([len(ids) for ids in link_ids])
+    table = np.zeros((len(link_ids), hops.max()), dtype=np.int64)  # 路径 × 跳数，填充位置在 valid 中为 False
+    valid = np.arange(hops.max()) < hops[:, None]
+    table[valid] = np.concatenate(link_ids)
+    used_links, position = np.unique(table[valid], return_inverse=True)
+    rows = stack.free[:, used_links, :]  # (策略数, 涉及的链路数, FSU 数)
+
+    scores = {}
+    if need_load:
+        per_link = np.zeros((rows.shape[0],) + table.shape)
+        per_link[:, valid] = (rows.shape[2] - rows.sum(axis=2))[:, position]
+        scores["load_avg"] = per_link.sum(axis=2) / hops
+    if need_entropy:
+        per_link = np.zeros((rows.shape[0],) + table.shape)
+        per_link[:, valid] = metrics.fragmentation_entropy_rows(rows)[:, position]
+        scores["entropy_avg"] = per_link.sum(axis=2) / hops
+        scores["entropy_max"] = np.where(valid, per_link, -np.inf).max(axis=2)
+    return scores
+
+
+# 选路策略 → 在打分矩阵上的选择（argmin/argmax 取第一个，与 routing 中严格比较的结果一致）
+SELECTIONS = {
+    "entropy_max": lambda scores: np.argmin(scores["entropy_max"], axis=1),
+    "entropy_avg": lambda scores: np.argmin(scores["entropy_avg"], axis=1),
+    "highest_loaded": lambda scores: np.argmax(scores["load_avg"], axis=1),
+    "least_loaded": lambda scores: np.argmin(scores["load_avg"], axis=1),
+}
+
+
+def run_comparison(topology_file, traffic_file, strategies=None, grid=None, k=5, use_mod_aware=True):
+    """
+    在同一个流量序列上同步运行多个 (选路策略, 频谱分配算法) 组合：
+    流量解析、K 最短路、路径长度 / 调制 / 拆分只计算一次，由所有策略共享
+    :param strategies: [(selector, assigner), ...]，名称见 allocator.PATH_SELECTORS / SPECTRUM_ASSIGNERS
+    :return: (strategies, results, states, blocked)
+             results[n] 与 ks_main.run_rmsa 的 results 格式相同；states[n] 为第 n 个策略的频谱状态；
+             blocked[n] 为第 n 个策略未能分配的子流量数
+    """
+    strategies = list(strategies or DEFAULT_STRATEGIES)
+    G = network.load_topology(topology_file)
+    traffic_matrix = network.load_traffic(traffic_file)
+    stack = StrategyStack(G, len(strategies), grid)
+    slot_width = stack.grid.slot_width_ghz
+
+    selectors = [selector for selector, _ in strategies]
+    need_load = any(s in ("highest_loaded", "least_loaded") for s in selectors)
+    need_entropy = any(s in ("entropy_max", "entropy_avg") for s in selectors)
+
+    path_cache = {}
+    results = [[] for _ in strategies]
+    blocked = [0] * len(strategies)
+
+    for src, dst, demand in traffic_matrix:
+        paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        if not paths:
+            for n in range(len(strategies)):
+                blocked[n] += 1
+            continue
+
+        scores = _score_paths(stack, [stack.path_link_ids(p) for p in paths], need_load, need_entropy)
+        choice = np.empty(len(strategies), dtype=np.int64)
+        for selector in set(selectors):
+            members = [n for n, s in enumerate(selectors) if s == selector]
+            choice[members] = SELECTIONS[selector](scores)[members]
+
+        lengths = [allocator.path_length(G, p) for p in paths]
+        if use_mod_aware:
+            # routing.mod_aware：所选路径的容量低于最短路时改用最短路
+            capacity = np.array([modulation.get_max_capacity(length) for length in lengths])
+            choice = np.where(capacity[choice] >= capacity[0], choice, 0)
+
+        # 同一条路径上的拆分和调制对所有策略相同，只计算一次
+        plans = {}
+        for n, (_, assigner) in enumerate(strategies):
+            p = int(choice[n])
+            if p not in plans:
+                sub_requests = spectrum_assignment.split_traffic(demand, lengths[p])
+                plans[p] = [(sub, modulation.compute_required_fsus(sub, lengths[p], slot_width)[1])
+                            for sub in sub_requests]
+            path = paths[p]
+            assign = allocator.SPECTRUM_ASSIGNERS[assigner]
+            fsu_starts = []
+            modulation_used = None
+            for sub_demand, modulation_used in plans[p]:
+                fsu_start = assign(G, path, sub_demand, stack.states[n])
+                if fsu_start == -1:
+                    blocked[n] += 1
+                else:
+                    fsu_starts.append(fsu_start)
+            if fsu_starts:
+                results[n].append((src, dst, demand, path, modulation_used, fsu_starts))
+
+    return strategies, results, stack.states, blocked
+
+
+def compare_metrics(states, blocked):
+    """
+    每个策略的 __main__ 指标（metrics.report）
+    :return: [(指标名, [每个策略的值])]
+    """
+    reports = [metrics.report(state) for state in states]
+    return [
+        ("Total used FSUs", [r.total_used_fsus for r in reports]),
+        ("Highest FSU (max over links)", [r.max_highest_fsu for r in reports]),
+        ("Max fragmentation entropy", [r.max_fragmentation_entropy for r in reports]),
+        ("Utilization entropy", [r.utilization_entropy for r in reports]),
+        ("Compactness", [r.compactness for r in reports]),
+        ("Blocked lightpaths", list(blocked)),
+    ]
+
+
+def format_table(strategies, rows):
+    """ 并排的指标表：每列一个策略 """
+    names = [f"{selector}+{assigner}" for selector, assigner in strategies]
+    label_width = max(len(label) for label, _ in rows)
+    widths = [max(len(name), 10) for name in names]
+    lines = [" " * label_width + " | " + " | ".join(name.rjust(w) for name, w in zip(names, widths))]
+    lines.append("-" * len(lines[0]))
+    for label, values in rows:
+        cells = [(f"{v:.4f}" if isinstance(v, float) else str(v)).rjust(w) for v, w in zip(values, widths)]
+        lines.append(label.ljust(label_width) + " | " + " | ".join(cells))
+    return "\n".join(lines)
+
+
+def parse_strategy(text):
+    """ "least_loaded+best_fit" → ("least_loaded", "best_fit")；省略分配算法时默认 best_fit """
+    selector, _, assigner = text.partition("+")
+    assigner = assigner or "best_fit"
+    if selector not in allocator.PATH_SELECTORS or assigner not in allocator.SPECTRUM_ASSIGNERS:
+        raise argparse.ArgumentTypeError(f"unknown strategy {text!r}")
+    return selector, assigner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run path-selection strategies side by side")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", default="Germany-7nodes/G7-matrix-1.txt")
+    parser.add_argument("--strategy", type=parse_strategy, action="append",
+                        help="selector[+assigner]，可重复；默认四种选路策略 + best_fit")
+    parser.add_argument("--grid", default=None, help="频谱网格预置名称，如 C, C+L, C-6.25")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    strategies, results, states, blocked = run_comparison(args.topology, args.traffic, args.strategy,
+                                                          args.grid, args.k)
+    print(format_table(strategies, compare_metrics(states, blocked)))
@@ -0,0 +1,220 @@
+import heapq
+
+import numpy as np
+
+
+class CSRGraph:
+    """
+    紧凑的 CSR 邻接表示，由 network.load_topology 得到的图构建一次：
+      - nodes:    索引 -> 节点编号
+      - indptr:   节点 i 的出边为 indices[indptr[i]:indptr[i+1]]
+      - indices:  出边终点（节点索引）
+      - weights:  出边长度 (km)
+      - arc_link: 出边对应的有向链路编号
+      - links:    有向链路编号 -> (u, v)，与频谱字典的键一致
+    无向边会生成两条有向链路 (u, v) 和 (v, u)。
+    """
+
+    def __init__(self, nodes, indptr, indices, weights, arc_link, links):
+        self.nodes = nodes
+        self.node_index = {node: i for i, node in enumerate(nodes.tolist())}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.arc_link = arc_link
+        self.links = links
+        self.link_index = {link: i for i, link in enumerate(links)}
+        self.link_length = np.empty(len(links))
+        self.link_length[arc_link] = weights
+
+        # Dijkstra 热循环中使用 Python 列表，避免逐元素访问 NumPy 标量的开销
+        self._indptr = indptr.tolist()
+        self._indices = indices.tolist()
+        self._weights = weights.tolist()
+        self._arc_link = arc_link.tolist()
+        self._nodes = nodes.tolist()
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_links(self):
+        return len(self.links)
+
+    def link_mask(self, excluded_links=()):
+        """ 构造链路掩码（True=可用），excluded_links 中的有向链路被置为不可用 """
+        mask = np.ones(len(self.links), dtype=bool)
+        for link in excluded_links:
+            mask[self.link_index[link]] = False
+        return mask
+
+    def path_link_ids(self, path):
+        """ 节点路径 → 有向链路编号数组 """
+        return np.array([self.link_index[(path[i], path[i + 1])] for i in range(len(path) - 1)], dtype=np.int64)
+
+    def path_length(self, path):
+        """ 计算路径长度 (km) """
+        return float(self.link_length[self.path_link_ids(path)].sum()) if len(path) > 1 else 0.0
+
+
+def build_csr(G):
+    """
+    由 networkx 拓扑构建 CSRGraph（节点按编号排序，出边按终点排序，保证结果可复现）
+    :param G: network.load_topology 返回的图
+    :return: CSRGraph
+    """
+    nodes = np.array(sorted(G.nodes()), dtype=np.int64)
+    node_index = {node: i for i, node in enumerate(nodes.tolist())}
+
+    links = []
+    for u, v in G.edges():
+        links.append((u, v))
+        links.append((v, u))
+    link_index = {link: i for i, link in enumerate(links)}
+
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    indices, weights, arc_link = [], [], []
+    for i, u in enumerate(nodes.tolist()):
+        for v in sorted(G.neighbors(u), key=lambda n: node_index[n]):
+            indices.append(node_index[v])
+            weights.append(float(G[u][v]["weight"]))
+            arc_link.append(link_index[(u, v)])
+        indptr[i + 1] = len(indices)
+
+    return CSRGraph(nodes, indptr,
+                    np.array(indices, dtype=np.int64),
+                    np.array(weights, dtype=float),
+                    np.array(arc_link, dtype=np.int64),
+                    links)
+
+
+def _dijkstra(csr, s, t, link_ok, removed_links=None, removed_nodes=None):
+    """
+    节点索引 s → t 的最短路（内部函数）
+    :param link_ok: 链路是否可用的序列（按链路编号索引），None 表示全部可用
+    :return: (节点索引列表, 长度)；不可达时返回 (None, inf)
+    """
+    indptr, indices, weights, arc_link = csr._indptr, csr._indices, csr._weights, csr._arc_link
+    inf = float("inf")
+    dist = [inf] * len(indptr)
+    prev = {}
+    dist[s] = 0.0
+    if removed_nodes:
+        for n in removed_nodes:
+            dist[n] = -1.0  # 标记为已删除，不会被松弛
+    heap = [(0.0, s)]
+    heappop, heappush = heapq.heappop, heapq.heappush
+
+    while heap:
+        d, u = heappop(heap)
+        if u == t:
+            break
+        if d > dist[u]:
+            continue
+        for a in range(indptr[u], indptr[u + 1]):
+            nd = d + weights[a]
+            v = indices[a]
+            if nd >= dist[v]:  # 已删除节点的 dist 为 -1，同样被跳过
+                continue
+            link = arc_link[a]
+            if link_ok is not None and not link_ok[link]:
+                continue
+            if removed_links and link in removed_links:
+                continue
+            dist[v] = nd
+            prev[v] = u
+            heappush(heap, (nd, v))
+
+    if dist[t] == inf or dist[t] < 0:
+        return None, inf
+    path = [t]
+    while path[-1] != s:
+        path.append(prev[path[-1]])
+    path.reverse()
+    return path, dist[t]
+
+
+def _to_mask_list(link_mask):
+    return None if link_mask is None else np.asarray(link_mask, dtype=bool).tolist()
+
+
+def shortest_path(csr, src, dst, link_mask=None):
+    """
+    CSR 上的 Dijkstra 最短路
+    :param csr: CSRGraph
+    :param src: 源节点编号
+    :param dst: 目的节点编号
+    :param link_mask: 可选的布尔数组（按有向链路编号，True=可用），用于排除故障 / 频谱不可行的链路
+    :return: (路径节点列表, 长度)；不可达时返回 (None, inf)
+    """
+    s, t = csr.node_index[src], csr.node_index[dst]
+    path, length = _dijkstra(csr, s, t, _to_mask_list(link_mask))
+    if path is None:
+        return None, length
+    return [csr._nodes[i] for i in path], length
+
+
+def k_shortest_paths(csr, src, dst, k=5, link_mask=None, first_path=None):
+    """
+    CSR 上的有界 Yen 算法：返回按长度递增的至多 k 条无环路径
+    :param link_mask: 同 shortest_path
+    :param first_path: 可选，已经求出的最短路（节点编号列表），提供时不再重新计算
+    :return: [(路径节点列表, 长度), ...]
+    """
+    s, t = csr.node_index[src], csr.node_index[dst]
+    link_ok = _to_mask_list(link_mask)
+    if first_path is not None:
+        first = [csr.node_index[node] for node in first_path]
+        length = csr.path_length(first_path)
+    else:
+        first, length = _dijkstra(csr, s, t, link_ok)
+    if first is None:
+        return []
+
+    arc_of = {}  # (u, v) 索引对 -> (有向链路编号, 长度)
+    weights = csr._weights
+
+    def arc_info(u, v):
+        key = (u, v)
+        if key not in arc_of:
+            for a in range(csr._indptr[u], csr._indptr[u + 1]):
+                if csr._indices[a] == v:
+                    arc_of[key] = (csr._arc_link[a], weights[a])
+                    break
+        return arc_of[key]
+
+    accepted = [(first, length)]
+    seen = {tuple(first)}
+    candidates = []  # 堆：(长度, 路径元组)
+
+    while len(accepted) < k:
+        last_path = accepted[-1][0]
+        for i in range(len(last_path) - 1):
+            spur = last_path[i]
+            root = last_path[:i + 1]
+            root_len = sum(arc_info(root[j], root[j + 1])[1] for j in range(i))
+
+            # 删除与已有路径共享相同根路径的下一跳链路
+            removed_links = set()
+            for p, _ in accepted:
+                if len(p) > i + 1 and p[:i + 1] == root:
+                    removed_links.add(arc_info(p[i], p[i + 1])[0])
+            # 删除根路径上除 spur 以外的节点，保证无环
+            removed_nodes = set(root[:-1])
+
+            spur_path, spur_len = _dijkstra(csr, spur, t, link_ok, removed_links, removed_nodes)
+            if spur_path is None:
+                continue
+            total = root[:-1] + spur_path
+            key = tuple(total)
+            if key not in seen:
+                seen.add(key)
+                heapq.heappush(candidates, (root_len + spur_len, key))
+
+        if not candidates:
+            break
+        cand_len, cand = heapq.heappop(candidates)
+        accepted.append((list(cand), cand_len))
+
+    return [([csr._nodes[i] for i in p], l) for p, l in accepted]
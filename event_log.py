@@ -0,0 +1,331 @@
+"""
+结构化事件日志：仿真过程中的 分配 / 阻塞 / 拆分 / 复用 / 释放 记录为带数值字段的事件，
+由后台线程批量写入 JSONL 或二进制文件；控制台输出只是其上的一个可选渲染器 (ConsoleSink)。
+    log = EventLog([JsonlSink("events.jsonl")], level=INFO, sample=10)
+    results, spectrum = ks_main.run_rmsa(topology_file, traffic_file, log=log)
+    log.close()
+热循环中只把原始数值追加到缓冲区，格式化全部在后台线程完成；
+未启用日志（DISABLED，runner 的默认值）时每个事件只是一次级别比较，不做任何字符串格式化。
+"""
+import argparse
+import json
+import math
+import queue
+import struct
+import sys
+import threading
+import time
+
+import modulation
+
+# 日志级别
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning"}
+
+# 事件类型（二进制格式中记录其下标）
+EVENTS = ("demand", "split", "allocated", "reused", "blocked", "no_path", "released")
+
+# 光路角色
+ROLES = ("primary", "backup")
+_ROLE_IDS = {name: i for i, name in enumerate(ROLES)}
+
+# 调制格式名称 → MODULATION_FORMATS 下标
+MODULATION_IDS = {m["name"]: i for i, m in enumerate(modulation.MODULATION_FORMATS)}
+
+# 事件记录（缓冲区中的原始元组，字段缺省为 None）
+FIELDS = ("event", "level", "t", "src", "dst", "demand", "path", "modulation", "start", "num_slots",
+          "role", "parts", "length_km")
+
+# 二进制格式：文件头 + 每条记录一个定长头部 + 路径节点 (int32)
+BINARY_MAGIC = b"RMSAEVT1"
+_RECORD = struct.Struct("<BBbbHdddiiiii")  # event, level, role, modulation, 路径节点数, t, demand, length_km,
+                                           # src, dst, start, num_slots, parts
+
+
+class EventLog:
+    """
+    事件日志：
+      - sinks:      输出端列表（JsonlSink / BinarySink / ConsoleSink，或任何有 write(records) / close() 的对象）；
+                    为空时日志关闭
+      - level:      低于该级别的事件直接丢弃（DEBUG / INFO / WARNING）
+      - sample:     WARNING 以下的事件每 sample 条只保留 1 条（阻塞等告警事件总是保留）
+      - batch_size: 缓冲区达到该条数时整批交给后台写线程
+    """
+
+    def __init__(self, sinks=(), level=INFO, sample=1, batch_size=4096):
+        self.sinks = list(sinks)
+        self.level = level if self.sinks else OFF
+        self.sample = max(1, int(sample))
+        self.batch_size = batch_size
+        self._count = 0
+        self._buffer = []
+        self._t0 = time.perf_counter()
+        self._queue = None
+        self._thread = None
+        self._error = None  # 写线程中输出端抛出的第一个异常，在 flush / close 中重新抛出
+        if self.sinks:
+            self._queue = queue.Queue(maxsize=64)  # 写线程跟不上时阻塞生产者，限制内存
+            self._thread = threading.Thread(target=self._drain, name="event-log-writer", daemon=True)
+            self._thread.start()
+
+    # ----------------------------------------- 写入 -----------------------------------------
+    def _record(self, level, record):
+        """ 采样后把原始元组追加到缓冲区（调用前已做过级别判断） """
+        if level < WARNING and self.sample > 1:
+            self._count += 1
+            if self._count % self.sample:
+                return
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self._queue.put(self._buffer)
+            self._buffer = []
+
+    def _drain(self):
+        while True:
+            batch = self._queue.get()
+            try:
+                if batch is None:
+                    return
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception as e:  # 磁盘已满 / 文件已关闭等：记录下来并继续取队列，生产者不会被阻塞
+                        if self._error is None:
+                            self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """ 把缓冲区交给写线程并等待写完；写线程中输出端出错时在这里抛出该异常 """
+        if self._queue is None:
+            return
+        if self._buffer:
+            self._queue.put(self._buffer)
+            self._buffer = []
+        self._queue.join()
+        self._raise_error()
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        """
+        写完所有事件、停止写线程并关闭输出端（之后日志处于关闭状态）；
+        写线程中出现过的异常在所有输出端关闭后重新抛出
+        """
+        if self._queue is None:
+            return
+        try:
+            self.flush()
+        except Exception as e:
+            self._error = self._error or e
+        self._queue.put(None)
+        self._thread.join()
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                self._error = self._error or e
+        self._queue = None
+        self.level = OFF
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----------------------------------------- 事件 -----------------------------------------
+    def demand(self, src, dst, demand):
+        """ 开始处理一个流量需求 """
+        if self.level <= DEBUG:
+            self._record(DEBUG, (0, DEBUG, time.perf_counter() - self._t0, src, dst, demand,
+                                 None, None, None, None, None, None, None))
+
+    def split(self, src, dst, demand, parts, length_km):
+        """ 流量超过单通道容量，拆分为 parts 个子流量 """
+        if self.level <= DEBUG:
+            self._record(DEBUG, (1, DEBUG, time.perf_counter() - self._t0, src, dst, demand,
+                                 None, None, None, None, None, parts, length_km))
+
+    def allocated(self, src, dst, demand, path, modulation_name, start, num_slots, role="primary"):
+        """ 子流量分配成功 """
+        if self.level <= INFO:
+            self._record(INFO, (2, INFO, time.perf_counter() - self._t0, src, dst, demand, path,
+                                MODULATION_IDS[modulation_name], start, num_slots, _ROLE_IDS[role], None, None))
+
+    def reused(self, src, dst, demand, path, modulation_name, start, num_slots):
+        """ 备用子流量复用了已预留的共享频谱 """
+        if self.level <= INFO:
+            self._record(INFO, (3, INFO, time.perf_counter() - self._t0, src, dst, demand, path,
+                                MODULATION_IDS[modulation_name], start, num_slots, 1, None, None))
+
+    def blocked(self, src, dst, demand, path=None, role="primary"):
+        """ 子流量分配失败 """
+        if self.level <= WARNING:
+            self._record(WARNING, (4, WARNING, time.perf_counter() - self._t0, src, dst, demand, path,
+                                   None, None, None, _ROLE_IDS[role], None, None))
+
+    def no_path(self, src, dst, demand):
+        """ 找不到候选路径 """
+        if self.level <= WARNING:
+            self._record(WARNING, (5, WARNING, time.perf_counter() - self._t0, src, dst, demand,
+                                   None, None, None, None, None, None, None))
+
+    def released(self, src, dst, demand, path, start, num_slots):
+        """ 光路被释放 """
+        if self.level <= INFO:
+            self._record(INFO, (6, INFO, time.perf_counter() - self._t0, src, dst, demand, path,
+                                None, start, num_slots, None, None, None))
+
+
+# 关闭状态的日志：runner 的默认值
+DISABLED = EventLog()
+
+
+def to_dict(record):
+    """ 原始元组 → 事件字典（省略缺省字段，数值字段保持数值） """
+    event = {"event": EVENTS[record[0]], "level": record[1]}
+    for name, value in zip(FIELDS[2:], record[2:]):
+        if value is not None:
+            event[name] = list(value) if name == "path" else value
+    if "role" in event:
+        event["role"] = ROLES[event["role"]]
+    return event
+
+
+# ----------------------------------------- 输出端 -----------------------------------------
+class JsonlSink:
+    """ 每个事件一行 JSON """
+
+    def __init__(self, path_or_file):
+        self._own = isinstance(path_or_file, str)
+        self.f = open(path_or_file, "w", encoding="utf-8", buffering=1 << 20) if self._own else path_or_file
+
+    def write(self, records):
+        dumps = json.dumps
+        self.f.write("".join(dumps(to_dict(record), separators=(",", ":")) + "\n" for record in records))
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        if self._own:
+            self.f.close()
+        else:
+            self.f.flush()
+
+
+class BinarySink:
+    """ 紧凑二进制格式（BINARY_MAGIC 文件头 + _RECORD 定长头部 + 路径节点），用 read_events 读回 """
+
+    def __init__(self, path):
+        self.f = open(path, "wb", buffering=1 << 20)
+        self.f.write(BINARY_MAGIC)
+
+    def write(self, records):
+        out = bytearray()
+        pack = _RECORD.pack
+        for (event, level, t, src, dst, demand, path, mod, start, num_slots, role, parts, length_km) in records:
+            nodes = path if path is not None else ()
+            out += pack(event, level, -1 if role is None else role, -1 if mod is None else mod, len(nodes),
+                        t, demand, math.nan if length_km is None else length_km, src, dst,
+                        -1 if start is None else start, -1 if num_slots is None else num_slots,
+                        -1 if parts is None else parts)
+            if nodes:
+                out += struct.pack(f"<{len(nodes)}i", *nodes)
+        self.f.write(out)
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ConsoleSink:
+    """ 人类可读的渲染器（格式与原先各 runner 的逐条 print 一致） """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, records):
+        self.stream.write("".join(render(to_dict(record)) + "\n" for record in records))
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.stream.flush()
+
+
+def render(event):
+    """ 事件字典 → 一行可读文本 """
+    kind = event["event"]
+    src, dst, demand = event["src"], event["dst"], event["demand"]
+    if kind == "demand":
+        return "---------------------------------------"
+    if kind == "split":
+        return f"🔀 流量 {src}->{dst} ({demand} Gbps) 拆分为 {event['parts']} 个子流量, 路径长度 {event['length_km']:g} km"
+    if kind == "blocked":
+        return f"🚨 流量 {src}->{dst} (拆分后: {demand} Gbps) 失败！无法分配频谱！"
+    if kind == "no_path":
+        return f"🚨 无法找到从 {src} 到 {dst} 的路径"
+    if kind == "released":
+        return f"♻️ 释放 {src}->{dst} ({demand} Gbps) 路径: {event['path']}, FSU [{event['start']}, {event['start'] + event['num_slots']})"
+    label = {"primary": "路径", "backup": "备用路径"}[event["role"]]
+    if kind == "reused":
+        label = "[共享]" + label
+    name = modulation.MODULATION_FORMATS[event["modulation"]]["name"]
+    return (f"✅ 流量 {src}->{dst} (拆分后: {demand} Gbps) 成功！{label}: {event['path']}, 调制: {name}, "
+            f"需要 {event['num_slots']} FSU, 频谱起始位置: {event['start']}")
+
+
+# ----------------------------------------- 读取 -----------------------------------------
+def read_events(path):
+    """ 读取 JsonlSink / BinarySink 写出的文件，逐个返回事件字典 """
+    with open(path, "rb") as f:
+        head = f.read(len(BINARY_MAGIC))
+        if head != BINARY_MAGIC:
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        (event, level, role, mod, n, t, demand, length_km,
+         src, dst, start, num_slots, parts) = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        path = list(struct.unpack_from(f"<{n}i", data, offset)) if n else None
+        offset += 4 * n
+        demand = int(demand) if demand.is_integer() else demand
+        yield to_dict((event, level, t, src, dst, demand, path, None if mod < 0 else mod,
+                       None if start < 0 else start, None if num_slots < 0 else num_slots,
+                       None if role < 0 else role, None if parts < 0 else parts,
+                       None if math.isnan(length_km) else length_km))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render or summarize an RMSA event log")
+    parser.add_argument("path", help="JSONL 或二进制事件日志")
+    parser.add_argument("--summary", action="store_true", help="只输出各类事件的条数")
+    args = parser.parse_args()
+
+    counts = {}
+    for event in read_events(args.path):
+        if args.summary:
+            counts[event["event"]] = counts.get(event["event"], 0) + 1
+        else:
+            print(render(event))
+    if args.summary:
+        print(json.dumps(counts))
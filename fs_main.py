@@ -1,12 +1,12 @@
+import os
 import network
 import routing
 import spectrum_assignment
 import modulation
-import numpy as np
 import metrics
-import visualization
+import event_log
 
-def run_rmsa(topology_file, traffic_file):
+def run_rmsa(topology_file, traffic_file, grid=None, log=None, store=None):
     """
     运行完整的 RMSA 测试，包括:
     1. 解析网络拓扑
@@ -16,7 +16,11 @@ def run_rmsa(topology_file, traffic_file):
     5. 进行频谱分配（支持流量拆分）
         可以选择：a. first fit
                 b. best fit
+    :param log: event_log.EventLog，记录分配 / 阻塞 / 拆分事件；默认不记录
+    :param store: 可选的 results_store.ResultsStore，每条成功分配的光路追加一行
     """
+    if log is None:
+        log = event_log.DISABLED
 
     # 1️⃣ **解析拓扑**
     G = network.load_topology(topology_file)
@@ -24,17 +28,16 @@ def run_rmsa(topology_file, traffic_file):
     # 2️⃣ **解析流量需求**
     traffic_matrix = network.load_traffic(traffic_file)
 
-    # 3️⃣ **初始化 320 个 FSU 频谱**
-    spectrum = {}
-    for u, v in G.edges():
-        spectrum[(u, v)] = np.ones(320)
-        spectrum[(v, u)] = np.ones(320)  # 🚀 确保存储双向链路
+    # 3️⃣ **初始化频谱（默认 C 波段 320 个 FSU，可通过 grid 配置）**
+    spectrum = network.init_spectrum(G, grid)  # 🚀 双向链路
+    slot_width = spectrum.grid.slot_width_ghz
 
     results = []
 
     # 4️⃣ **遍历流量需求，计算路径、拆分流量、分配频谱**
     for src, dst, demand in traffic_matrix:
-        print('---------------------------------------')
+        log.demand(src, dst, demand)
+        demand_id = store.new_demand() if store is not None else None
         # 计算最短路径
         path = routing.fixed_shortest_path_routing(G, src, dst)
 
@@ -43,13 +46,15 @@ def run_rmsa(topology_file, traffic_file):
 
         # **如果流量超过单通道容量，则拆分**
         sub_requests = spectrum_assignment.split_traffic(demand, path_length_km)
+        if len(sub_requests) > 1:
+            log.split(src, dst, demand, len(sub_requests), path_length_km)
 
         # 存储该流量的所有 lightpaths
         fsu_starts = []
 
         for sub_demand in sub_requests:
             # 计算所需 FSU 数量 & 选择调制格式
-            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, path_length_km)
+            num_fsus, modulation_used = modulation.compute_required_fsus(sub_demand, path_length_km, slot_width)
 
             # ------------------------------------ 进行频谱分配 ---------------------------------------------
             # fsu_start = spectrum_assignment.best_fit_spectrum_assignment(G, path, sub_demand, spectrum)
@@ -57,10 +62,12 @@ def run_rmsa(topology_file, traffic_file):
             fsu_start = spectrum_assignment.first_fit_spectrum_assignment(G, path, sub_demand, spectrum)
             # ----------------------------------------------------------------------------------------------
             if fsu_start == -1:
-                print(f"🚨 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 失败！无法分配频谱！")
+                log.blocked(src, dst, sub_demand, path)
             else:
                 fsu_starts.append(fsu_start)
-                print(f"✅ 流量 {src}->{dst} (拆分后: {sub_demand} Gbps) 成功！路径: {path}, 调制: {modulation_used}, 需要 {num_fsus} FSU, 频谱起始位置: {fsu_start}")
+                if store is not None:
+                    store.append(demand_id, src, dst, sub_demand, path, modulation_used, fsu_start, num_fsus)
+                log.allocated(src, dst, sub_demand, path, modulation_used, fsu_start, num_fsus)
 
         # **如果所有子流量都成功分配，则存储结果**
         if fsu_starts:
@@ -69,31 +76,30 @@ def run_rmsa(topology_file, traffic_file):
     return results, spectrum
 
 if __name__ == "__main__":
-    # **修改文件路径为你的拓扑和流量矩阵**
-    topology_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-topology.txt"
-    traffic_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-matrix-5.txt"
+    # **修改文件路径为你的拓扑和流量矩阵（相对于仓库目录）**
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+    topology_file = os.path.join(DATA_DIR, "Germany-7nodes", "G7-topology.txt")
+    traffic_file = os.path.join(DATA_DIR, "Germany-7nodes", "G7-matrix-5.txt")
 
-    # topology_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Italian-10nodes/IT10-topology.txt"
-    # traffic_file = "/Users/macbook/Documents/Pycharm/EEN115/Proj/Italian-10nodes/IT10-matrix-5.txt"
+    # topology_file = os.path.join(DATA_DIR, "Italian-10nodes", "IT10-topology.txt")
+    # traffic_file = os.path.join(DATA_DIR, "Italian-10nodes", "IT10-matrix-5.txt")
 
     print("🚀 运行 RMSA 仿真...")
-    results, spectrum = run_rmsa(topology_file, traffic_file)
+    # 逐条事件由控制台渲染器输出；写文件可改用 event_log.JsonlSink / event_log.BinarySink
+    with event_log.EventLog([event_log.ConsoleSink()], level=event_log.DEBUG) as log:
+        results, spectrum = run_rmsa(topology_file, traffic_file, log=log)
 
-    # 📌 **计算每条链路的最高 FSU**
-    link_fsu = metrics.highest_fsu_per_link(spectrum)
+    # 🚀 一次扫描计算所有指标
+    report = metrics.report(spectrum)
+    total_fsus = report.total_used_fsus
+    max_entropy = report.max_fragmentation_entropy
+    utilization_H = report.utilization_entropy
 
+    # 📌 **每条链路的最高 FSU**
     print("\n📊 最高 FSU 索引（每条链路）:")
-    for link, max_fsu in link_fsu.items():
+    for link, max_fsu in report.highest_fsu_per_link().items():
         print(f"链路 {link}: 最高 FSU = {max_fsu}")
 
-    # 🚀 计算关键指标
-    total_fsus = metrics.total_used_fsus(spectrum)
-    max_entropy = max(metrics.calculate_fragmentation_entropy(spectrum)
-                      for spectrum in spectrum.values())
-
-    #shannon_H = metrics.calculate_shannon_entropy(spectrum)
-    utilization_H = metrics.calculate_network_utilization_entropy(spectrum)
-
     print("\n📊 仿真完成！")
     print(f"✅ 总使用的 FSU 数量: {total_fsus}")
     print(f"✅ Shannon 熵: {max_entropy:.4f}")
@@ -0,0 +1,265 @@
+"""
+流量疏导 (traffic grooming)：分配前先把低于线路速率的流量装入已有光路的剩余容量，
+只有装不下时才建立新光路（新光路按 MODULATION_FORMATS 的速率上限承载，超出部分再建下一条）：
+    layer = GroomingLayer(G, spectrum)
+    for src, dst, demand in network.load_traffic(traffic_file):
+        layer.add_demand(src, dst, demand)
+    layer.summary()
+每个流量依次尝试：
+  1. 同一 (src, dst) 已有光路的剩余容量（剩余容量索引中 best-fit，装不下时从剩余最多的光路开始逐条填充）
+  2. 扩展同一 (src, dst) 的已有光路：两侧相邻 FSU 在路径所有链路上空闲时加宽频谱块（不超过速率上限所需的 FSU 数）
+  3. 两跳疏导：经中间节点 m，由 (src, m) 与 (m, dst) 两条已有光路的公共剩余容量承载
+  4. 新建光路（调用现有的选路 / SA 策略）
+光路的容量 = min(调制格式速率, FSU 数 × FSU 宽度 × 频谱效率)：按 FSU 取整后多出的带宽也作为剩余容量使用。
+"""
+import argparse
+
+import network
+import metrics
+import modulation
+import allocator
+import spectrum_grid
+import event_log
+
+EPS = 1e-9
+FORMATS = {m["name"]: m for m in modulation.MODULATION_FORMATS}
+
+
+class GroomingLayer:
+    """
+    疏导层状态：
+      - lightpaths: 光路编号 → 光路字典（allocator.allocate_on_path 的格式，demand 为当前承载的流量，
+                    另有 capacity / length_km / flows [(流量编号, Gbps), ...]）
+      - by_pair:    (src, dst) → 该节点对的光路编号列表
+      - residual:   (src, dst) → {光路编号: 剩余容量}，只包含剩余容量大于 0 的光路（剩余容量索引）
+      - out_pairs:  src → 有剩余容量光路的 dst 集合（两跳疏导时查找中间节点）
+    """
+
+    def __init__(self, G, spectrum, selector="least_loaded", assigner="best_fit", k=5, use_mod_aware=True,
+                 expand=True, multihop=True, log=None):
+        self.G = G
+        self.spectrum = spectrum
+        self.grid = spectrum_grid.grid_of(spectrum)
+        self.selector = selector
+        self.assigner = assigner
+        self.k = k
+        self.use_mod_aware = use_mod_aware
+        self.expand = expand
+        self.multihop = multihop
+        self.log = log if log is not None else event_log.DISABLED
+        self.path_cache = {}
+
+        self.lightpaths = {}
+        self.by_pair = {}
+        self.residual = {}
+        self.out_pairs = {}
+        self.next_id = 0
+        self.next_flow = 0
+        self.stats = {"demands": 0, "offered_gbps": 0.0, "blocked_gbps": 0.0, "sa_calls": 0, "direct_gbps": 0.0,
+                      "expansions": 0, "multihop_gbps": 0.0}
+
+    # ----------------------------------------- 光路容量 -----------------------------------------
+    def _capacity(self, lp):
+        fmt = FORMATS[lp["modulation"]]
+        return min(fmt["rate"], lp["num_slots"] * self.grid.slot_width_ghz * fmt["rate"] / fmt["bandwidth"])
+
+    def _update_residual(self, lp_id):
+        lp = self.lightpaths[lp_id]
+        pair = (lp["src"], lp["dst"])
+        left = lp["capacity"] - lp["demand"]
+        if left > EPS:
+            self.residual.setdefault(pair, {})[lp_id] = left
+            self.out_pairs.setdefault(pair[0], set()).add(pair[1])
+        elif pair in self.residual:
+            entries = self.residual[pair]
+            entries.pop(lp_id, None)
+            if not entries:
+                del self.residual[pair]
+                self.out_pairs[pair[0]].discard(pair[1])
+
+    def _carry(self, lp_id, gbps, flow):
+        lp = self.lightpaths[lp_id]
+        lp["demand"] += gbps
+        lp["flows"].append((flow, gbps))
+        self._update_residual(lp_id)
+
+    # ----------------------------------------- 疏导步骤 -----------------------------------------
+    def _fill_direct(self, pair, remaining, flow, routes):
+        """ 步骤 1：装入同一节点对已有光路的剩余容量，返回未装下的流量 """
+        entries = self.residual.get(pair)
+        while entries and remaining > EPS:
+            fitting = [(left, lp_id) for lp_id, left in entries.items() if left >= remaining - EPS]
+            lp_id, left = (min(fitting)[1], remaining) if fitting else max(entries.items(), key=lambda x: x[1])
+            amount = min(left, remaining)
+            self._carry(lp_id, amount, flow)
+            routes.append(((lp_id,), amount))
+            remaining -= amount
+            entries = self.residual.get(pair)
+        return remaining
+
+    def _try_expand(self, lp_id, remaining):
+        """ 步骤 2：加宽光路的频谱块以多承载 remaining，成功返回 True """
+        lp = self.lightpaths[lp_id]
+        target = lp["demand"] + remaining
+        if target > FORMATS[lp["modulation"]]["rate"] + EPS:
+            return False
+        need = modulation.compute_required_fsus(target, lp["length_km"], self.grid.slot_width_ghz)[0]
+        extra = need - lp["num_slots"]
+        if extra <= 0:
+            return False
+        links = allocator.path_links(lp["path"])
+        start, end = lp["start"], lp["start"] + lp["num_slots"]
+        valid = self.grid.valid_starts(need)
+        for new_start, lo, hi in ((start, end, end + extra), (start - extra, start - extra, start)):
+            if lo < 0 or hi > self.grid.num_slots or not valid[new_start]:
+                continue
+            if all((self.spectrum[link][lo:hi] == 1).all() for link in links):
+                for link in links:
+                    self.spectrum[link][lo:hi] = 0
+                lp["start"], lp["num_slots"] = new_start, need
+                lp["capacity"] = self._capacity(lp)
+                self._update_residual(lp_id)
+                self.stats["expansions"] += 1
+                return True
+        return False
+
+    def _two_hop(self, src, dst, remaining):
+        """ 步骤 3：剩余容量都不小于 remaining 的 (src, m) 与 (m, dst) 光路，返回 (光路1, 光路2) 或 None """
+        best = None
+        for mid in self.out_pairs.get(src, ()):
+            if mid == dst or dst not in self.out_pairs.get(mid, ()):
+                continue
+            first = max(self.residual[(src, mid)].items(), key=lambda x: x[1])
+            second = max(self.residual[(mid, dst)].items(), key=lambda x: x[1])
+            common = min(first[1], second[1])
+            if common >= remaining - EPS and (best is None or common < best[0]):
+                best = (common, first[0], second[0])
+        return None if best is None else best[1:]
+
+    def _new_lightpath(self, src, dst, remaining, flow, routes):
+        """ 步骤 4：新建光路承载 min(remaining, 速率上限)，返回未承载的流量（失败时原样返回） """
+        paths = allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+        if not paths:
+            self.log.no_path(src, dst, remaining)
+            return remaining
+        path = allocator.select_path(self.G, paths, self.spectrum, self.selector, self.use_mod_aware)
+        length_km = allocator.path_length(self.G, path)
+        carry = min(remaining, modulation.get_max_capacity(length_km))
+        num_slots, modulation_used = modulation.compute_required_fsus(carry, length_km, self.grid.slot_width_ghz)
+        self.stats["sa_calls"] += 1
+        start = allocator.SPECTRUM_ASSIGNERS[self.assigner](self.G, path, carry, self.spectrum)
+        if start == -1:
+            self.log.blocked(src, dst, carry, path)
+            return remaining
+        self.log.allocated(src, dst, carry, path, modulation_used, start, num_slots)
+        lp_id = self.next_id
+        self.next_id += 1
+        lp = {"src": src, "dst": dst, "demand": 0.0, "path": list(path), "modulation": modulation_used,
+              "start": int(start), "num_slots": int(num_slots), "length_km": length_km, "flows": []}
+        lp["capacity"] = self._capacity(lp)
+        self.lightpaths[lp_id] = lp
+        self.by_pair.setdefault((src, dst), []).append(lp_id)
+        self._carry(lp_id, carry, flow)
+        routes.append(((lp_id,), carry))
+        return remaining - carry
+
+    # ----------------------------------------- 入口 -----------------------------------------
+    def add_demand(self, src, dst, demand):
+        """
+        疏导一个流量需求
+        :return: (routes, blocked_gbps)；routes 为 [(光路编号元组, Gbps), ...]，两跳疏导的光路编号元组长度为 2
+        """
+        flow = self.next_flow
+        self.next_flow += 1
+        self.stats["demands"] += 1
+        self.stats["offered_gbps"] += demand
+        routes = []
+        pair = (src, dst)
+
+        remaining = self._fill_direct(pair, demand, flow, routes)
+        if self.expand and remaining > EPS:
+            for lp_id in self.by_pair.get(pair, ()):
+                if self._try_expand(lp_id, remaining):
+                    remaining = self._fill_direct(pair, remaining, flow, routes)
+                    break
+        self.stats["direct_gbps"] += demand - remaining
+        if self.multihop and remaining > EPS:
+            hops = self._two_hop(src, dst, remaining)
+            if hops is not None:
+                for lp_id in hops:
+                    self._carry(lp_id, remaining, flow)
+                routes.append((hops, remaining))
+                self.stats["multihop_gbps"] += remaining
+                remaining = 0.0
+        while remaining > EPS:
+            left = self._new_lightpath(src, dst, remaining, flow, routes)
+            if left == remaining:
+                break
+            remaining = left
+        if remaining > EPS:
+            self.stats["blocked_gbps"] += remaining
+        return routes, max(remaining, 0.0)
+
+    def summary(self):
+        loads = [lp["demand"] / lp["capacity"] for lp in self.lightpaths.values()]
+        return {
+            **self.stats,
+            "lightpaths": len(self.lightpaths),
+            "total_used_fsus": int(metrics.total_used_fsus(self.spectrum)),
+            "mean_fill": sum(loads) / len(loads) if loads else 0.0,
+        }
+
+
+def run_grooming(topology_file, traffic_file, selector="least_loaded", assigner="best_fit", k=5, grid=None,
+                 expand=True, multihop=True, log=None):
+    """ 按 network.load_traffic 的顺序疏导整个流量矩阵，返回 (layer, spectrum) """
+    G = network.load_topology(topology_file)
+    spectrum = network.init_spectrum(G, grid)
+    layer = GroomingLayer(G, spectrum, selector, assigner, k, expand=expand, multihop=multihop, log=log)
+    for src, dst, demand in network.load_traffic(traffic_file):
+        layer.add_demand(src, dst, demand)
+    return layer, spectrum
+
+
+def run_ungroomed(topology_file, traffic_file, selector="least_loaded", assigner="best_fit", k=5, grid=None):
+    """ 对照：每个流量直接 allocator.allocate_demand（每个子流量一次 SA、一条光路） """
+    G = network.load_topology(topology_file)
+    spectrum = network.init_spectrum(G, grid)
+    path_cache = {}
+    sa_calls = lightpaths = blocked_gbps = 0
+    for src, dst, demand in network.load_traffic(traffic_file):
+        paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        allocated, failed = allocator.allocate_demand(G, paths, src, dst, demand, spectrum, selector, assigner)
+        sa_calls += len(allocated) + (len(failed) if paths else 0)
+        lightpaths += len(allocated)
+        blocked_gbps += sum(failed)
+    return {"sa_calls": sa_calls, "lightpaths": lightpaths, "blocked_gbps": blocked_gbps,
+            "total_used_fsus": int(metrics.total_used_fsus(spectrum))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Traffic grooming before spectrum allocation")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", nargs="+", default=[f"Germany-7nodes/G7-matrix-{i}.txt" for i in range(1, 6)])
+    parser.add_argument("--selector", default="least_loaded", choices=sorted(allocator.PATH_SELECTORS))
+    parser.add_argument("--assigner", default="best_fit", choices=sorted(allocator.SPECTRUM_ASSIGNERS))
+    parser.add_argument("--grid", default=None)
+    args = parser.parse_args()
+
+    variants = (("no grooming", None), ("direct", (False, False)), ("+expand", (True, False)),
+                ("+expand +2-hop", (True, True)))
+    header = f"{'traffic':<34} {'variant':<16} {'SA calls':>8} {'LPs':>5} {'FSUs':>6} {'fill':>6} {'blocked':>8}"
+    print(header)
+    print("-" * len(header))
+    for traffic_file in args.traffic:
+        for name, options in variants:
+            if options is None:
+                row = run_ungroomed(args.topology, traffic_file, args.selector, args.assigner, grid=args.grid)
+                fill = "-"
+            else:
+                layer, _ = run_grooming(args.topology, traffic_file, args.selector, args.assigner, grid=args.grid,
+                                        expand=options[0], multihop=options[1])
+                row = layer.summary()
+                fill = f"{row['mean_fill']:.2f}"
+            print(f"{traffic_file:<34} {name:<16} {row['sa_calls']:>8} {row['lightpaths']:>5} "
+                  f"{row['total_used_fsus']:>6} {fill:>6} {row['blocked_gbps']:>8.0f}")
@@ -0,0 +1,187 @@
+import numpy as np
+import network
+import modulation
+import spectrum_assignment
+import csr_graph
+import spectrum_grid
+import event_log
+
+# (最大传输距离 km, 调制格式)，由 modulation.MODULATION_FORMATS 按容量从高到低生成；
+# 与 modulation.select_modulation 的判定一致，最后一项（最低阶调制）不限距离
+REACH_TABLE = [(fmt["max_length"] if i < len(modulation.MODULATION_FORMATS) - 1 else float("inf"), fmt)
+               for i, fmt in enumerate(sorted(modulation.MODULATION_FORMATS, key=lambda fmt: -fmt["rate"]))]
+
+
+def free_slot_counts(csr, spectrum):
+    """
+    每条链路空闲 FSU 数的前缀和
+    :return: int32 矩阵 (链路数, FSU 数 + 1)，[l, s] 为链路 l 上 [0, s) 中空闲的 FSU 数
+    """
+    free = np.stack([spectrum[link] for link in csr.links]) == 1
+    counts = np.zeros((free.shape[0], free.shape[1] + 1), dtype=np.int32)
+    np.cumsum(free, axis=1, out=counts[:, 1:])
+    return counts
+
+
+def window_availability(csr, spectrum, width, counts=None):
+    """
+    计算每条链路上每个起点的 width 宽窗口是否空闲
+    :param csr: CSRGraph，行顺序为 csr.links
+    :param spectrum: 频谱字典（1=空闲, 0=占用）
+    :param width: 窗口宽度（FSU 数）
+    :param counts: 可选，已算好的 free_slot_counts(csr, spectrum)
+    :return: 布尔矩阵 (链路数, 起点数)，[l, s] 为 True 表示链路 l 上 [s, s+width) 全部空闲且不跨越波段边界
+    """
+    grid = spectrum_grid.grid_of(spectrum)
+    if width > grid.num_slots:
+        return np.zeros((len(csr.links), 0), dtype=bool)
+    if counts is None:
+        counts = free_slot_counts(csr, spectrum)
+    return ((counts[:, width:] - counts[:, :-width]) == width) & grid.valid_starts(width)
+
+
+class WindowCache:
+    """
+    按频谱版本缓存 free_slot_counts 和各宽度的 window_availability：
+    joint_rsa_assignment 每次分配后调用 mark_used，只重算路径上链路的前缀和，版本号加一，窗口矩阵随之失效。
+    只在频谱仅由 joint_rsa_assignment 修改时有效（如 run_rmsa）；在别处修改过频谱后需要重新创建
+    """
+
+    def __init__(self, csr, spectrum):
+        self.csr = csr
+        self.spectrum = spectrum
+        self.counts = free_slot_counts(csr, spectrum)
+        self.version = 0
+        self._windows = {}  # width → (version, 窗口矩阵)
+
+    def windows(self, width):
+        cached = self._windows.get(width)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, window_availability(self.csr, self.spectrum, width, self.counts))
+            self._windows[width] = cached
+        return cached[1]
+
+    def mark_used(self, link_ids):
+        for link_id in link_ids.tolist():
+            np.cumsum(self.spectrum[self.csr.links[link_id]] == 1, out=self.counts[link_id, 1:])
+        self.version += 1
+
+
+def _search_windows(csr, src, dst, windows, reach_km, policy):
+    """
+    对每个候选起点 s，以“窗口 s 空闲的链路”为掩码求最短路
+    :return: (start, path, length) 或 None
+    """
+    s_idx, t_idx = csr.node_index[src], csr.node_index[dst]
+    out_links = csr.arc_link[csr.indptr[s_idx]:csr.indptr[s_idx + 1]]
+    in_links = np.array([csr.link_index[(v, dst)] for v in
+                         csr.nodes[csr.indices[csr.indptr[t_idx]:csr.indptr[t_idx + 1]]].tolist()], dtype=np.int64)
+    # 源节点出链路和目的节点入链路都至少有一条可用的起点，才可能存在可行路径
+    feasible = windows[out_links].any(axis=0) & windows[in_links].any(axis=0)
+
+    best = None
+    cache = {}  # 相同的链路掩码只求一次最短路
+    for start in np.flatnonzero(feasible).tolist():
+        mask = windows[:, start]
+        key = mask.tobytes()
+        if key not in cache:
+            cache[key] = csr_graph.shortest_path(csr, src, dst, mask)
+        path, length = cache[key]
+        if path is None or length > reach_km:
+            continue
+        if policy == "earliest":
+            return start, path, length
+        if best is None or length < best[2]:
+            best = (start, path, length)
+    return best
+
+
+def joint_rsa_assignment(csr, spectrum, src, dst, demand, policy="earliest", cache=None):
+    """
+    联合路由与频谱分配（slot-window 分层图）：
+      - 按调制格式从高阶到低阶尝试，所需 FSU 数为 w，距离上限为该格式的传输距离
+      - 对每个起点 s，只保留窗口 [s, s+w) 空闲的链路，在其上求最短路
+      - policy="earliest": 起点最小的 (path, slot) 获胜；policy="shortest": 路径最短的获胜（同长取起点最小）
+      - 第一个找到可行解的调制格式即被采用（与 mod_aware 优先高容量的思路一致）
+    成功时直接在 spectrum 上标记占用。
+    :param demand: 单条光路的流量 (Gbps)，应不超过所选调制格式的容量
+    :param cache: 可选的 WindowCache（连续多次分配时复用），默认每次调用新建
+    :return: 光路字典 {src, dst, demand, path, modulation, start, num_slots}；失败返回 None
+    """
+    slot_width = spectrum_grid.grid_of(spectrum).slot_width_ghz
+    if cache is None:
+        cache = WindowCache(csr, spectrum)
+    for reach_km, fmt in REACH_TABLE:
+        if demand > fmt["rate"]:
+            continue  # 单条光路装不下，交给调用者拆分
+        num_slots = modulation.format_required_fsus(demand, fmt, slot_width)
+        found = _search_windows(csr, src, dst, cache.windows(num_slots), reach_km, policy)
+        if found is None:
+            continue
+
+        start, path, _ = found
+        for i in range(len(path) - 1):
+            spectrum[(path[i], path[i + 1])][start:start + num_slots] = 0
+        cache.mark_used(csr.path_link_ids(path))
+        return {
+            "src": src,
+            "dst": dst,
+            "demand": demand,
+            "path": path,
+            "modulation": fmt["name"],
+            "start": int(start),
+            "num_slots": int(num_slots),
+        }
+    return None
+
+
+def allocate_demand_joint(csr, spectrum, src, dst, demand, policy="earliest", cache=None):
+    """
+    联合 RSA 模式下分配一个流量：按无掩码最短路的容量拆分（与各 runner 的拆分方式一致），
+    再对每个子流量做联合搜索
+    :param cache: 可选的 WindowCache，见 joint_rsa_assignment
+    :return: (lightpaths, blocked)，格式同 allocator.allocate_on_path
+    """
+    shortest, length_km = csr_graph.shortest_path(csr, src, dst)
+    if shortest is None:
+        return [], [demand]
+    if cache is None:
+        cache = WindowCache(csr, spectrum)
+    lightpaths, blocked = [], []
+    for sub_demand in spectrum_assignment.split_traffic(demand, length_km):
+        lightpath = joint_rsa_assignment(csr, spectrum, src, dst, sub_demand, policy, cache)
+        if lightpath is None:
+            blocked.append(sub_demand)
+        else:
+            lightpaths.append(lightpath)
+    return lightpaths, blocked
+
+
+def run_rmsa(topology_file, traffic_file, policy="earliest", grid=None, log=None, store=None):
+    """
+    以联合 RSA 模式运行完整仿真，返回值与 ks_main.run_rmsa 相同：(results, spectrum)
+    :param log: event_log.EventLog，默认不记录
+    :param store: 可选的 results_store.ResultsStore，每条光路追加一行
+    """
+    if log is None:
+        log = event_log.DISABLED
+    G = network.load_topology(topology_file)
+    csr = csr_graph.build_csr(G)
+    traffic_matrix = network.load_traffic(traffic_file)
+    spectrum = network.init_spectrum(G, grid)
+    cache = WindowCache(csr, spectrum)
+
+    results = []
+    for src, dst, demand in traffic_matrix:
+        log.demand(src, dst, demand)
+        lightpaths, blocked = allocate_demand_joint(csr, spectrum, src, dst, demand, policy, cache)
+        for lp in lightpaths:
+            log.allocated(src, dst, lp["demand"], lp["path"], lp["modulation"], lp["start"], lp["num_slots"])
+        for sub_demand in blocked:
+            log.blocked(src, dst, sub_demand)
+        if store is not None:
+            store.extend(lightpaths)
+        if lightpaths:
+            results.append((src, dst, demand, lightpaths[-1]["path"], lightpaths[-1]["modulation"],
+                            [lp["start"] for lp in lightpaths]))
+    return results, spectrum
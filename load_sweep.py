@@ -0,0 +1,130 @@
+import argparse
+import time
+
+import numpy as np
+import network
+import metrics
+import allocator
+import reach_tables
+
+G7_LEVELS = [f"Germany-7nodes/G7-matrix-{i}.txt" for i in range(1, 6)]
+IT10_LEVELS = [f"Italian-10nodes/IT10-matrix-{i}.txt" for i in range(1, 6)]
+
+
+def increment_matrix(previous, current):
+    """
+    两个负载等级之间的逐节点对增量（单位 10 Gbps）
+    :return: (增量矩阵, 减少的节点对数)；负载下降的节点对增量记为 0（暖启动只增加，不释放已有光路）
+    """
+    delta = current - previous
+    decreased = int(np.sum(delta < 0))
+    return np.maximum(delta, 0), decreased
+
+
+def run_load_sweep(topology_file, traffic_files, selector="least_loaded", assigner="best_fit", k=5,
+                   grid=None, use_mod_aware=True):
+    """
+    负载扫描（暖启动）：按顺序处理递增的流量矩阵，每个等级只分配相对上一等级的逐节点对增量，
+    频谱状态和候选路径缓存一直保留，每个等级结束后记录一次 metrics.report 快照。
+    某节点对在等级 L 的流量 = 各等级增量之和，由多组光路共同承载。
+    :param traffic_files: 按负载从低到高排列的流量矩阵文件
+    :return: (levels, spectrum, connections)
+             levels:      每个等级一条记录 {traffic_file, offered_gbps, increment_gbps, new_lightpaths,
+                          blocked, decreased_pairs, seconds, report (MetricsReport)}
+             spectrum:    最高等级结束后的频谱状态
+             connections: {(src, dst): [lightpath, ...]}，所有等级累计的光路
+    """
+    G = network.load_topology(topology_file)
+    spectrum = network.init_spectrum(G, grid)
+    path_cache = {}
+    reach = reach_tables.ReachTable(G, spectrum.grid)  # 各负载等级共用
+    connections = {}
+    levels = []
+    previous = None
+
+    for traffic_file in traffic_files:
+        t0 = time.perf_counter()
+        matrix = np.loadtxt(traffic_file, dtype=int)
+        if previous is None:
+            delta, decreased = matrix, 0
+        else:
+            delta, decreased = increment_matrix(previous, matrix)
+        previous = matrix
+
+        new_lightpaths = 0
+        blocked = 0
+        increments = network.traffic_from_matrix(delta)  # 与 load_traffic 相同：按增量从大到小
+        for src, dst, demand in increments:
+            paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+            lightpaths, failed = allocator.allocate_demand(G, paths, src, dst, demand, spectrum,
+                                                           selector, assigner, use_mod_aware, reach=reach)
+            connections.setdefault((src, dst), []).extend(lightpaths)
+            new_lightpaths += len(lightpaths)
+            blocked += len(failed)
+
+        levels.append({
+            "traffic_file": traffic_file,
+            "offered_gbps": 10 * int(matrix.sum() - np.trace(matrix)),
+            "increment_gbps": sum(demand for _, _, demand in increments),
+            "new_lightpaths": new_lightpaths,
+            "blocked": blocked,
+            "decreased_pairs": decreased,
+            "seconds": time.perf_counter() - t0,
+            "report": metrics.report(spectrum),
+        })
+    return levels, spectrum, connections
+
+
+def run_cold(topology_file, traffic_file, selector="least_loaded", assigner="best_fit", k=5, grid=None,
+             use_mod_aware=True):
+    """ 对照：单个负载等级从空网络开始分配（与 run_load_sweep 使用相同的分配流程） """
+    G = network.load_topology(topology_file)
+    spectrum = network.init_spectrum(G, grid)
+    path_cache = {}
+    blocked = 0
+    for src, dst, demand in network.load_traffic(traffic_file):
+        paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        _, failed = allocator.allocate_demand(G, paths, src, dst, demand, spectrum, selector, assigner, use_mod_aware)
+        blocked += len(failed)
+    return spectrum, blocked
+
+
+def format_levels(levels):
+    """ 负载-FSU 曲线表：每行一个负载等级 """
+    header = f"{'level':<32} {'offered Gbps':>12} {'+Gbps':>7} {'+LPs':>5} {'blocked':>7} " \
+             f"{'total FSUs':>10} {'highest':>7} {'frag H':>7} {'util H':>7} {'compact':>7} {'ms':>7}"
+    lines = [header, "-" * len(header)]
+    for level in levels:
+        summary = level["report"].summary()
+        lines.append(f"{level['traffic_file']:<32} {level['offered_gbps']:>12} {level['increment_gbps']:>7} "
+                     f"{level['new_lightpaths']:>5} {level['blocked']:>7} {summary['total_used_fsus']:>10} "
+                     f"{summary['max_highest_fsu']:>7} {summary['max_fragmentation_entropy']:>7.4f} "
+                     f"{summary['utilization_entropy']:>7.4f} {summary['compactness']:>7.4f} "
+                     f"{1000 * level['seconds']:>7.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Warm-started load sweep over increasing traffic matrices")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", nargs="+", default=G7_LEVELS, help="按负载从低到高排列的流量矩阵")
+    parser.add_argument("--selector", default="least_loaded", choices=sorted(allocator.PATH_SELECTORS))
+    parser.add_argument("--assigner", default="best_fit", choices=sorted(allocator.SPECTRUM_ASSIGNERS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--grid", default=None, help="频谱网格预置名称，如 C, C+L, C-6.25")
+    parser.add_argument("--compare-cold", action="store_true", help="同时从空网络逐级运行，对比耗时与 FSU")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    levels, _, _ = run_load_sweep(args.topology, args.traffic, args.selector, args.assigner, args.k, args.grid)
+    t_sweep = time.perf_counter() - t0
+    print(format_levels(levels))
+    print(f"\n⏱️ 负载扫描总耗时: {t_sweep:.3f} s")
+
+    if args.compare_cold:
+        t0 = time.perf_counter()
+        for level in levels:
+            spectrum, blocked = run_cold(args.topology, level["traffic_file"], args.selector, args.assigner,
+                                         args.k, args.grid)
+            print(f"cold {level['traffic_file']}: total FSUs {metrics.total_used_fsus(spectrum)}, blocked {blocked}")
+        print(f"⏱️ 逐级冷启动总耗时: {time.perf_counter() - t0:.3f} s")
@@ -1,5 +1,7 @@
+from dataclasses import dataclass
+
 import numpy as np
-from scipy.stats import entropy
+import spectrum_grid
 
 
 def highest_fsu_per_link(spectrum):
@@ -23,6 +25,18 @@ def total_used_fsus(spectrum):
     return sum(np.sum(slots == 0) for slots in spectrum.values())
 
 
+def spectrum_matrix(spectrum):
+    """
+    把频谱字典堆叠成 links × slots 的矩阵（1=空闲, 0=占用），行顺序与字典迭代顺序一致
+    :param spectrum: 频谱分配表 { (u, v): np.array([...]) }
+    :return: (链路列表, 二维矩阵)
+    """
+    links = list(spectrum.keys())
+    if not links:
+        return links, np.zeros((0, 0))
+    return links, np.stack([np.asarray(spectrum[link]) for link in links])
+
+
 def calculate_fragmentation_entropy(spectrum_usage):
     """
     Calculate a Shannon Entropy-like metric to reflect fragmentation.
@@ -62,7 +76,7 @@ def calculate_fragmentation_entropy(spectrum_usage):
         return 0.0
 
     # p = [block_len / total_free for block_len in free_blocks]
-    p = [block_len / 320 for block_len in free_blocks]
+    p = [block_len / total_slots for block_len in free_blocks]
 
     # Step 3: 根据每个 p_i 计算香农熵
     entropy = 0.0
@@ -72,6 +86,138 @@ def calculate_fragmentation_entropy(spectrum_usage):
 
     return entropy
 
+def _free_runs_rows(rows):
+    """
+    二维布尔矩阵每一行中的连续空闲块
+    :return: (所在行, 起点, 长度)，按行优先顺序排列
+    """
+    padded = np.zeros((rows.shape[0], rows.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = rows
+    edges = np.diff(padded, axis=1)
+    row_of, run_starts = np.nonzero(edges == 1)   # 按行优先顺序，起点与终点一一对应
+    _, run_ends = np.nonzero(edges == -1)
+    return row_of, run_starts, run_ends - run_starts
+
+
+def fragmentation_entropy_rows(free):
+    """
+    向量化的 calculate_fragmentation_entropy：对最后一维的每一行分别计算碎片化熵
+    :param free: 形如 (..., num_slots) 的数组（1=空闲, 0=占用），例如 links × slots 或 strategies × links × slots
+    :return: 形如 (...) 的熵数组，与逐行调用 calculate_fragmentation_entropy 的结果相同
+    """
+    free = np.asarray(free) == 1
+    shape, total_slots = free.shape[:-1], free.shape[-1]
+    rows = free.reshape(-1, total_slots)
+    if total_slots == 0 or rows.shape[0] == 0:
+        return np.zeros(shape)
+
+    row_of, _, lengths = _free_runs_rows(rows)
+    p = lengths / total_slots
+    entropy = np.bincount(row_of, weights=-(p * np.log2(p)), minlength=rows.shape[0])
+    entropy[np.bincount(row_of, minlength=rows.shape[0]) <= 1] = 0.0  # 0 或 1 个空闲块时熵为 0
+    return entropy.reshape(shape)
+
+
+@dataclass
+class MetricsReport:
+    """
+    metrics.report 的结果：逐链路数组（顺序与 links 一致）+ 全网汇总值
+    """
+    links: list
+    num_slots: int
+    highest_fsu: np.ndarray            # 每条链路最高的占用 FSU 索引（无占用为 0）
+    used_fsus: np.ndarray              # 每条链路占用的 FSU 数
+    utilization: np.ndarray            # 每条链路的占用比例
+    largest_free_block: np.ndarray     # 每条链路最长的连续空闲块（在波段边界处切断）
+    fragmentation_entropy: np.ndarray  # 每条链路的碎片化熵
+    link_utilization_entropy: np.ndarray  # 每条链路的利用率熵 (Xs / (Ls-1))
+    total_used_fsus: int
+    max_highest_fsu: int
+    max_fragmentation_entropy: float
+    utilization_entropy: float         # 全网平均利用率熵
+    compactness: float                 # 全网频谱紧凑度：占用 FSU 数 / 各链路占用跨度之和（1 表示完全紧凑）
+
+    def highest_fsu_per_link(self):
+        """ 与 highest_fsu_per_link(spectrum) 相同的字典 """
+        return dict(zip(self.links, self.highest_fsu.tolist()))
+
+    def summary(self):
+        """ 全网汇总值（只含标量） """
+        return {
+            "total_used_fsus": self.total_used_fsus,
+            "max_highest_fsu": self.max_highest_fsu,
+            "max_fragmentation_entropy": self.max_fragmentation_entropy,
+            "utilization_entropy": self.utilization_entropy,
+            "compactness": self.compactness,
+            "largest_free_block": int(self.largest_free_block.max()) if len(self.links) else 0,
+            "mean_utilization": float(self.utilization.mean()) if len(self.links) else 0.0,
+        }
+
+    def to_dict(self, per_link=True):
+        """
+        可直接 json.dumps 的字典：顶层只有汇总值（键和类型与 per_link 无关），
+        per_link=True 时逐链路数组放在 "per_link" 下（与汇总值同名的键如 largest_free_block 不会互相覆盖）
+        """
+        out = {"num_slots": self.num_slots, **self.summary()}
+        if per_link:
+            arrays = {"links": [list(link) for link in self.links]}
+            for name in ("highest_fsu", "used_fsus", "largest_free_block",
+                         "utilization", "fragmentation_entropy", "link_utilization_entropy"):
+                arrays[name] = getattr(self, name).tolist()
+            out["per_link"] = arrays
+        return out
+
+
+def report(spectrum):
+    """
+    一次向量化扫描计算所有常用指标（替代分别调用 highest_fsu_per_link / total_used_fsus /
+    calculate_fragmentation_entropy / calculate_network_utilization_entropy），数值与这些函数一致
+    :param spectrum: 频谱分配表 { (u, v): np.array([...]) }
+    :return: MetricsReport
+    """
+    links, free = spectrum_matrix(spectrum)
+    grid = spectrum_grid.grid_of(spectrum)
+    num_links = len(links)
+    num_slots = free.shape[1] if num_links else grid.num_slots
+    occupied = free == 0
+
+    used = occupied.sum(axis=1)
+    any_used = used > 0
+    highest = np.where(any_used, num_slots - 1 - np.argmax(occupied[:, ::-1], axis=1), 0) if num_links else used
+    lowest = np.argmax(occupied, axis=1) if num_links else used
+    span = np.where(any_used, highest - lowest + 1, 0)
+
+    largest = np.zeros(num_links, dtype=np.int64)
+    for band_start, band_end in grid.band_ranges:
+        if num_links and band_end > band_start:
+            row_of, _, lengths = _free_runs_rows(~occupied[:, band_start:band_end])
+            np.maximum.at(largest, row_of, lengths)
+
+    if num_slots > 1:
+        link_ue = np.sum(free[:, 1:] != free[:, :-1], axis=1) / (num_slots - 1)
+    else:
+        link_ue = np.zeros(num_links)
+    frag = fragmentation_entropy_rows(free) if num_links else np.zeros(0)
+    total_used = int(used.sum())
+
+    return MetricsReport(
+        links=links,
+        num_slots=int(num_slots),
+        highest_fsu=highest.astype(np.int64),
+        used_fsus=used.astype(np.int64),
+        utilization=used / num_slots if num_slots else np.zeros(num_links),
+        largest_free_block=largest,
+        fragmentation_entropy=frag,
+        link_utilization_entropy=link_ue,
+        total_used_fsus=total_used,
+        max_highest_fsu=int(highest.max()) if num_links else 0,
+        max_fragmentation_entropy=float(frag.max()) if num_links else 0.0,
+        # 与 calculate_network_utilization_entropy 相同的逐项求和顺序
+        utilization_entropy=sum(link_ue.tolist()) / num_links if num_links else 0.0,
+        compactness=total_used / int(span.sum()) if total_used else 1.0,
+    )
+
+
 # def utilization_entropy(spectrum):
 #     """
 #     计算利用率熵
@@ -39,16 +39,50 @@ def get_max_capacity(link_length_km):
 
 # efficiency = line rate(Gbps) / bandwidth(GHz)
 # required bandwidth(GHz) = demand / efficiency
-# FSU_num = required_bandwidth / 12.5
-def compute_required_fsus(demand_gbps, link_length_km):
+# FSU_num = required_bandwidth / slot_width (默认 12.5 GHz)
+def compute_required_fsus(demand_gbps, link_length_km, slot_width_ghz=12.5):
     """
     计算所需 FSU 数量
     :param demand_gbps: 需求流量大小 (Gbps)
     :param link_length_km: 链路长度 (km)
+    :param slot_width_ghz: FSU 宽度 (GHz)，取自频谱网格
     :return: (所需 FSU 数量, 选定的调制格式名称)
     """
     modulation = select_modulation(link_length_km)  # 选择调制格式
+    return format_required_fsus(demand_gbps, modulation, slot_width_ghz), modulation["name"]
+
+
+def format_required_fsus(demand_gbps, modulation, slot_width_ghz=12.5):
+    """
+    按给定的调制格式计算所需 FSU 数量
+    :param modulation: MODULATION_FORMATS 中的一项
+    :return: 所需 FSU 数量
+    """
     spectral_efficiency = modulation["rate"] / modulation["bandwidth"]  # Gbps/GHz
     required_bandwidth_ghz = demand_gbps / spectral_efficiency  # 计算所需 GHz
-    required_fsus = int(np.ceil(required_bandwidth_ghz / 12.5))  # 计算所需 FSU
-    return required_fsus, modulation["name"]
+    return int(np.ceil(required_bandwidth_ghz / slot_width_ghz))  # 计算所需 FSU
+
+
+def select_modulation_index(link_length_km):
+    """
+    向量化的调制格式选择（与 select_modulation 的判定一致）
+    :param link_length_km: 路径长度数组 (km)
+    :return: MODULATION_FORMATS 中的索引数组
+    """
+    lengths = np.asarray(link_length_km, dtype=float)
+    return np.where(lengths <= 500, 2, np.where(lengths <= 700, 1, 0))
+
+
+def compute_required_fsus_array(demand_gbps, link_length_km, slot_width_ghz=12.5):
+    """
+    向量化的 compute_required_fsus
+    :param demand_gbps: 需求流量数组 (Gbps)
+    :param link_length_km: 路径长度数组 (km)
+    :return: (所需 FSU 数量数组, 调制格式索引数组)
+    """
+    mod_idx = select_modulation_index(link_length_km)
+    rates = np.array([m["rate"] for m in MODULATION_FORMATS], dtype=float)
+    bandwidths = np.array([m["bandwidth"] for m in MODULATION_FORMATS], dtype=float)
+    spectral_efficiency = rates[mod_idx] / bandwidths[mod_idx]
+    required_bandwidth_ghz = np.asarray(demand_gbps, dtype=float) / spectral_efficiency
+    return np.ceil(required_bandwidth_ghz / slot_width_ghz).astype(np.int64), mod_idx
@@ -1,5 +1,6 @@
 import networkx as nx
 import numpy as np
+import spectrum_grid
 
 def load_topology(file_path):
     """ 读取网络拓扑，仅提取 NodeA, NodeB, Length 作为边的权重 """
@@ -15,8 +16,28 @@ def load_topology(file_path):
             G.add_edge(int(node_a), int(node_b), weight=float(length))  # 加入图
     return G
 
+def init_spectrum(G, grid=None):
+    """
+    初始化频谱状态：每条链路（双向）的所有 FSU 都空闲（1=空闲, 0=占用）
+    :param G: 网络拓扑
+    :param grid: 频谱网格，可为 SpectrumGrid、预置名称（如 "C+L"）或 FSU 数；默认 C 波段 320 个 FSU
+    :return: SpectrumState { (u, v): np.ones(num_slots) }，附带 grid 配置
+    """
+    grid = spectrum_grid.make_grid(grid)
+    spectrum = spectrum_grid.SpectrumState(grid=grid)
+    for u, v in G.edges():
+        spectrum[(u, v)] = np.ones(grid.num_slots)
+        spectrum[(v, u)] = np.ones(grid.num_slots)  # 确保存储双向链路
+    return spectrum
+
+
 def load_traffic(file_path):
     matrix = np.loadtxt(file_path, dtype=int)  # 读取矩阵
+    return traffic_from_matrix(matrix)
+
+
+def traffic_from_matrix(matrix):
+    """ 流量矩阵（单位 10 Gbps，节点编号从 1 开始）→ [(src, dst, demand_gbps), ...]，按需求从大到小排序 """
     traffic_list = []
 
     num_nodes = matrix.shape[0]  # 确定节点数
@@ -31,8 +52,10 @@ def load_traffic(file_path):
 
 
 if __name__ == "__main__":
-    G = load_topology("/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-topology.txt")
-    traffic_matrix = load_traffic("/Users/macbook/Documents/Pycharm/EEN115/Proj/Germany-7nodes/G7-matrix-1.txt")
+    import os
+    DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+    G = load_topology(os.path.join(DATA_DIR, "Germany-7nodes", "G7-topology.txt"))
+    traffic_matrix = load_traffic(os.path.join(DATA_DIR, "Germany-7nodes", "G7-matrix-1.txt"))
 
     print("网络拓扑节点:", G.nodes)
     print("网络拓扑边:", G.edges)
@@ -0,0 +1,159 @@
+import numpy as np
+import modulation
+import spectrum_grid
+
+
+class PathAvailabilityIndex:
+    """
+    候选路径的频谱连续性掩码索引：
+      - 每条已注册的路径保存自己的连续性掩码（路径上所有链路都空闲的 FSU）、空闲块列表和最长空闲块长度
+      - 链路 → 订阅该链路的路径编号；某条链路变化时只更新订阅了它的路径的掩码（仅变化的 FSU 范围），
+        空闲块列表在下一次查询该路径时才重新计算，之后的查询直接读取缓存
+      - 同时维护全网每个 FSU 的占用次数 (usage)，供 Most-Used 查询
+
+    频谱的修改应通过 allocate / release 完成；如果调用方直接修改了 spectrum，
+    需要随后调用 links_changed 通知索引。
+    """
+
+    def __init__(self, spectrum):
+        self.spectrum = spectrum
+        self.path_ids = {}      # 路径元组 -> 路径编号
+        self.paths = []         # 路径编号 -> 节点列表
+        self.path_links = []    # 路径编号 -> 有向链路列表
+        self.masks = []         # 路径编号 -> 连续性掩码 (bool)
+        self.runs = []          # 路径编号 -> (空闲块起点, 空闲块长度)，None 表示待重新计算
+        self.longest = []       # 路径编号 -> 最长空闲块长度（None 表示待重新计算）
+        self.subscribers = {}   # 链路 -> 路径编号集合
+
+        self.grid = spectrum_grid.grid_of(spectrum)
+        self._link_state = {link: np.array(slots, copy=True) for link, slots in spectrum.items()}
+        self.usage = np.zeros(self.grid.num_slots)
+        for slots in self._link_state.values():
+            self.usage += (1 - slots)
+
+    # ----------------------------------------- 注册与更新 -----------------------------------------
+    def register(self, path):
+        """ 注册一条候选路径，返回路径编号（重复注册返回已有编号） """
+        key = tuple(path)
+        path_id = self.path_ids.get(key)
+        if path_id is not None:
+            return path_id
+
+        path_id = len(self.paths)
+        links = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+        self.path_ids[key] = path_id
+        self.paths.append(list(path))
+        self.path_links.append(links)
+        self.masks.append(None)
+        self.runs.append(None)
+        self.longest.append(None)
+        for link in links:
+            self.subscribers.setdefault(link, set()).add(path_id)
+        self._refresh(path_id)
+        return path_id
+
+    def register_candidates(self, paths):
+        """ 批量注册候选路径，返回路径编号列表 """
+        return [self.register(path) for path in paths]
+
+    def _refresh(self, path_id, start=0, stop=None):
+        """ 重新计算路径在 [start, stop) 范围内的连续性掩码，并更新空闲块 """
+        links = self.path_links[path_id]
+        mask = self.masks[path_id]
+        if mask is None:
+            mask = self.spectrum[links[0]] == 1
+            for link in links[1:]:
+                mask &= self.spectrum[link] == 1
+            self.masks[path_id] = mask
+        else:
+            window = self.spectrum[links[0]][start:stop] == 1
+            for link in links[1:]:
+                window &= self.spectrum[link][start:stop] == 1
+            mask[start:stop] = window
+        self.runs[path_id] = None  # 空闲块延迟到查询时重新计算
+
+    def _longest(self, path_id):
+        """ 最长空闲块长度（必要时先重新计算空闲块） """
+        if self.runs[path_id] is None:
+            starts, lengths = self.grid.free_runs(self.masks[path_id])  # 在波段边界处切断
+            self.runs[path_id] = (starts, lengths)
+            self.longest[path_id] = int(lengths.max()) if len(lengths) else 0
+        return self.longest[path_id]
+
+    def links_changed(self, links, start=0, stop=None):
+        """
+        通知索引这些链路在 [start, stop) 范围内的频谱已变化：
+        更新全网 usage，并只刷新订阅了这些链路的路径
+        """
+        affected = set()
+        for link in links:
+            new = self.spectrum[link][start:stop]
+            old = self._link_state[link][start:stop]
+            self.usage[start:stop] += old - new  # 1=空闲 → 占用时 usage 增加
+            old[:] = new
+            affected |= self.subscribers.get(link, set())
+        for path_id in affected:
+            self._refresh(path_id, start, stop)
+
+    def allocate(self, path_id, start, num_slots):
+        """ 在路径上占用 [start, start+num_slots) 并更新索引 """
+        links = self.path_links[path_id]
+        for link in links:
+            self.spectrum[link][start:start + num_slots] = 0
+        self.links_changed(links, start, start + num_slots)
+
+    def release(self, path_id, start, num_slots):
+        """ 释放路径上的 [start, start+num_slots) 并更新索引 """
+        links = self.path_links[path_id]
+        for link in links:
+            self.spectrum[link][start:start + num_slots] = 1
+        self.links_changed(links, start, start + num_slots)
+
+    # ----------------------------------------- 查询（读取缓存的空闲块 / 向量化） -----------------------------------------
+    def can_fit(self, path_id, num_slots):
+        """ 路径上是否存在 num_slots 宽的连续空闲块 """
+        return self._longest(path_id) >= num_slots
+
+    def first_fit(self, path_id, num_slots):
+        """ 与 first_fit_spectrum_assignment 相同的起点：第一个长度足够的空闲块的起点；无则 -1 """
+        if self._longest(path_id) < num_slots:
+            return -1
+        starts, lengths = self.runs[path_id]
+        return int(starts[np.argmax(lengths >= num_slots)])
+
+    def best_fit(self, path_id, num_slots):
+        """ 与 best_fit_spectrum_assignment 相同的起点：长度足够的最小空闲块（同长取最靠前）；无则 -1 """
+        if self._longest(path_id) < num_slots:
+            return -1
+        starts, lengths = self.runs[path_id]
+        fitting = np.where(lengths >= num_slots, lengths, np.iinfo(np.int64).max)
+        return int(starts[np.argmin(fitting)])
+
+    def most_used(self, path_id, num_slots):
+        """
+        与 most_used_spectrum_assignment 相同的起点：在路径上可用的窗口中，
+        全网 usage 之和最大者（同分取最靠前）；无则 -1
+        """
+        if self._longest(path_id) < num_slots:
+            return -1
+        mask = self.masks[path_id]
+        free_count = np.concatenate(([0], np.cumsum(mask)))
+        feasible = ((free_count[num_slots:] - free_count[:-num_slots]) == num_slots) & self.grid.valid_starts(num_slots)
+        usage_sum = np.concatenate(([0.0], np.cumsum(self.usage)))
+        window_usage = usage_sum[num_slots:] - usage_sum[:-num_slots]
+        return int(np.argmax(np.where(feasible, window_usage, -1.0)))
+
+    QUERIES = {"first_fit": first_fit, "best_fit": best_fit, "most_used": most_used}
+
+    def assign(self, G, path, demand, policy="best_fit"):
+        """
+        与 spectrum_assignment 中 SA 函数相同的语义：计算所需 FSU，查找起点并在路径上分配
+        :return: 起始 FSU 索引，失败返回 -1
+        """
+        path_id = self.register(path)
+        path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+        num_slots, _ = modulation.compute_required_fsus(demand, path_length_km, self.grid.slot_width_ghz)
+        start = self.QUERIES[policy](self, path_id, num_slots)
+        if start != -1:
+            self.allocate(path_id, start, num_slots)
+        return start
@@ -0,0 +1,224 @@
+"""
+K 条候选路径表的并行预计算：按源节点把 (src, dst) 节点对分块，交给线程池或进程池，
+每块独立计算后合并为一张连续数组表示的路径表：
+    table = build_path_table(G, k=5, workers=4)                 # 所有节点对
+    table = build_path_table(G, k=5, pairs=[(1, 2), (3, 4)])    # 只算需要的节点对
+    path_cache = table.as_path_cache()                          # 直接用于 allocator.get_candidate_paths
+各数组（nodes / links / lengths / modulation / 偏移）都是扁平的 NumPy 数组，
+可以原样写入 npz 或共享内存，由 PathTable.from_arrays 在其他进程中零拷贝地重新包装。
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import network
+import modulation
+import csr_graph
+
+# 合并后的表由这些数组组成（from_arrays / arrays 的键）
+ARRAY_NAMES = ("pair_offsets", "path_offsets", "nodes", "links", "lengths", "modulation")
+
+
+class PathTable:
+    """
+    连续数组表示的候选路径表（节点用 CSR 中的节点索引 0..N-1 编址）：
+      - pair_offsets: (N*N + 1)，节点对 (s, t) 的路径编号为 [pair_offsets[s*N + t], pair_offsets[s*N + t + 1])
+      - path_offsets: (P + 1)，第 p 条路径的节点为 nodes[path_offsets[p]:path_offsets[p + 1]]，
+                      链路为 links[path_offsets[p] - p:path_offsets[p + 1] - p - 1]
+      - nodes:        所有路径的节点编号 (int32，原始编号，与频谱字典的键一致)
+      - links:        所有路径的有向链路编号 (int32，对应 csr.links)
+      - lengths:      (P)，路径长度 (km)
+      - modulation:   (P)，按路径长度选择的调制格式下标 (modulation.MODULATION_FORMATS)
+    同一节点对的路径按长度递增排列。
+    """
+
+    def __init__(self, csr, pair_offsets, path_offsets, nodes, links, lengths, modulation_ids):
+        self.csr = csr
+        self.pair_offsets = pair_offsets
+        self.path_offsets = path_offsets
+        self.nodes = nodes
+        self.links = links
+        self.lengths = lengths
+        self.modulation = modulation_ids
+        self.num_nodes = csr.num_nodes
+
+    @classmethod
+    def from_arrays(cls, csr, arrays):
+        """ 由 arrays() 的结果（或共享内存上的同名数组）重新包装，不复制 """
+        return cls(csr, *(arrays[name] for name in ARRAY_NAMES))
+
+    def arrays(self):
+        return dict(zip(ARRAY_NAMES, (self.pair_offsets, self.path_offsets, self.nodes, self.links, self.lengths,
+                                      self.modulation)))
+
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    @property
+    def num_paths(self):
+        return len(self.lengths)
+
+    # ----------------------------------------- 查询 -----------------------------------------
+    def path_ids(self, src, dst):
+        """ (src, dst) 的路径编号范围 """
+        p = self.csr.node_index[src] * self.num_nodes + self.csr.node_index[dst]
+        return range(int(self.pair_offsets[p]), int(self.pair_offsets[p + 1]))
+
+    def path(self, path_id):
+        return self.nodes[self.path_offsets[path_id]:self.path_offsets[path_id + 1]].tolist()
+
+    def path_link_ids(self, path_id):
+        start = self.path_offsets[path_id] - path_id
+        return self.links[start:start + self.path_offsets[path_id + 1] - self.path_offsets[path_id] - 1]
+
+    def paths(self, src, dst):
+        """ (src, dst) 的候选路径（节点列表），格式同 routing.k_shortest_paths_routing """
+        return [self.path(p) for p in self.path_ids(src, dst)]
+
+    def as_path_cache(self):
+        """ 转为 allocator.get_candidate_paths 使用的 path_cache 字典（只包含有路径的节点对） """
+        nodes = self.csr._nodes
+        counts = np.diff(self.pair_offsets)
+        cache = {}
+        for p in np.flatnonzero(counts).tolist():
+            src, dst = nodes[p // self.num_nodes], nodes[p % self.num_nodes]
+            cache[(src, dst)] = [self.path(i) for i in range(int(self.pair_offsets[p]), int(self.pair_offsets[p + 1]))]
+        return cache
+
+    def to_npz(self, path):
+        np.savez(path, **self.arrays())
+
+    @classmethod
+    def from_npz(cls, csr, path):
+        with np.load(path) as data:
+            return cls.from_arrays(csr, {name: data[name] for name in ARRAY_NAMES})
+
+
+# ----------------------------------------- 构建 -----------------------------------------
+_worker_csr = None
+
+
+def _init_worker(csr):
+    global _worker_csr
+    _worker_csr = csr
+
+
+def _chunk_paths(csr, jobs, k):
+    """
+    计算一块源节点的候选路径，结果直接打包为数组（跨进程传递时只序列化几个数组）
+    :param jobs: [(s, [t, ...]), ...]，节点索引
+    :return: (pair 编号数组, 每个节点对的路径数, 每条路径的节点数, 扁平节点索引, 路径长度)
+    """
+    nodes = csr._nodes
+    pair_ids, counts, sizes, flat, lengths = [], [], [], [], []
+    for s, targets in jobs:
+        for t in targets:
+            found = csr_graph.k_shortest_paths(csr, nodes[s], nodes[t], k)
+            pair_ids.append(s * csr.num_nodes + t)
+            counts.append(len(found))
+            for path, length in found:
+                sizes.append(len(path))
+                flat.extend(csr.node_index[n] for n in path)
+                lengths.append(length)
+    return (np.array(pair_ids, dtype=np.int64), np.array(counts, dtype=np.int64), np.array(sizes, dtype=np.int64),
+            np.array(flat, dtype=np.int32), np.array(lengths, dtype=float))
+
+
+def _process_chunk(args):
+    jobs, k = args
+    return _chunk_paths(_worker_csr, jobs, k)
+
+
+def _merge(csr, chunks):
+    """ 把各块的结果合并为 PathTable；链路编号、调制格式都以数组运算得到 """
+    n = csr.num_nodes
+    pair_ids = np.concatenate([c[0] for c in chunks])
+    counts = np.concatenate([c[1] for c in chunks])
+    sizes = np.concatenate([c[2] for c in chunks])
+    flat = np.concatenate([c[3] for c in chunks])
+    lengths = np.concatenate([c[4] for c in chunks])
+
+    # 各块按源节点划分，节点对编号可能交错：按节点对编号把路径（及其节点）整体重排
+    path_order = np.argsort(np.repeat(pair_ids, counts), kind="stable")
+    rank = np.empty(len(path_order), dtype=np.int64)
+    rank[path_order] = np.arange(len(path_order))
+    flat = flat[np.argsort(np.repeat(rank, sizes), kind="stable")]
+    sizes = sizes[path_order]
+    lengths = lengths[path_order]
+
+    pair_counts = np.zeros(n * n, dtype=np.int64)
+    pair_counts[pair_ids] = counts
+    pair_offsets = np.concatenate([[0], np.cumsum(pair_counts)])
+    path_offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    # 有向链路编号：弧 (u, v) 的键 u*N + v 排序后用 searchsorted 批量查找
+    arc_src = np.repeat(np.arange(n), np.diff(csr.indptr))
+    arc_keys = arc_src * n + csr.indices
+    arc_order = np.argsort(arc_keys)
+    last = path_offsets[1:] - 1  # 每条路径最后一个节点的位置，不作为链路起点
+    heads = np.ones(len(flat), dtype=bool)
+    heads[last] = False
+    head_idx = np.flatnonzero(heads)
+    keys = flat[head_idx].astype(np.int64) * n + flat[head_idx + 1]
+    links = csr.arc_link[arc_order[np.searchsorted(arc_keys[arc_order], keys)]].astype(np.int32)
+
+    return PathTable(csr, pair_offsets, path_offsets, csr.nodes[flat].astype(np.int32), links, lengths,
+                     modulation.select_modulation_index(lengths).astype(np.int8))
+
+
+def build_path_table(G, k=5, pairs=None, workers=1, executor="process", chunks_per_worker=4):
+    """
+    按源节点并行计算候选路径并合并为 PathTable
+    :param G: network.load_topology 的图，或已构建的 csr_graph.CSRGraph
+    :param pairs: [(src, dst), ...]；默认所有有序节点对
+    :param workers: 并行度；1 时在当前线程中计算
+    :param executor: "process"（Yen 算法是纯 Python 循环，受 GIL 限制，进程池才能真正并行；
+                     每块的结果打包成数组传回，序列化开销很小）
+                     或 "thread"（线程间直接共享 csr；在无 GIL 的 Python 构建上可并行）
+    """
+    csr = G if isinstance(G, csr_graph.CSRGraph) else csr_graph.build_csr(G)
+    n = csr.num_nodes
+    targets = {}
+    if pairs is None:
+        for s in range(n):
+            targets[s] = [t for t in range(n) if t != s]
+    else:
+        for src, dst in pairs:
+            s, t = csr.node_index[src], csr.node_index[dst]
+            if s != t:
+                targets.setdefault(s, set()).add(t)
+        targets = {s: sorted(ts) for s, ts in targets.items()}
+
+    # 源节点按工作量（目的节点数）轮流分到各块，使各块大小接近
+    sources = sorted(targets, key=lambda s: -len(targets[s]))
+    num_chunks = max(1, min(len(sources), workers * chunks_per_worker))
+    jobs = [[(s, targets[s]) for s in sources[i::num_chunks]] for i in range(num_chunks)]
+
+    if workers <= 1:
+        chunks = [_chunk_paths(csr, job, k) for job in jobs]
+    elif executor == "thread":
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(lambda job: _chunk_paths(csr, job, k), jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(csr,)) as pool:
+            chunks = list(pool.map(_process_chunk, [(job, k) for job in jobs]))
+    return _merge(csr, chunks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute a K-shortest path table")
+    parser.add_argument("--topology", default="Italian-10nodes/IT10-topology.txt")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--executor", default="process", choices=("process", "thread"))
+    parser.add_argument("--out", default=None, help="写出 npz 文件")
+    args = parser.parse_args()
+
+    G = network.load_topology(args.topology)
+    t0 = time.perf_counter()
+    table = build_path_table(G, args.k, workers=args.workers, executor=args.executor)
+    print(f"📊 {table.num_paths} 条路径, {table.nbytes() / 1024:.1f} KB, 耗时 {time.perf_counter() - t0:.3f} s")
+    if args.out:
+        table.to_npz(args.out)
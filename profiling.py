@@ -0,0 +1,386 @@
+"""
+仿真热循环的内存分配分析（可选开启，基于 tracemalloc）：
+    python profiling.py --traffic Italian-10nodes/IT10-matrix-5.txt --out after.json
+    python profiling.py --compare before.json after.json
+    python -m rmsa_cli run --profile report.json ...
+分析期间把各阶段函数（拓扑 / 流量加载、ReachTable、候选路径、选路、频谱分配、指标）替换为计时包装，
+allocator 的两阶段流程和直接调用 routing / spectrum_assignment 的各 runner（fs / ks / task4 / task5）都会经过这些函数，
+joint / batch 另外替换各自模块中的主要函数。每次调用记录：
+  - peak:     调用期间 tracemalloc 峰值高出调用前的字节数（临时数组即使调用结束前已释放也会计入）
+  - retained: 调用结束后仍保留的字节数（缓存、光路记录等），只统计实测调用 (measured_calls) 的合计，不外推；
+              释放多于分配时合计记为 0
+按确定的规则抽样部分调用（前 sample_first 次，之后每 sample_every 次一次），抽样调用在内存达到峰值时取快照，
+与调用前的快照比较，得到峰值时的新增内存块数和分配位置（文件:行号），按仿真阶段 (phase) 汇总。
+阶段可以嵌套（allocate_demand 包含选路和频谱分配），外层阶段的统计包含内层。
+报告按流量数归一化（每个流量的字节数），键名固定，可以在不同运行、不同拓扑之间直接比较；
+热循环无分配时 path_selection / spectrum_assignment 的 peak 与 blocks 应为 0。
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import network
+import metrics
+import allocator
+import spectrum_assignment
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (阶段, 仿真阶段, 模块名, 属性)；只替换已导入的模块（profile_cell 会先导入所分析模式的 runner）。
+# allocator.SPECTRUM_ASSIGNERS 中的频谱分配策略另外按策略名替换，字典项和 spectrum_assignment 中的同一函数共用一个包装
+STAGES = (
+    ("load_topology", "setup", "network", "load_topology"),
+    ("load_traffic", "setup", "network", "load_traffic"),
+    ("init_spectrum", "setup", "network", "init_spectrum"),
+    ("reach_table", "setup", "reach_tables", "ReachTable"),
+    ("candidate_paths", "routing", "allocator", "get_candidate_paths"),
+    ("allocate_demand", "allocation", "allocator", "allocate_demand"),
+    ("path_selection", "allocation", "allocator", "select_path"),
+    ("routing:fixed_shortest_path", "routing", "routing", "fixed_shortest_path_routing"),
+    ("routing:k_shortest_paths", "routing", "routing", "k_shortest_paths_routing"),
+    ("routing:csr_k_shortest_paths", "routing", "routing", "csr_k_shortest_paths_routing"),
+    ("routing:entropy_max", "allocation", "routing", "entropy_minimization_path_routing_max"),
+    ("routing:entropy_avg", "allocation", "routing", "entropy_minimization_path_routing_avg"),
+    ("routing:highest_loaded", "allocation", "routing", "highest_loaded_path_routing_avg"),
+    ("routing:least_loaded", "allocation", "routing", "least_loaded_path_routing_avg"),
+    ("routing:mod_aware", "allocation", "routing", "mod_aware"),
+    ("routing:backup_path", "allocation", "routing", "find_backup_path"),
+    ("spectrum_assignment:shared_fit", "allocation", "spectrum_assignment", "shared_fit_spectrum_assignment"),
+    ("joint_rsa:allocate_demand", "allocation", "joint_rsa", "allocate_demand_joint"),
+    ("joint_rsa:window_availability", "allocation", "joint_rsa", "window_availability"),
+    ("batch:shortest_paths", "routing", "batch_planner", "resolve_shortest_paths"),
+    ("batch:pack_slots", "allocation", "batch_planner", "pack_slots"),
+    ("metrics", "metrics", "metrics", "report"),
+)
+
+
+def _rss_kb():
+    """ 当前常驻内存 (KB)；没有 /proc 时返回 None """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _site(traceback):
+    """
+    分配位置：取调用栈中最近的一个仓库内的帧（np.ones 等归到调用它的仓库代码行），没有时取最近的帧；
+    仓库内文件用相对路径，其余只保留最后两级路径，保证不同机器上可比较
+    """
+    frames = [frame for frame in traceback if os.path.abspath(frame.filename).startswith(REPO_DIR + os.sep)
+              and os.path.abspath(frame.filename) != os.path.abspath(__file__)]
+    frame = frames[-1] if frames else traceback[-1]
+    path = os.path.abspath(frame.filename)
+    if path.startswith(REPO_DIR + os.sep):
+        path = os.path.relpath(path, REPO_DIR)
+    else:
+        path = "/".join(path.replace(os.sep, "/").split("/")[-2:])
+    return f"{path}:{frame.lineno}"
+
+
+class _Stage:
+    def __init__(self, name, phase):
+        self.name = name
+        self.phase = phase
+        self.calls = 0
+        self.measured = 0
+        self.seconds = 0.0
+        self.peak_total = 0
+        self.peak_max = 0
+        self.retained = 0
+        self.samples = 0
+        self.sampled_blocks = 0
+        self.sampled_bytes = 0
+        self.rss_kb = None
+        self.next_sample = 0
+
+    def to_dict(self, demands):
+        # 抽样调用内部的嵌套调用不计入 peak / retained（快照本身会占用内存）：peak 按实测调用的均值外推，
+        # retained 只报告实测调用的合计（释放多于分配时记为 0）
+        peak = self.peak_total / max(self.measured, 1)
+        retained = max(self.retained, 0)
+        return {
+            "phase": self.phase,
+            "calls": self.calls,
+            "measured_calls": self.measured,
+            "seconds": self.seconds,
+            "peak_bytes_per_call": peak,
+            "peak_bytes_max": self.peak_max,
+            "peak_bytes_per_demand": peak * self.calls / max(demands, 1),
+            "retained_bytes": retained,
+            "retained_bytes_per_demand": retained / max(demands, 1),
+            "samples": self.samples,
+            "blocks_per_call": self.sampled_blocks / self.samples if self.samples else None,
+            "sampled_bytes_per_call": self.sampled_bytes / self.samples if self.samples else None,
+            "rss_kb": self.rss_kb,
+        }
+
+
+class AllocationProfiler:
+    """
+    with AllocationProfiler() as profiler:
+        sweep.simulate(cell)
+    report = profiler.report(demands)
+    进入时启动 tracemalloc 并替换 STAGES 中的函数，退出时全部恢复。
+    - stages: 阶段名 → 统计（见模块说明）
+    - sites:  仿真阶段 → {分配位置: [字节数, 内存块数]}（抽样调用累计）
+    """
+
+    def __init__(self, sample_first=2, sample_every=100, frames=16, top=10):
+        self.sample_first = sample_first
+        self.sample_every = sample_every
+        self.frames = frames
+        self.top = top
+        self.stages = {}
+        self.sites = {}
+        self.seconds = 0.0
+        self._stack = []  # 正在执行的阶段各自的峰值
+        self._capture = None
+        self._patched = []
+        self._filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+    # ----------------------------------------- 函数替换 -----------------------------------------
+    def _stage(self, name, phase):
+        if name not in self.stages:
+            self.stages[name] = _Stage(name, phase)
+        return self.stages[name]
+
+    def wrap(self, name, phase, function):
+        stage = self._stage(name, phase)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return self._call(stage, function, args, kwargs)
+        return wrapper
+
+    def _patch(self, owner, key, value, item=False):
+        self._patched.append((owner, key, owner[key] if item else getattr(owner, key), item))
+        if item:
+            owner[key] = value
+        else:
+            setattr(owner, key, value)
+
+    def __enter__(self):
+        self._started = not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start(self.frames)
+        for name, phase, module_name, attribute in STAGES:
+            module = sys.modules.get(module_name)
+            if module is not None:
+                self._patch(module, attribute, self.wrap(name, phase, getattr(module, attribute)))
+        for assigner, function in list(allocator.SPECTRUM_ASSIGNERS.items()):
+            wrapper = self.wrap(f"spectrum_assignment:{assigner}", "allocation", function)
+            self._patch(allocator.SPECTRUM_ASSIGNERS, assigner, wrapper, item=True)
+            if getattr(spectrum_assignment, function.__name__, None) is function:
+                self._patch(spectrum_assignment, function.__name__, wrapper)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._t0
+        for owner, key, original, item in reversed(self._patched):
+            if item:
+                owner[key] = original
+            else:
+                setattr(owner, key, original)
+        self._patched = []
+        if self._started:
+            tracemalloc.stop()
+
+    # ----------------------------------------- 单次调用 -----------------------------------------
+    def _fold(self, peak):
+        """ 内层阶段重置峰值前，把当前峰值记入所有外层阶段 """
+        for entry in self._stack:
+            entry[0] = max(entry[0], peak)
+
+    def _hook(self, frame, event, arg):
+        capture = self._capture
+        current = tracemalloc.get_traced_memory()[0]
+        if current > capture["level"] + max(1024, (capture["level"] - capture["base"]) // 8):
+            capture["level"] = current
+            capture["snapshot"] = None  # 先释放上一个快照
+            capture["snapshot"] = tracemalloc.take_snapshot()
+
+    def _call(self, stage, function, args, kwargs):
+        index = stage.calls
+        stage.calls += 1
+        in_capture = self._capture is not None
+        sample = not in_capture and index >= stage.next_sample
+        self._fold(tracemalloc.get_traced_memory()[1])
+        before = tracemalloc.get_traced_memory()[0]
+        if sample:
+            start = tracemalloc.take_snapshot()
+            self._capture = {"base": tracemalloc.get_traced_memory()[0], "snapshot": None}
+            self._capture["level"] = self._capture["base"]
+        tracemalloc.reset_peak()
+        entry = [tracemalloc.get_traced_memory()[0]]
+        self._stack.append(entry)
+        if sample:
+            previous = sys.getprofile()
+            sys.setprofile(self._hook)
+        t0 = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            stage.seconds += time.perf_counter() - t0
+            self._stack.pop()
+            if sample:
+                sys.setprofile(previous)
+                self._hook(None, "return", None)  # 返回值仍存活时再检查一次
+                size = self._record_sample(stage, index, start)
+                start = None
+                # 快照已释放：剩余的增量即保留的内存，之后的峰值从这里重新计算
+                stage.retained += tracemalloc.get_traced_memory()[0] - before
+                stage.measured += 1
+                tracemalloc.reset_peak()
+                self._fold(before + size)
+            else:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, entry[0])
+                self._fold(peak)
+                if not in_capture:
+                    stage.retained += current - before
+                    stage.peak_total += peak - before
+                    stage.peak_max = max(stage.peak_max, peak - before)
+                    stage.measured += 1
+
+    def _record_sample(self, stage, index, start):
+        """ 抽样调用：峰值快照与调用前快照的差异（抽样调用的 peak 取自快照，不含快照本身占用的内存），返回峰值字节数 """
+        snapshot = self._capture["snapshot"]
+        self._capture = None
+        blocks = size = 0
+        if snapshot is not None:
+            sites = self.sites.setdefault(stage.phase, {})
+            diff = snapshot.filter_traces(self._filters).compare_to(start.filter_traces(self._filters), "traceback")
+            for stat in diff:
+                if stat.size_diff > 0:
+                    blocks += max(stat.count_diff, 0)
+                    size += stat.size_diff
+                    site = sites.setdefault(_site(stat.traceback), [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += max(stat.count_diff, 0)
+            del diff, snapshot
+        stage.samples += 1
+        stage.sampled_blocks += blocks
+        stage.sampled_bytes += size
+        stage.peak_total += size
+        stage.peak_max = max(stage.peak_max, size)
+        rss = _rss_kb()
+        if rss is not None:
+            stage.rss_kb = max(stage.rss_kb or 0, rss)
+        stage.next_sample = index + 1 if stage.samples < self.sample_first else \
+            (index // self.sample_every + 1) * self.sample_every
+        return size
+
+    # ----------------------------------------- 报告 -----------------------------------------
+    def report(self, demands):
+        phases = {}
+        for phase, sites in self.sites.items():
+            ranked = sorted(sites.items(), key=lambda x: (-x[1][0], x[0]))[:self.top]
+            phases[phase] = [{"site": site, "bytes": size, "blocks": blocks} for site, (size, blocks) in ranked]
+        return {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "demands": demands,
+            "seconds": self.seconds,
+            "peak_rss_kb": _peak_rss_kb(),
+            "sampling": {"first": self.sample_first, "every": self.sample_every},
+            "stages": {name: stage.to_dict(demands) for name, stage in self.stages.items() if stage.calls},
+            "top_sites": phases,
+        }
+
+
+def profile_cell(cell, sample_first=2, sample_every=100, top=10):
+    """ 分析一次 sweep.simulate（不使用结果缓存），返回报告字典（附带单元配置和指标） """
+    import importlib
+    import sweep
+    mode = cell.get("mode", "two_stage")
+    if mode not in sweep.MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    if mode in sweep.RUNNER_MODULES:
+        importlib.import_module(sweep.RUNNER_MODULES[mode])
+    demands = len(network.load_traffic(cell["traffic"]))
+    with AllocationProfiler(sample_first, sample_every, top=top) as profiler:
+        _, record = sweep.simulate(cell)
+    report = profiler.report(demands)
+    report["cell"] = sweep.cell_config(cell)
+    report["record"] = {key: value for key, value in record.items() if isinstance(value, (int, float, str))}
+    return report
+
+
+def print_report(report, file=sys.stdout):
+    print(f"{report['demands']} demands, {report['seconds']:.2f} s under tracemalloc, "
+          f"peak RSS {report['peak_rss_kb']} KB (python {report['python']}, numpy {report['numpy']})", file=file)
+    header = (f"{'stage':<34} {'calls':>7} {'ms':>9} {'peak B/call':>12} {'peak B/dem':>11} "
+              f"{'retained B':>11} {'blocks/call':>11}")
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for name, s in report["stages"].items():
+        blocks = "-" if s["blocks_per_call"] is None else f"{s['blocks_per_call']:.1f}"
+        print(f"{name:<34} {s['calls']:>7} {1000 * s['seconds']:>9.1f} {s['peak_bytes_per_call']:>12.0f} "
+              f"{s['peak_bytes_per_demand']:>11.0f} {s['retained_bytes']:>11} {blocks:>11}", file=file)
+    for phase, sites in report["top_sites"].items():
+        print(f"\ntop allocation sites ({phase}, sampled calls):", file=file)
+        for site in sites:
+            print(f"  {site['bytes']:>10} B {site['blocks']:>6} blocks  {site['site']}", file=file)
+
+
+def compare(baseline, report, file=sys.stdout):
+    """ 两份报告逐阶段比较每个流量的峰值字节数和每次调用的内存块数 """
+    header = f"{'stage':<34} {'peak B/dem':>22} {'blocks/call':>20}"
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for name in list(dict.fromkeys([*baseline["stages"], *report["stages"]])):
+        old, new = baseline["stages"].get(name), report["stages"].get(name)
+        if old is None or new is None:
+            print(f"{name:<34} {'only in ' + ('new' if old is None else 'baseline'):>22}", file=file)
+            continue
+        blocks = " → ".join("-" if s["blocks_per_call"] is None else f"{s['blocks_per_call']:.1f}" for s in (old, new))
+        print(f"{name:<34} {old['peak_bytes_per_demand']:>10.0f} → {new['peak_bytes_per_demand']:<9.0f} "
+              f"{blocks:>20}", file=file)
+
+
+if __name__ == "__main__":
+    import rmsa_cli
+    parser = argparse.ArgumentParser(description="Allocation profile of one simulation run (tracemalloc)")
+    for key, value in rmsa_cli.RUN_DEFAULTS.items():
+        parser.add_argument(f"--{key}", type=type(value), default=value)
+    parser.add_argument("--sample-first", type=int, default=2)
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--out", help="报告写入 JSON 文件")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "REPORT"), help="比较两份已保存的报告")
+    args = parser.parse_args()
+
+    if args.compare:
+        reports = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                reports.append(json.load(f))
+        compare(*reports)
+    else:
+        cell = {key: getattr(args, key) for key in rmsa_cli.RUN_DEFAULTS}
+        cell["topology"] = rmsa_cli.resolve_path(cell["topology"])
+        cell["traffic"] = rmsa_cli.resolve_path(cell["traffic"])
+        result = profile_cell(cell, args.sample_first, args.sample_every, args.top)
+        print_report(result)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
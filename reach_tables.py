@@ -0,0 +1,195 @@
+"""
+每个拓扑只构建一次的可达性 / 调制格式表，把调制感知选路和流量拆分变成数组查找：
+    reach = ReachTable(G, grid)
+    reach.distance[s, t] / reach.modulation[s, t] / reach.capacity[s, t]    # 全节点对最短距离与最佳调制
+    path = reach.mod_aware(paths, chosen_path)                              # 同 routing.mod_aware
+    sub_requests = reach.split(demand, path)                                # 同 spectrum_assignment.split_traffic
+    owner, sub, num_slots, mod = reach.split_batch(demand, path_ids)        # 整批流量一次计算
+候选路径在第一次用到时登记，记录长度、调制格式、单通道容量和频谱效率；
+FSU 数按 compute_required_fsus 的同一运算顺序计算，结果与逐个调用完全一致。
+全节点对矩阵在第一次访问时才计算（此时才导入 scipy），只用候选路径表的仿真不加载 scipy。
+"""
+import numpy as np
+
+import modulation
+import csr_graph
+import spectrum_grid
+
+RATES = np.array([m["rate"] for m in modulation.MODULATION_FORMATS], dtype=float)
+BANDWIDTHS = np.array([m["bandwidth"] for m in modulation.MODULATION_FORMATS], dtype=float)
+EFFICIENCY = RATES / BANDWIDTHS  # Gbps/GHz
+NAMES = [m["name"] for m in modulation.MODULATION_FORMATS]
+
+
+class ReachTable:
+    """
+    全节点对表（节点按 CSR 索引编址，N × N，第一次访问时计算）：
+      - distance:   最短路长度 (km)，不可达为 inf
+      - modulation: 最短路上可用的最佳调制格式下标
+      - capacity:   对应的单通道容量 (Gbps)；不可达为 0
+    候选路径表（按登记顺序编号）：
+      - lengths / path_modulation / path_capacity / efficiency，以及 fsus_per_gbps()
+      - first_path[s, t]: 该节点对候选列表的第一条路径（mod_aware 的比较基准），只由 register_candidates /
+        register_path_cache / mod_aware 设置（它们拿到的是完整候选列表），未设置为 -1
+    """
+
+    def __init__(self, G, grid=None):
+        self.csr = G if isinstance(G, csr_graph.CSRGraph) else csr_graph.build_csr(G)
+        self.G = None if isinstance(G, csr_graph.CSRGraph) else G
+        self.slot_width_ghz = spectrum_grid.make_grid(grid).slot_width_ghz
+        n = self.csr.num_nodes
+        self._all_pairs = None
+
+        self.path_ids = {}
+        self._lengths = np.zeros(64)
+        self._modulation = np.zeros(64, dtype=np.int8)
+        self.first_path = np.full((n, n), -1, dtype=np.int64)
+
+    # ----------------------------------------- 全节点对表 -----------------------------------------
+    def _compute_all_pairs(self):
+        if self._all_pairs is None:
+            from scipy.sparse import csr_matrix
+            from scipy.sparse.csgraph import dijkstra
+            n = self.csr.num_nodes
+            graph = csr_matrix((self.csr.weights, self.csr.indices, self.csr.indptr), shape=(n, n))
+            distance = dijkstra(graph, directed=True)
+            reachable = np.isfinite(distance)
+            best = modulation.select_modulation_index(np.where(reachable, distance, 0))
+            best = np.where(reachable, best, 0).astype(np.int8)
+            self._all_pairs = (distance, best, np.where(reachable, RATES[best], 0.0))
+        return self._all_pairs
+
+    @property
+    def distance(self):
+        return self._compute_all_pairs()[0]
+
+    @property
+    def modulation(self):
+        return self._compute_all_pairs()[1]
+
+    @property
+    def capacity(self):
+        return self._compute_all_pairs()[2]
+
+    # ----------------------------------------- 候选路径登记 -----------------------------------------
+    @property
+    def num_paths(self):
+        return len(self.path_ids)
+
+    @property
+    def lengths(self):
+        return self._lengths[:self.num_paths]
+
+    @property
+    def path_modulation(self):
+        return self._modulation[:self.num_paths]
+
+    @property
+    def path_capacity(self):
+        return RATES[self.path_modulation]
+
+    @property
+    def efficiency(self):
+        return EFFICIENCY[self.path_modulation]
+
+    def fsus_per_gbps(self):
+        """ 每 Gbps 需要的 FSU 数（未取整） """
+        return 1.0 / (self.efficiency * self.slot_width_ghz)
+
+    def _path_length(self, path):
+        """ 与 allocator.path_length 相同的逐段求和顺序 """
+        if self.G is not None:
+            return sum(self.G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+        return self.csr.path_length(path)
+
+    def register(self, paths):
+        """ 登记路径，返回路径编号列表；不修改 first_path（单条路径不一定是该节点对的最短候选） """
+        ids = []
+        for path in paths:
+            key = tuple(path)
+            path_id = self.path_ids.get(key)
+            if path_id is None:
+                path_id = len(self.path_ids)
+                if path_id == len(self._lengths):  # 倍增扩容
+                    self._lengths = np.resize(self._lengths, 2 * path_id)
+                    self._modulation = np.resize(self._modulation, 2 * path_id)
+                self.path_ids[key] = path_id
+                self._lengths[path_id] = self._path_length(path)
+                self._modulation[path_id] = modulation.select_modulation_index(self._lengths[path_id])
+            ids.append(path_id)
+        return ids
+
+    def register_candidates(self, paths):
+        """ 登记一个节点对的完整候选路径列表（按 K 短路顺序），paths[0] 记为该节点对的 first_path """
+        ids = self.register(paths)
+        if ids:
+            self._set_first_path(paths[0], ids[0])
+        return ids
+
+    def _set_first_path(self, path, path_id):
+        s, t = self.csr.node_index[path[0]], self.csr.node_index[path[-1]]
+        self.first_path[s, t] = path_id
+
+    def register_path_cache(self, path_cache):
+        """ 登记 allocator.get_candidate_paths 的 path_cache 中所有节点对 """
+        for paths in path_cache.values():
+            self.register_candidates(paths)
+
+    def path_id(self, path):
+        path_id = self.path_ids.get(tuple(path))
+        return self.register([path])[0] if path_id is None else path_id
+
+    def path_length(self, path):
+        path_id = self.path_id(path)  # 先登记（可能扩容），再读取数组
+        return float(self._lengths[path_id])
+
+    # ----------------------------------------- 单个流量 -----------------------------------------
+    def mod_aware(self, paths, chosen_path):
+        """ routing.mod_aware：所选路径的单通道容量低于 paths[0] 时改用 paths[0] """
+        shortest, chosen = self.register([paths[0], chosen_path])
+        self._set_first_path(paths[0], shortest)  # paths 为完整的候选列表，paths[0] 即 K 短路的第一条
+        return chosen_path if RATES[self._modulation[chosen]] >= RATES[self._modulation[shortest]] else paths[0]
+
+    def split(self, demand, path):
+        """ spectrum_assignment.split_traffic：超过单通道容量时拆分为等量的子流量 """
+        path_id = self.path_id(path)
+        capacity = RATES[self._modulation[path_id]]
+        if demand > capacity:
+            num_paths = int(np.ceil(demand / capacity))
+            return [demand / num_paths] * num_paths
+        return [demand]
+
+    def required_fsus(self, demand, path):
+        """ modulation.compute_required_fsus 的查表版本：(FSU 数, 调制格式名称) """
+        path_id = self.path_id(path)
+        mod = self._modulation[path_id]
+        return int(np.ceil(demand / EFFICIENCY[mod] / self.slot_width_ghz)), NAMES[mod]
+
+    # ----------------------------------------- 整批流量 -----------------------------------------
+    def mod_aware_batch(self, chosen_ids, src, dst):
+        """
+        向量化的 mod_aware
+        :param chosen_ids: 每个流量所选路径的编号
+        :param src / dst: 节点编号数组（各节点对的候选路径须已登记）
+        :return: 修正后的路径编号数组
+        """
+        s = np.array([self.csr.node_index[x] for x in np.asarray(src).tolist()], dtype=np.int64)
+        t = np.array([self.csr.node_index[x] for x in np.asarray(dst).tolist()], dtype=np.int64)
+        shortest = self.first_path[s, t]
+        chosen_ids = np.asarray(chosen_ids)
+        keep = RATES[self.path_modulation[chosen_ids]] >= RATES[self.path_modulation[shortest]]
+        return np.where(keep, chosen_ids, shortest)
+
+    def split_batch(self, demand, path_ids):
+        """
+        向量化的 split_traffic + compute_required_fsus
+        :return: (每个子流量所属的流量下标, 子流量 Gbps, FSU 数, 调制格式下标)
+        """
+        demand = np.asarray(demand, dtype=float)
+        mod = self.path_modulation[np.asarray(path_ids)]
+        capacity = RATES[mod]
+        parts = np.where(demand > capacity, np.ceil(demand / capacity), 1).astype(np.int64)
+        owner = np.repeat(np.arange(len(demand)), parts)
+        sub = demand[owner] / parts[owner]
+        num_slots = np.ceil(sub / EFFICIENCY[mod[owner]] / self.slot_width_ghz).astype(np.int64)
+        return owner, sub, num_slots, mod[owner]
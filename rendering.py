@@ -0,0 +1,207 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import metrics
+
+# 大网络下热力图的默认最大行数 / 列数（超过则分组取平均进行降采样）
+MAX_ROWS = 200
+MAX_SLOTS = 640
+
+
+def _figure(figsize):
+    """
+    仅在真正需要绘图时才导入 matplotlib，并直接使用非交互的 Agg 画布
+    （不经过 pyplot，也不修改全局 backend）
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _save(fig, out_path):
+    """ 按文件后缀（.png / .svg）保存图像 """
+    directory = os.path.dirname(out_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    fig.savefig(out_path, dpi=150, bbox_inches="tight")
+    return out_path
+
+
+def _group_mean(matrix, max_size, axis):
+    """ 沿 axis 把相邻元素分组求均值，使该维度不超过 max_size """
+    size = matrix.shape[axis]
+    if max_size is None or size <= max_size:
+        return matrix
+    edges = np.linspace(0, size, max_size + 1).astype(int)
+    starts = edges[:-1]
+    counts = np.diff(edges)
+    sums = np.add.reduceat(matrix, starts, axis=axis)
+    shape = [1, 1]
+    shape[axis] = len(counts)
+    return sums / counts.reshape(shape)
+
+
+def downsample(matrix, max_rows=MAX_ROWS, max_cols=MAX_SLOTS):
+    """
+    对 links × slots 矩阵降采样：相邻行 / 列分组后取平均（结果为占用比例）
+    :param matrix: 二维数组
+    :param max_rows: 最大行数
+    :param max_cols: 最大列数
+    :return: 降采样后的二维数组
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    matrix = _group_mean(matrix, max_rows, axis=0)
+    return _group_mean(matrix, max_cols, axis=1)
+
+
+def occupancy_matrix(spectrum):
+    """
+    频谱状态 → (链路列表, 占用矩阵)，其中 1 表示占用，0 表示空闲
+    :param spectrum: 频谱分配表 { (u, v): np.array([...]) }（1=空闲, 0=占用）
+    """
+    links, free = metrics.spectrum_matrix(spectrum)
+    return links, 1.0 - free
+
+
+def _link_labels(links, num_rows):
+    """ 行数未被降采样时才标注链路名称 """
+    if len(links) != num_rows or num_rows > 40:
+        return None
+    return [f"{u}-{v}" for u, v in links]
+
+
+def render_occupancy_heatmap(spectrum, out_path, title="Spectrum Occupancy",
+                             max_rows=MAX_ROWS, max_slots=MAX_SLOTS):
+    """
+    绘制 links × slots 的频谱占用热力图并写入文件
+    :param spectrum: 频谱分配表 { (u, v): np.array([...]) }
+    :param out_path: 输出文件（.png / .svg）
+    :return: 输出文件路径
+    """
+    links, occupied = occupancy_matrix(spectrum)
+    image = downsample(occupied, max_rows, max_slots)
+
+    fig = _figure((10, max(3, min(12, 0.25 * image.shape[0] + 2))))
+    ax = fig.add_subplot(111)
+    im = ax.imshow(image, aspect="auto", interpolation="nearest", cmap="Greys", vmin=0, vmax=1,
+                   extent=(0, occupied.shape[1], image.shape[0], 0))
+    labels = _link_labels(links, image.shape[0])
+    if labels:
+        ax.set_yticks(np.arange(len(labels)) + 0.5)
+        ax.set_yticklabels(labels, fontsize=6)
+    ax.set_xlabel("FSU Index")
+    ax.set_ylabel("Link")
+    ax.set_title(title)
+    fig.colorbar(im, ax=ax, label="Occupied Fraction")
+    return _save(fig, out_path)
+
+
+def render_diff_map(benchmark_spectrum, designed_spectrum, out_path,
+                    title="Benchmark vs Designed", max_rows=MAX_ROWS, max_slots=MAX_SLOTS):
+    """
+    绘制两种算法频谱占用的差异图：
+      +1 = 仅 designed 占用，-1 = 仅 benchmark 占用，0 = 两者相同
+    两个频谱字典需包含相同的链路
+    """
+    links = list(benchmark_spectrum.keys())
+    benchmark = 1.0 - np.stack([np.asarray(benchmark_spectrum[link]) for link in links])
+    designed = 1.0 - np.stack([np.asarray(designed_spectrum[link]) for link in links])
+    image = downsample(designed - benchmark, max_rows, max_slots)
+
+    fig = _figure((10, max(3, min(12, 0.25 * image.shape[0] + 2))))
+    ax = fig.add_subplot(111)
+    im = ax.imshow(image, aspect="auto", interpolation="nearest", cmap="coolwarm", vmin=-1, vmax=1,
+                   extent=(0, benchmark.shape[1], image.shape[0], 0))
+    labels = _link_labels(links, image.shape[0])
+    if labels:
+        ax.set_yticks(np.arange(len(labels)) + 0.5)
+        ax.set_yticklabels(labels, fontsize=6)
+    ax.set_xlabel("FSU Index")
+    ax.set_ylabel("Link")
+    ax.set_title(title)
+    fig.colorbar(im, ax=ax, label="Designed - Benchmark")
+    return _save(fig, out_path)
+
+
+def render_fragmentation_bars(spectrum, out_path, title="Fragmentation Entropy per Link", max_bars=MAX_ROWS):
+    """
+    绘制每条链路的碎片化熵柱状图；链路数过多时分组取平均
+    """
+    links = list(spectrum.keys())
+    values = np.array([metrics.calculate_fragmentation_entropy(spectrum[link]) for link in links])
+    bars = _group_mean(values.reshape(-1, 1), max_bars, axis=0).ravel() if len(values) else values
+
+    fig = _figure((10, 4))
+    ax = fig.add_subplot(111)
+    ax.bar(np.arange(len(bars)), bars, color="steelblue", edgecolor="black", linewidth=0.3)
+    labels = _link_labels(links, len(bars))
+    if labels:
+        ax.set_xticks(np.arange(len(labels)))
+        ax.set_xticklabels(labels, rotation=90, fontsize=6)
+    ax.set_xlabel("Link")
+    ax.set_ylabel("Fragmentation Entropy")
+    ax.set_title(title)
+    ax.grid(axis="y", linestyle="--", alpha=0.7)
+    return _save(fig, out_path)
+
+
+def render_time_series(snapshots, out_path, title="Link Utilization over Time", max_rows=MAX_ROWS, max_steps=MAX_SLOTS):
+    """
+    绘制记录下来的频谱时间序列：横轴为时间步，纵轴为链路，颜色为链路利用率
+    :param snapshots: 频谱字典列表，或形如 (T, links, slots) 的数组（1=空闲, 0=占用）
+    """
+    if isinstance(snapshots, np.ndarray):
+        frames = snapshots
+        links = []
+    else:
+        links = list(snapshots[0].keys()) if snapshots else []
+        frames = np.stack([metrics.spectrum_matrix(s)[1] for s in snapshots]) if snapshots else np.zeros((0, 0, 0))
+    utilization = 1.0 - frames.mean(axis=2).T  # links × T
+    image = downsample(utilization, max_rows, max_steps)
+
+    fig = _figure((10, max(3, min(12, 0.25 * image.shape[0] + 2))))
+    ax = fig.add_subplot(111)
+    im = ax.imshow(image, aspect="auto", interpolation="nearest", cmap="viridis", vmin=0, vmax=1,
+                   extent=(0, utilization.shape[1], image.shape[0], 0))
+    labels = _link_labels(links, image.shape[0])
+    if labels:
+        ax.set_yticks(np.arange(len(labels)) + 0.5)
+        ax.set_yticklabels(labels, fontsize=6)
+    ax.set_xlabel("Time Step")
+    ax.set_ylabel("Link")
+    ax.set_title(title)
+    fig.colorbar(im, ax=ax, label="Utilization")
+    return _save(fig, out_path)
+
+
+RENDERERS = {
+    "occupancy": render_occupancy_heatmap,
+    "diff": render_diff_map,
+    "fragmentation": render_fragmentation_bars,
+    "time_series": render_time_series,
+}
+
+
+def _render_job(job):
+    """ 在子进程中执行单个绘图任务：job = (kind, args, kwargs) """
+    kind, args, kwargs = job
+    return RENDERERS[kind](*args, **kwargs)
+
+
+def render_batch(jobs, max_workers=None):
+    """
+    使用进程池批量渲染多个 sweep 单元的图像
+    :param jobs: [(kind, args, kwargs), ...]，kind 取 RENDERERS 中的键，
+                 例如 ("occupancy", (spectrum, "out/cell-1.png"), {})
+    :param max_workers: 进程数，None 表示使用 CPU 核数；1 表示在当前进程串行执行
+    :return: 输出文件路径列表（与 jobs 顺序一致）
+    """
+    jobs = list(jobs)
+    if max_workers == 1 or len(jobs) <= 1:
+        return [_render_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_render_job, jobs))
@@ -0,0 +1,221 @@
+import argparse
+import time
+
+import numpy as np
+import network
+import allocator
+import csr_graph
+import survivability
+
+
+class RestorationSimulator:
+    """
+    动态恢复仿真：链路故障时释放所有经过该光纤的光路，再在缓存的候选路径中
+    （排除经过任何失效光纤的路径）用现有的选路 / SA 策略重新分配
+      - lightpaths:  光路编号 → 光路字典（格式同 allocator.allocate_on_path）
+      - fiber_index: 光纤 → 经过它的光路编号集合；受影响光路直接查表得到，无需扫描所有结果
+      - lost:        故障时未能恢复的光路，光纤修复时重新尝试
+    """
+
+    def __init__(self, G, spectrum, selector="least_loaded", assigner="best_fit", k=5, fallback=True, log=None):
+        self.G = G
+        self.spectrum = spectrum
+        self.selector = selector
+        self.assigner = assigner
+        self.k = k
+        self.fallback = fallback  # 候选路径全部失效时，在 CSR 图上求避开失效链路的最短路
+        self.csr = csr_graph.build_csr(G)
+        self.path_cache = {}
+        self.log = log  # 可选的 event_log.EventLog：记录分配 / 阻塞 / 释放事件
+
+        self.lightpaths = {}
+        self.fiber_index = {}
+        self.failed = set()
+        self.lost = {}
+        self.next_id = 0
+
+    # ----------------------------------------- 光路登记 -----------------------------------------
+    def add(self, lightpath):
+        lp_id = self.next_id
+        self.next_id += 1
+        self.lightpaths[lp_id] = lightpath
+        for link in allocator.path_links(lightpath["path"]):
+            self.fiber_index.setdefault(survivability.fiber(link), set()).add(lp_id)
+        return lp_id
+
+    def remove(self, lp_id):
+        """ 释放光路频谱并从索引中删除，返回光路字典 """
+        lightpath = self.lightpaths.pop(lp_id)
+        for link in allocator.path_links(lightpath["path"]):
+            self.fiber_index[survivability.fiber(link)].discard(lp_id)
+        allocator.release_lightpath(self.spectrum, lightpath, log=self.log)
+        return lightpath
+
+    def load(self, traffic_matrix):
+        """ 按两阶段 RMSA 分配初始流量，返回阻塞的子流量数 """
+        blocked = 0
+        for src, dst, demand in traffic_matrix:
+            paths = allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+            lightpaths, failed = allocator.allocate_demand(self.G, paths, src, dst, demand, self.spectrum,
+                                                           self.selector, self.assigner, log=self.log)
+            for lightpath in lightpaths:
+                self.add(lightpath)
+            blocked += len(failed)
+        return blocked
+
+    # ----------------------------------------- 重路由 -----------------------------------------
+    def _usable(self, path):
+        return not any(survivability.fiber(link) in self.failed for link in allocator.path_links(path))
+
+    def _reroute(self, lightpath):
+        """ 在避开失效光纤的候选路径上重新分配一条光路的流量，返回新光路列表（失败为空） """
+        src, dst = lightpath["src"], lightpath["dst"]
+        candidates = [p for p in allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+                      if self._usable(p)]
+        if not candidates and self.fallback:
+            mask = self.csr.link_mask(link for link in self.csr.links if survivability.fiber(link) in self.failed)
+            path, _ = csr_graph.shortest_path(self.csr, src, dst, mask)
+            candidates = [path] if path is not None else []
+        if not candidates:
+            return []
+        lightpaths, blocked = allocator.allocate_demand(self.G, candidates, src, dst, lightpath["demand"],
+                                                        self.spectrum, self.selector, self.assigner,
+                                                        log=self.log)
+        if blocked:
+            # 只恢复了一部分子流量：整体视为恢复失败，释放已分配的部分
+            for new in lightpaths:
+                allocator.release_lightpath(self.spectrum, new, log=self.log)
+            return []
+        return lightpaths
+
+    def _restore(self, lightpaths):
+        """ 按流量从大到小重新分配，返回 (恢复成功的 (旧, 新列表), 失败的旧光路列表) """
+        restored, failed = [], []
+        for old in sorted(lightpaths, key=lambda lp: lp["demand"], reverse=True):
+            new = self._reroute(old)
+            if new:
+                for lightpath in new:
+                    self.add(lightpath)
+                restored.append((old, new))
+            else:
+                failed.append(old)
+        return restored, failed
+
+    @staticmethod
+    def _footprint(lightpaths):
+        """ 光路占用的 FSU × 链路数 """
+        return sum(lp["num_slots"] * (len(lp["path"]) - 1) for lp in lightpaths)
+
+    # ----------------------------------------- 故障 / 修复事件 -----------------------------------------
+    def fail(self, link):
+        """
+        光纤故障：查表得到经过它的光路，全部释放后重新路由
+        :return: 事件报告 {event, link, affected, restored, lost, restored_fraction, extra_fsus, seconds}
+        """
+        t0 = time.perf_counter()
+        fiber = survivability.fiber(link)
+        self.failed.add(fiber)
+        affected = [self.remove(lp_id) for lp_id in sorted(self.fiber_index.get(fiber, ()))]
+        restored, failed = self._restore(affected)
+        for old in failed:
+            self.lost[id(old)] = old
+
+        offered = sum(lp["demand"] for lp in affected)
+        carried = sum(old["demand"] for old, _ in restored)
+        extra = sum(self._footprint(new) - self._footprint([old]) for old, new in restored)
+        return {
+            "event": "fail",
+            "link": fiber,
+            "affected": len(affected),
+            "restored": len(restored),
+            "lost": len(failed),
+            "restored_fraction": carried / offered if offered else 1.0,
+            "extra_fsus": int(extra),
+            "seconds": time.perf_counter() - t0,
+        }
+
+    def repair(self, link):
+        """ 光纤修复：之前未能恢复的光路重新尝试分配（已恢复的光路保持在新路径上） """
+        t0 = time.perf_counter()
+        self.failed.discard(survivability.fiber(link))
+        pending = list(self.lost.values())
+        self.lost.clear()
+        restored, failed = self._restore(pending)
+        for old in failed:
+            self.lost[id(old)] = old
+        return {
+            "event": "repair",
+            "link": survivability.fiber(link),
+            "affected": len(pending),
+            "restored": len(restored),
+            "lost": len(failed),
+            "restored_fraction": len(restored) / len(pending) if pending else 1.0,
+            "extra_fsus": 0,
+            "seconds": time.perf_counter() - t0,
+        }
+
+    def run_events(self, events):
+        """ 依次处理 [("fail" | "repair", link), ...]，返回事件报告列表 """
+        handlers = {"fail": self.fail, "repair": self.repair}
+        return [handlers[kind](link) for kind, link in events]
+
+
+def random_events(G, num_events, max_concurrent=1, seed=0):
+    """
+    随机故障 / 修复序列：同时失效的光纤不超过 max_concurrent 条，每条失效光纤之后都会被修复
+    """
+    rng = np.random.default_rng(seed)
+    fibers = sorted(survivability.fiber(edge) for edge in G.edges())
+    down, events = [], []
+    while len(events) < num_events:
+        if down and (len(down) >= max_concurrent or rng.random() < 0.5):
+            events.append(("repair", down.pop(int(rng.integers(len(down))))))
+        else:
+            up = [f for f in fibers if f not in down]
+            fiber = up[int(rng.integers(len(up)))]
+            down.append(fiber)
+            events.append(("fail", fiber))
+    events.extend(("repair", fiber) for fiber in down)
+    return events
+
+
+def summarize(reports):
+    """ 汇总故障事件：平均 / 最大恢复时间、总体恢复比例、额外 FSU """
+    fails = [r for r in reports if r["event"] == "fail"]
+    affected = sum(r["affected"] for r in fails)
+    seconds = np.array([r["seconds"] for r in fails]) if fails else np.zeros(1)
+    return {
+        "failures": len(fails),
+        "affected_lightpaths": affected,
+        "restored_fraction": sum(r["restored"] for r in fails) / affected if affected else 1.0,
+        "restored_after_repair": sum(r["restored"] for r in reports if r["event"] == "repair"),
+        "extra_fsus": sum(r["extra_fsus"] for r in fails),
+        "mean_restoration_ms": 1000 * float(seconds.mean()),
+        "max_restoration_ms": 1000 * float(seconds.max()),
+    }
+
+
+def run_restoration(topology_file, traffic_file, num_events=1000, max_concurrent=1, grid=None,
+                    selector="least_loaded", assigner="best_fit", seed=0):
+    """ 加载流量后执行随机故障 / 修复序列，返回 (reports, summary, simulator) """
+    G = network.load_topology(topology_file)
+    simulator = RestorationSimulator(G, network.init_spectrum(G, grid), selector, assigner)
+    simulator.load(network.load_traffic(traffic_file))
+    reports = simulator.run_events(random_events(G, num_events, max_concurrent, seed))
+    return reports, summarize(reports), simulator
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dynamic restoration under link failures")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", default="Germany-7nodes/G7-matrix-3.txt")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--max-concurrent", type=int, default=1)
+    parser.add_argument("--selector", default="least_loaded", choices=sorted(allocator.PATH_SELECTORS))
+    parser.add_argument("--assigner", default="best_fit", choices=sorted(allocator.SPECTRUM_ASSIGNERS))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    reports, summary, _ = run_restoration(args.topology, args.traffic, args.events, args.max_concurrent,
+                                          selector=args.selector, assigner=args.assigner, seed=args.seed)
+    print(f"📊 {summary}")
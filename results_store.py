@@ -0,0 +1,238 @@
+"""
+列式结果存储：每条光路一行（NumPy 结构化数组），变长路径存入去重的路径表（节点数组 + 偏移数组）。
+    store = ResultsStore()
+    results, spectrum = ks_main.run_rmsa(topology_file, traffic_file, store=store)
+    store.select(role="backup", modulation="DP-16QAM")   # 布尔掩码
+    store.group_sum("src", "demand")                      # 按源节点汇总流量
+    store.to_npz("run.npz")
+所有筛选 / 汇总都是数组运算；rows / path_offsets / path_nodes 都是内部缓冲区的视图（不复制），
+buffers() 以 Arrow 的列式布局（定长列 + 路径的 offsets / values）导出。
+"""
+import numpy as np
+
+import modulation
+
+# 光路角色
+ROLES = ("primary", "backup")
+ROLE_IDS = {name: i for i, name in enumerate(ROLES)}
+
+# 调制格式名称 → MODULATION_FORMATS 下标
+MODULATION_IDS = {m["name"]: i for i, m in enumerate(modulation.MODULATION_FORMATS)}
+
+# 每条光路一行
+ROW_DTYPE = np.dtype([
+    ("demand_id", np.int64),   # 所属流量需求的编号（同一需求拆分出的子流量 / 主备光路编号相同）
+    ("src", np.int32),
+    ("dst", np.int32),
+    ("demand", np.float64),    # 子流量 (Gbps)
+    ("path_id", np.int32),     # 路径表中的编号
+    ("modulation", np.int8),   # MODULATION_FORMATS 下标
+    ("role", np.int8),         # ROLES 下标
+    ("start", np.int32),       # 起始 FSU
+    ("num_slots", np.int32),   # FSU 数
+])
+
+
+class ResultsStore:
+    """
+    光路结果的列式存储：
+      - rows:         结构化数组，每条光路一行（字段见 ROW_DTYPE）
+      - path_offsets: 路径表偏移，第 i 条路径的节点为 path_nodes[path_offsets[i]:path_offsets[i + 1]]
+      - path_nodes:   所有路径的节点（int32）
+    相同的路径只存一次；缓冲区按倍增扩容，追加的均摊开销为 O(1)。
+    """
+
+    def __init__(self, capacity=1024):
+        self._rows = np.empty(capacity, dtype=ROW_DTYPE)
+        self._size = 0
+        self._nodes = np.empty(4 * capacity, dtype=np.int32)
+        self._num_nodes = 0
+        self._offsets = np.zeros(capacity + 1, dtype=np.int64)
+        self._num_paths = 0
+        self._path_ids = {}
+        self._next_demand_id = 0
+
+    def __len__(self):
+        return self._size
+
+    # ----------------------------------------- 追加 -----------------------------------------
+    def new_demand(self):
+        """ 分配一个新的流量需求编号 """
+        demand_id = self._next_demand_id
+        self._next_demand_id += 1
+        return demand_id
+
+    def path_id(self, path):
+        """ 路径 → 路径表编号（不存在时追加） """
+        key = tuple(path)
+        path_id = self._path_ids.get(key)
+        if path_id is None:
+            n = len(key)
+            if self._num_nodes + n > len(self._nodes):
+                self._nodes = np.resize(self._nodes, max(2 * len(self._nodes), self._num_nodes + n))
+            if self._num_paths + 2 > len(self._offsets):
+                self._offsets = np.resize(self._offsets, 2 * len(self._offsets))
+            self._nodes[self._num_nodes:self._num_nodes + n] = key
+            self._num_nodes += n
+            path_id = self._num_paths
+            self._num_paths += 1
+            self._offsets[self._num_paths] = self._num_nodes
+            self._path_ids[key] = path_id
+        return path_id
+
+    def append(self, demand_id, src, dst, demand, path, modulation_name, start, num_slots, role="primary"):
+        """ 追加一条光路 """
+        if self._size == len(self._rows):
+            self._rows = np.resize(self._rows, 2 * len(self._rows))
+        self._rows[self._size] = (demand_id, src, dst, demand, self.path_id(path), MODULATION_IDS[modulation_name],
+                                  ROLE_IDS[role], start, num_slots)
+        self._size += 1
+
+    def extend(self, lightpaths, demand_id=None, role="primary"):
+        """
+        追加 allocator.allocate_on_path 格式的光路字典列表（同属一个流量需求）
+        :return: 使用的 demand_id
+        """
+        if demand_id is None:
+            demand_id = self.new_demand()
+        for lp in lightpaths:
+            self.append(demand_id, lp["src"], lp["dst"], lp["demand"], lp["path"], lp["modulation"], lp["start"],
+                        lp["num_slots"], lp.get("role", role))
+        return demand_id
+
+    # ----------------------------------------- 视图 -----------------------------------------
+    @property
+    def rows(self):
+        return self._rows[:self._size]
+
+    @property
+    def path_offsets(self):
+        return self._offsets[:self._num_paths + 1]
+
+    @property
+    def path_nodes(self):
+        return self._nodes[:self._num_nodes]
+
+    def __getitem__(self, name):
+        """ 某一列（视图） """
+        return self.rows[name]
+
+    def path(self, path_id):
+        """ 路径表中的一条路径（节点列表） """
+        return self._nodes[self._offsets[path_id]:self._offsets[path_id + 1]].tolist()
+
+    def hops(self):
+        """ 每行光路的跳数 """
+        return np.diff(self.path_offsets)[self.rows["path_id"]] - 1
+
+    def footprint(self):
+        """ 每行光路占用的 FSU × 链路数 """
+        return self.rows["num_slots"].astype(np.int64) * self.hops()
+
+    # ----------------------------------------- 筛选 / 汇总 -----------------------------------------
+    def select(self, **conditions):
+        """
+        按列取值筛选，返回布尔掩码；取值可为标量或序列（属于其中之一），
+        role / modulation 可直接用名称，例如 select(role="backup", src=[1, 2])
+        """
+        rows = self.rows
+        mask = np.ones(self._size, dtype=bool)
+        for name, value in conditions.items():
+            if name == "role":
+                value = ROLE_IDS[value] if isinstance(value, str) else value
+            elif name == "modulation":
+                value = MODULATION_IDS[value] if isinstance(value, str) else value
+            if np.ndim(value) == 0:
+                mask &= rows[name] == value
+            else:
+                mask &= np.isin(rows[name], value)
+        return mask
+
+    def subset(self, mask):
+        """ 掩码选中的行组成新的 ResultsStore（复制路径表，路径编号不变） """
+        store = ResultsStore.__new__(ResultsStore)
+        store._rows = self.rows[mask].copy()
+        store._size = len(store._rows)
+        store._nodes, store._num_nodes = self.path_nodes.copy(), self._num_nodes
+        store._offsets, store._num_paths = self.path_offsets.copy(), self._num_paths
+        store._path_ids = dict(self._path_ids)
+        store._next_demand_id = self._next_demand_id
+        return store
+
+    def group_sum(self, key, value, mask=None):
+        """
+        按 key 列分组对 value 列求和（value 可为列名或与行数等长的数组）
+        :return: (分组键数组, 求和数组)
+        """
+        column = self.rows[key]
+        values = self.rows[value] if isinstance(value, str) else np.asarray(value)
+        if mask is not None:
+            column, values = column[mask], values[mask]
+        if column.dtype.kind in "iu" and len(column) and 0 <= column.min() and column.max() <= 4 * len(column):
+            # 非负的小整数键（节点、路径编号等）：直接 bincount，无需排序
+            counts = np.bincount(column)
+            present = np.flatnonzero(counts)
+            return present, np.bincount(column, weights=values, minlength=len(counts))[present]
+        keys, inverse = np.unique(column, return_inverse=True)
+        return keys, np.bincount(inverse.ravel(), weights=values, minlength=len(keys))
+
+    def link_load(self, mask=None):
+        """
+        每条有向链路上的光路 FSU 总数
+        :return: {(u, v): FSU 数}
+        """
+        rows = self.rows if mask is None else self.rows[mask]
+        offsets, nodes = self.path_offsets, self.path_nodes
+        # 路径表中每条链路 (path_id, u, v)
+        hops = np.diff(offsets) - 1
+        link_path = np.repeat(np.arange(self._num_paths), hops)
+        heads = np.delete(np.arange(len(nodes)), offsets[1:] - 1)
+        u, v = nodes[heads], nodes[heads + 1]
+        # 每条路径承载的 FSU 总数，再分摊到路径上的链路
+        per_path = np.bincount(rows["path_id"], weights=rows["num_slots"], minlength=self._num_paths)
+        keys = np.stack([u, v], axis=1)
+        links, inverse = np.unique(keys, axis=0, return_inverse=True)
+        loads = np.bincount(inverse.ravel(), weights=per_path[link_path], minlength=len(links))
+        return {(int(a), int(b)): int(load) for (a, b), load in zip(links, loads)}
+
+    def summary(self):
+        rows = self.rows
+        return {
+            "lightpaths": self._size,
+            "demands": int(len(np.unique(rows["demand_id"]))),
+            "paths": self._num_paths,
+            "carried_gbps": float(rows["demand"][rows["role"] == ROLE_IDS["primary"]].sum()),
+            "total_fsus": int(rows["num_slots"].sum()),
+            "footprint": int(self.footprint().sum()),
+            "by_role": {name: int((rows["role"] == i).sum()) for i, name in enumerate(ROLES)},
+            "by_modulation": {name: int((rows["modulation"] == i).sum()) for name, i in MODULATION_IDS.items()},
+        }
+
+    # ----------------------------------------- 导出 -----------------------------------------
+    def buffers(self):
+        """
+        Arrow 式列缓冲区（均为视图，不复制）：每个定长字段一列，
+        路径表为 list<int32> 布局的 "path_offsets" / "path_nodes"，行通过 path_id 引用（字典编码）
+        """
+        columns = {name: self.rows[name] for name in ROW_DTYPE.names}
+        columns["path_offsets"] = self.path_offsets
+        columns["path_nodes"] = self.path_nodes
+        return columns
+
+    def to_npz(self, path):
+        np.savez(path, rows=self.rows, path_offsets=self.path_offsets, path_nodes=self.path_nodes)
+
+    @classmethod
+    def from_npz(cls, path):
+        with np.load(path) as data:
+            rows, offsets, nodes = data["rows"], data["path_offsets"], data["path_nodes"]
+        store = cls(capacity=max(len(rows), 1))
+        store._rows[:len(rows)] = rows
+        store._size = len(rows)
+        store._nodes = nodes.astype(np.int32).copy()
+        store._num_nodes = len(nodes)
+        store._offsets = offsets.astype(np.int64).copy()
+        store._num_paths = len(offsets) - 1
+        store._path_ids = {tuple(store.path(i)): i for i in range(store._num_paths)}
+        store._next_demand_id = int(rows["demand_id"].max()) + 1 if len(rows) else 0
+        return store
@@ -0,0 +1,245 @@
+"""
+RMSA 命令行入口：
+    python -m rmsa_cli run   [--config cfg.toml] [--topology ... --traffic ... --selector ...] [--profile report.json]
+    python -m rmsa_cli sweep [--config cfg.toml] [--workers 4]
+    python -m rmsa_cli queue split|work|local|status|requeue|merge QUEUE_DIR ...   （见 sweep_queue.py）
+    python -m rmsa_cli bench <name> [-- 基准脚本参数]
+    python -m rmsa_cli serve [--config cfg.toml] [--port 5555]
+    python -m rmsa_cli plot  [--config cfg.toml] --out occupancy.png
+配置文件为 TOML（Python 3.11+ 的 tomllib）或 JSON，各子命令读取同名小节（[run] / [sweep] / [serve] / [plot]），
+[cache] 小节配置结果缓存；命令行参数优先于配置文件。
+重量级模块（matplotlib、scipy、各 runner）只在用到它们的子命令中才导入，保证无界面运行的冷启动足够快。
+"""
+import argparse
+import json
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+RUN_DEFAULTS = {
+    "topology": "Germany-7nodes/G7-topology.txt",
+    "traffic": "Germany-7nodes/G7-matrix-1.txt",
+    "mode": "two_stage",
+    "selector": "least_loaded",
+    "assigner": "best_fit",
+    "k": 5,
+    "grid": "C",
+    "order": "desc",
+}
+CACHE_DEFAULTS = {"dir": ".rmsa_cache", "max_mb": 512, "enabled": True}
+SERVE_DEFAULTS = {"host": "127.0.0.1", "port": 5555, "unix": None, "batch_window_ms": 2.0}
+
+
+def load_config(path):
+    """ 读取 TOML / JSON 配置文件；path 为 None 时返回空配置 """
+    if path is None:
+        return {}
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    import tomllib
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def resolve_path(path, config_path=None):
+    """ 相对路径依次在 配置文件所在目录、当前目录、仓库目录 中查找 """
+    if path is None or os.path.isabs(path):
+        return path
+    bases = ([os.path.dirname(os.path.abspath(config_path))] if config_path else []) + [os.getcwd(), REPO_DIR]
+    for base in bases:
+        candidate = os.path.join(base, path)
+        if os.path.exists(candidate):
+            return candidate
+    return path
+
+
+def _merge(defaults, section, overrides):
+    """ 默认值 ← 配置文件小节 ← 命令行中显式给出的参数 """
+    merged = dict(defaults)
+    merged.update(section or {})
+    merged.update({key: value for key, value in overrides.items() if value is not None})
+    return merged
+
+
+def _cache(config, args):
+    settings = _merge(CACHE_DEFAULTS, config.get("cache"), {"dir": getattr(args, "cache_dir", None)})
+    if getattr(args, "no_cache", False) or not settings["enabled"]:
+        return None, settings
+    import run_cache
+    return run_cache.RunCache(settings["dir"], int(settings["max_mb"] * 1024 * 1024)), settings
+
+
+def _run_cell_from_args(args, config):
+    overrides = {key: getattr(args, key, None) for key in RUN_DEFAULTS}
+    cell = _merge(RUN_DEFAULTS, config.get("run"), overrides)
+    cell["topology"] = resolve_path(cell["topology"], args.config)
+    cell["traffic"] = resolve_path(cell["traffic"], args.config)
+    return cell
+
+
+# ----------------------------------------- 子命令 -----------------------------------------
+def cmd_run(args):
+    import sweep
+    config = load_config(args.config)
+    cell = _run_cell_from_args(args, config)
+    if args.profile:
+        # 分析模式不使用结果缓存（需要真正执行仿真）
+        import profiling
+        report = profiling.profile_cell(cell)
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        profiling.print_report(report, file=sys.stderr)
+        row = {**cell, **report["record"], "cached": False, "seconds": report["seconds"]}
+    else:
+        cache, _ = _cache(config, args)
+        row = sweep.run_cell(cell, cache)
+    if args.json:
+        print(json.dumps(row))
+    else:
+        for key, value in row.items():
+            print(f"{key}: {value}")
+
+
+def cmd_sweep(args):
+    import sweep
+    config = load_config(args.config)
+    section = config.get("sweep", {})
+    spec = dict(sweep.DEFAULT_GRID)
+    spec.update(section.get("grid", {}))
+    spec["scenario"] = [(resolve_path(t, args.config), resolve_path(m, args.config)) for t, m in spec["scenario"]]
+    cache, settings = _cache(config, args)
+    workers = args.workers or section.get("workers", 1)
+
+    rows = sweep.run_sweep(sweep.expand_grid(spec), cache.directory if cache else None,
+                           int(settings["max_mb"] * 1024 * 1024), workers)
+    out = args.out or section.get("out")
+    if out:
+        with open(out, "w", newline="") as f:
+            sweep.write_csv(rows, f)
+    else:
+        sweep.write_csv(rows, sys.stdout)
+    print(f"{len(rows)} cells, {sum(row['cached'] for row in rows)} cached", file=sys.stderr)
+
+
+def cmd_bench(args):
+    import runpy
+    path = os.path.join(REPO_DIR, "benchmarks", f"bench_{args.name}.py")
+    if not os.path.exists(path):
+        path = os.path.join(REPO_DIR, "benchmarks", f"{args.name}.py")
+    if not os.path.exists(path):
+        names = sorted(f[len("bench_"):-3] for f in os.listdir(os.path.join(REPO_DIR, "benchmarks"))
+                       if f.startswith("bench_") and f.endswith(".py"))
+        raise SystemExit(f"unknown benchmark {args.name!r}; available: {', '.join(names)}")
+    sys.argv = [path] + [a for a in args.bench_args if a != "--"]
+    runpy.run_path(path, run_name="__main__")
+
+
+def cmd_serve(args):
+    import asyncio
+    import rmsa_service
+    config = load_config(args.config)
+    run = _run_cell_from_args(args, config)
+    serve = _merge(SERVE_DEFAULTS, config.get("serve"),
+                   {"host": args.host, "port": args.port, "unix": args.unix})
+    namespace = argparse.Namespace(topology=run["topology"], selector=run["selector"], assigner=run["assigner"],
+                                   k=run["k"], grid=run["grid"], batch_window_ms=serve["batch_window_ms"],
+                                   host=serve["host"], port=serve["port"], unix=serve["unix"])
+    asyncio.run(rmsa_service._main(namespace))
+
+
+def cmd_plot(args):
+    import sweep
+    import run_cache
+    config = load_config(args.config)
+    cell = _run_cell_from_args(args, config)
+    cache, _ = _cache(config, args)
+
+    cached = None
+    if cache is not None:
+        key = run_cache.cache_key(cell["topology"], cell["traffic"], sweep.cell_config(cell))
+        cached = cache.get(key, with_spectrum=True)
+    if cached is not None:
+        spectrum = cached[0]
+    else:
+        spectrum, record = sweep.simulate(cell)
+        if cache is not None:
+            cache.put(key, spectrum, record)
+
+    import rendering  # matplotlib 只在这里加载
+    out = args.out or config.get("plot", {}).get("out", "occupancy.png")
+    if args.kind == "fragmentation":
+        rendering.render_fragmentation_bars(spectrum, out)
+    else:
+        rendering.render_occupancy_heatmap(spectrum, out, title=os.path.basename(cell["traffic"]))
+    print(out)
+
+
+def _add_run_options(parser):
+    parser.add_argument("--config", default=None, help="TOML / JSON 配置文件")
+    parser.add_argument("--topology")
+    parser.add_argument("--traffic")
+    parser.add_argument("--mode", help="two_stage / fs / ks / task4 / task5 / joint / batch")
+    parser.add_argument("--selector", help="fixed / entropy_max / entropy_avg / highest_loaded / least_loaded")
+    parser.add_argument("--assigner", help="first_fit / best_fit / most_used / fragmentation_aware")
+    parser.add_argument("--k", type=int)
+    parser.add_argument("--grid", help="频谱网格预置名称，如 C, C+L, C-6.25")
+    parser.add_argument("--order", help="需求排序：desc / asc / pair")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--no-cache", action="store_true")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m rmsa_cli", description="EON RMSA simulation toolkit")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="运行一次仿真并输出指标")
+    _add_run_options(run)
+    run.add_argument("--json", action="store_true")
+    run.add_argument("--profile", metavar="REPORT", help="内存分配分析（tracemalloc），报告写入该 JSON 文件，见 profiling.py")
+    run.set_defaults(func=cmd_run)
+
+    sweep = sub.add_parser("sweep", help="运行参数网格（使用结果缓存）")
+    sweep.add_argument("--config", default=None)
+    sweep.add_argument("--workers", type=int)
+    sweep.add_argument("--out")
+    sweep.add_argument("--cache-dir")
+    sweep.add_argument("--no-cache", action="store_true")
+    sweep.set_defaults(func=cmd_sweep)
+
+    # 实际由 main 直接转交给 sweep_queue.main，这里只为出现在帮助信息中
+    sub.add_parser("queue", help="分片执行参数网格（共享目录中的任务队列，见 sweep_queue.py）", add_help=False)
+
+    bench = sub.add_parser("bench", help="运行 benchmarks/ 中的基准脚本")
+    bench.add_argument("name", help="例如 grid_scaling、csr_routing、batch_planner、cold_start")
+    bench.add_argument("bench_args", nargs=argparse.REMAINDER)
+    bench.set_defaults(func=cmd_bench)
+
+    serve = sub.add_parser("serve", help="启动 RMSA 服务")
+    _add_run_options(serve)
+    serve.add_argument("--host")
+    serve.add_argument("--port", type=int)
+    serve.add_argument("--unix")
+    serve.set_defaults(func=cmd_serve)
+
+    plot = sub.add_parser("plot", help="渲染一次仿真的频谱占用图")
+    _add_run_options(plot)
+    plot.add_argument("--out")
+    plot.add_argument("--kind", default="heatmap", choices=("heatmap", "fragmentation"))
+    plot.set_defaults(func=cmd_plot)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["queue"]:
+        # 参数原样交给 sweep_queue（包括 --help）
+        import sweep_queue
+        return sweep_queue.main(argv[1:])
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
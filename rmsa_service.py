@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import base64
+import json
+
+import numpy as np
+import networkx as nx
+import network
+import metrics
+import allocator
+
+
+def _internal_error(request, error):
+    """ 处理出错时的回复，带上请求的 req_id，客户端才能匹配到它 """
+    response = {"ok": False, "error": f"internal error: {type(error).__name__}: {error}"}
+    if isinstance(request, dict) and "req_id" in request:
+        response["req_id"] = request["req_id"]
+    return response
+
+
+class RMSAService:
+    """
+    常驻内存的 RMSA 服务：拓扑只加载一次，频谱状态与候选路径缓存保存在内存中。
+
+    支持的请求（JSON 对象，字段 "op"）：
+      - allocate:   {"op": "allocate", "src": 1, "dst": 2, "demand": 100}
+      - release:    {"op": "release", "id": 3}
+      - query_path: {"op": "query_path", "src": 1, "dst": 2}
+      - metrics:    {"op": "metrics", "per_link": false}
+      - snapshot:   {"op": "snapshot"}
+    请求可以携带 "req_id"，响应中原样返回，用于在同一连接上并发请求时匹配响应。
+
+    并发到达的请求会被攒成一个微批次 (micro-batch)，在一次分配过程中统一处理：
+    先处理 release，再按需求从大到小处理 allocate（与 network.load_traffic 的排序一致），
+    最后处理只读请求，因此 metrics / snapshot 反映的是本批次处理后的状态。
+    """
+
+    def __init__(self, topology_file, selector="least_loaded", assigner="best_fit", k=5,
+                 grid=None, batch_window=0.002, max_batch=256):
+        self.G = network.load_topology(topology_file)
+        self.spectrum = network.init_spectrum(self.G, grid)
+        self.path_cache = {}
+        self.selector = selector
+        self.assigner = assigner
+        self.k = k
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+        self.connections = {}  # 连接编号 -> 该流量的光路列表
+        self.next_id = 1
+        self.stats = {"requests": 0, "batches": 0, "allocated": 0, "blocked": 0, "released": 0}
+        self._queue = None
+        self._batcher = None
+
+    # ----------------------------------------- 请求处理 -----------------------------------------
+    def _allocate(self, request):
+        src, dst, demand = int(request["src"]), int(request["dst"]), float(request["demand"])
+        if src not in self.G or dst not in self.G or src == dst:
+            return {"ok": False, "error": f"invalid node pair {src}->{dst}"}
+        if not np.isfinite(demand) or demand <= 0:
+            return {"ok": False, "error": f"invalid demand {request['demand']!r}"}
+
+        paths = allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+        lightpaths, blocked = allocator.allocate_demand(
+            self.G, paths, src, dst, demand, self.spectrum, self.selector, self.assigner)
+
+        if blocked:
+            self.stats["blocked"] += 1
+        if not lightpaths:
+            return {"ok": False, "error": "blocked", "blocked": blocked}
+
+        conn_id = self.next_id
+        self.next_id += 1
+        self.connections[conn_id] = lightpaths
+        self.stats["allocated"] += 1
+        return {"ok": True, "id": conn_id, "lightpaths": lightpaths, "blocked": blocked}
+
+    def _release(self, request):
+        lightpaths = self.connections.pop(int(request["id"]), None)
+        if lightpaths is None:
+            return {"ok": False, "error": f"unknown id {request['id']}"}
+        for lightpath in lightpaths:
+            allocator.release_lightpath(self.spectrum, lightpath)
+        self.stats["released"] += 1
+        return {"ok": True, "id": int(request["id"])}
+
+    def _query_path(self, request):
+        src, dst = int(request["src"]), int(request["dst"])
+        if src not in self.G or dst not in self.G or src == dst:
+            return {"ok": False, "error": f"invalid node pair {src}->{dst}"}
+        paths = allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+        chosen = allocator.select_path(self.G, paths, self.spectrum, self.selector)
+        return {
+            "ok": True,
+            "paths": paths,
+            "lengths": [allocator.path_length(self.G, p) for p in paths],
+            "selected": chosen,
+        }
+
+    def _metrics(self, request):
+        """ 指标汇总（metrics.report）；请求带 "per_link": true 时在 "per_link" 下附带逐链路数组 """
+        return {
+            "ok": True,
+            **metrics.report(self.spectrum).to_dict(per_link=bool(request.get("per_link", False))),
+            "active_connections": len(self.connections),
+            "stats": dict(self.stats),
+        }
+
+    def _snapshot(self, request):
+        """ 频谱快照：每条链路的占用位图 (np.packbits + base64，1=占用) """
+        links, free = metrics.spectrum_matrix(self.spectrum)
+        occupied = np.packbits(free == 0, axis=1)
+        return {
+            "ok": True,
+            "links": [list(link) for link in links],
+            "num_slots": int(free.shape[1]) if free.size else 0,
+            "occupied": [base64.b64encode(row.tobytes()).decode("ascii") for row in occupied],
+        }
+
+    HANDLERS = {
+        "allocate": _allocate,
+        "release": _release,
+        "query_path": _query_path,
+        "metrics": _metrics,
+        "snapshot": _snapshot,
+    }
+    # 微批次内的处理顺序
+    BATCH_ORDER = {"release": 0, "allocate": 1, "query_path": 2, "metrics": 2, "snapshot": 2}
+
+    def handle(self, request):
+        """ 同步处理单个请求（不经过微批次），返回响应字典 """
+        if not isinstance(request, dict):
+            self.stats["requests"] += 1
+            return {"ok": False, "error": "bad request: expected a JSON object"}
+        op = request.get("op")
+        handler = self.HANDLERS.get(op)
+        if handler is None:
+            response = {"ok": False, "error": f"unknown op {op!r}"}
+        else:
+            try:
+                response = handler(self, request)
+            except (KeyError, TypeError, ValueError) as e:
+                response = {"ok": False, "error": f"bad request: {e}"}
+            except nx.NetworkXNoPath:
+                response = {"ok": False, "error": "no path"}
+        if "req_id" in request:
+            response["req_id"] = request["req_id"]
+        self.stats["requests"] += 1
+        return response
+
+    def process_batch(self, requests):
+        """ 在一次分配过程中处理一批请求，返回与输入顺序一致的响应列表 """
+        order = sorted(range(len(requests)), key=lambda i: self._batch_key(requests[i], i))
+        responses = [None] * len(requests)
+        for i in order:
+            try:
+                responses[i] = self.handle(requests[i])
+            except Exception as e:  # 单个请求出错只影响该请求，批次中的其他请求照常处理
+                responses[i] = _internal_error(requests[i], e)
+        self.stats["batches"] += 1
+        return responses
+
+    def _batch_key(self, request, index):
+        """ 批次内排序键：先释放再分配，分配按流量从大到小；无法解析的请求不在这里报错，交给 handle 回复 """
+        if not isinstance(request, dict):
+            return 2, 0.0, index
+        demand = 0.0
+        if request.get("op") == "allocate":
+            try:
+                demand = float(request.get("demand", 0) or 0)
+            except (TypeError, ValueError):
+                pass
+            if not np.isfinite(demand):
+                demand = 0.0
+        return self.BATCH_ORDER.get(request.get("op"), 2), -demand, index
+
+    # ----------------------------------------- 微批次 -----------------------------------------
+    async def submit(self, request):
+        """ 提交请求并等待其所在微批次处理完成 """
+        if self._queue is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future))
+        return await future
+
+    def start(self):
+        """ 启动微批次处理任务（需在事件循环中调用） """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+            self._queue = None
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # 把已经排队的请求也并入本批次
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                responses = self.process_batch([request for request, _ in batch])
+            except Exception as e:  # 批次处理本身出错：回复本批次的所有请求，处理循环继续运行
+                responses = [_internal_error(request, e) for request, _ in batch]
+            for (_, future), response in zip(batch, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    # ----------------------------------------- JSON-lines 协议 -----------------------------------------
+    async def _handle_connection(self, reader, writer):
+        pending = set()
+        lock = asyncio.Lock()
+
+        async def serve_line(line):
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                response = {"ok": False, "error": f"invalid json: {e}"}
+            else:
+                response = await self.submit(request)
+            data = (json.dumps(response) + "\n").encode("utf-8")
+            async with lock:
+                writer.write(data)
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                # 同一连接上的请求并发处理，便于被合并到同一个微批次
+                task = asyncio.create_task(serve_line(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=5555, unix_path=None):
+        """ 启动 TCP（或 Unix socket）服务，返回 asyncio.Server """
+        self.start()
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+
+class RMSAClient:
+    """
+    JSON-lines 协议的本地客户端，可在同一连接上并发发送多个请求（通过 req_id 匹配响应）
+    """
+
+    def __init__(self):
+        self.reader = None
+        self.writer = None
+        self._futures = {}
+        self._next_req = 0
+        self._reader_task = None
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=5555, unix_path=None):
+        client = cls()
+        if unix_path:
+            client.reader, client.writer = await asyncio.open_unix_connection(unix_path)
+        else:
+            client.reader, client.writer = await asyncio.open_connection(host, port)
+        client._reader_task = asyncio.create_task(client._read_loop())
+        return client
+
+    async def _read_loop(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._futures.pop(response.get("req_id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError("connection closed"))
+        self._futures.clear()
+
+    async def request(self, op, **fields):
+        self._next_req += 1
+        req_id = self._next_req
+        future = asyncio.get_running_loop().create_future()
+        self._futures[req_id] = future
+        self.writer.write((json.dumps({"op": op, "req_id": req_id, **fields}) + "\n").encode("utf-8"))
+        await self.writer.drain()
+        return await future
+
+    async def allocate(self, src, dst, demand):
+        return await self.request("allocate", src=src, dst=dst, demand=demand)
+
+    async def release(self, conn_id):
+        return await self.request("release", id=conn_id)
+
+    async def query_path(self, src, dst):
+        return await self.request("query_path", src=src, dst=dst)
+
+    async def metrics(self, per_link=False):
+        return await self.request("metrics", per_link=per_link)
+
+    async def snapshot(self):
+        return await self.request("snapshot")
+
+    async def close(self):
+        self.writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+
+
+async def _main(args):
+    service = RMSAService(args.topology, selector=args.selector, assigner=args.assigner, k=args.k,
+                          grid=getattr(args, "grid", None), batch_window=args.batch_window_ms / 1000.0)
+    server = await service.serve(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"🚀 RMSA 服务已启动: {where}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RMSA allocation service (JSON lines)")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5555)
+    parser.add_argument("--unix", default=None, help="Unix socket 路径（指定后忽略 host/port）")
+    parser.add_argument("--selector", default="least_loaded", choices=sorted(allocator.PATH_SELECTORS))
+    parser.add_argument("--assigner", default="best_fit", choices=sorted(allocator.SPECTRUM_ASSIGNERS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    asyncio.run(_main(parser.parse_args()))
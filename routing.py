@@ -1,9 +1,12 @@
+import itertools
 import networkx as nx
 import network  # 解析网络拓扑
 import numpy as np
 import modulation
 import metrics
 import spectrum_assignment  # 频谱分配
+import csr_graph
+import spectrum_grid
 
 
 def fixed_shortest_path_routing(G, src, dst):
@@ -13,7 +16,28 @@ def fixed_shortest_path_routing(G, src, dst):
 
 def k_shortest_paths_routing(G, src, dst, k=5):
     """ 计算 K 最短路径 (Yen's Algorithm) """
-    return list(nx.shortest_simple_paths(G, source=src, target=dst, weight='weight'))[:k]
+    # 只取前 k 条，避免枚举全部简单路径（大拓扑上是指数级的）
+    return list(itertools.islice(nx.shortest_simple_paths(G, source=src, target=dst, weight='weight'), k))
+
+
+def csr_shortest_path_routing(csr, src, dst, link_mask=None):
+    """ 在 CSR 图上计算最短路径，可用 link_mask 排除链路；不可达时返回 None """
+    return csr_graph.shortest_path(csr, src, dst, link_mask)[0]
+
+
+def csr_k_shortest_paths_routing(csr, src, dst, k=5, link_mask=None, first_path=None):
+    """ 在 CSR 图上计算 K 最短路径 (Yen's Algorithm)，可用 link_mask 排除链路，first_path 为已知的最短路 """
+    return [path for path, _ in csr_graph.k_shortest_paths(csr, src, dst, k, link_mask, first_path)]
+
+
+def _link_fsu_array(spectrum_utilization, link):
+    """
+    获取链路的光谱使用情况；不在字典里的链路视为全空闲（FSU 数量取自频谱网格）
+    """
+    fsu_array = spectrum_utilization.get(link)
+    if fsu_array is None:
+        fsu_array = np.ones(spectrum_grid.grid_of(spectrum_utilization).num_slots)
+    return fsu_array
 
 
 def highest_loaded_path_routing_avg(G, paths, spectrum_utilization):
@@ -36,10 +60,10 @@ def highest_loaded_path_routing_avg(G, paths, spectrum_utilization):
 
         for i in range(num_links):
             link = (path[i], path[i + 1])
-            # 如果该link不在字典里，就当做全空闲(np.zeros(320) 意味着没有1也没有0吗？这里可按需求处理)
-            fsu_array = spectrum_utilization.get(link, np.ones(320))
-            # 已占用FSU数 = 320 - 空闲FSU数
-            used_on_link = 320 - np.sum(fsu_array)
+            # 如果该link不在字典里，就当做全空闲
+            fsu_array = _link_fsu_array(spectrum_utilization, link)
+            # 已占用FSU数 = 总FSU数 - 空闲FSU数
+            used_on_link = len(fsu_array) - np.sum(fsu_array)
             total_used_slots += used_on_link
 
         # 计算该路径的平均已占用数
@@ -71,10 +95,10 @@ def least_loaded_path_routing_avg(G, paths, spectrum_utilization):
 
         for i in range(num_links):
             link = (path[i], path[i + 1])
-            # 获取该链路的光谱利用信息，默认为全空闲（np.ones(320)）
-            fsu_array = spectrum_utilization.get(link, np.ones(320))
-            # 已占用FSU数 = 320 - 空闲FSU数
-            used_on_link = 320 - np.sum(fsu_array)
+            # 获取该链路的光谱利用信息，默认为全空闲
+            fsu_array = _link_fsu_array(spectrum_utilization, link)
+            # 已占用FSU数 = 总FSU数 - 空闲FSU数
+            used_on_link = len(fsu_array) - np.sum(fsu_array)
             total_used_slots += used_on_link
 
         # 计算该路径的平均已占用FSU数
@@ -104,7 +128,7 @@ def entropy_minimization_path_routing_max(G, paths, spectrum_utilization):
 
         for i in range(len(path) - 1):
             link = (path[i], path[i + 1])
-            fsu_array = spectrum_utilization.get(link, np.ones(320))  # 获取链路光谱使用情况
+            fsu_array = _link_fsu_array(spectrum_utilization, link)  # 获取链路光谱使用情况
             entropy = metrics.calculate_fragmentation_entropy(fsu_array)  # 计算碎片化熵
             entropy_list.append(entropy)
 
@@ -137,7 +161,7 @@ def entropy_minimization_path_routing_avg(G, paths, spectrum_utilization):
         for i in range(num_links):
             link = (path[i], path[i + 1])
             # 获取链路上的光谱使用情况，默认为全空闲
-            fsu_array = spectrum_utilization.get(link, np.ones(320))
+            fsu_array = _link_fsu_array(spectrum_utilization, link)
             # 计算该链路的碎片化熵
             entropy = metrics.calculate_fragmentation_entropy(fsu_array)
             total_entropy += entropy
@@ -209,8 +233,8 @@ def find_backup_path(G, paths, spectrum_utilization, primary_path):
 
         for i in range(num_links):
             link = (path[i], path[i + 1])
-            fsu_array = spectrum_utilization.get(link, np.ones(320))  # 获取光谱占用情况
-            used_on_link = 320 - np.sum(fsu_array)  # 计算已占用的频谱槽
+            fsu_array = _link_fsu_array(spectrum_utilization, link)  # 获取光谱占用情况
+            used_on_link = len(fsu_array) - np.sum(fsu_array)  # 计算已占用的频谱槽
             total_used_slots += used_on_link
 
         avg_load = total_used_slots / num_links  # 计算路径的平均负载
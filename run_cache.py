@@ -0,0 +1,160 @@
+import glob
+import hashlib
+import json
+import os
+
+import numpy as np
+import spectrum_grid
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_file_digests = {}
+_code_version = None
+
+
+def file_digest(path):
+    """ 文件内容的 sha256（按路径、修改时间和大小缓存，同一进程内不重复读取） """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _file_digests[key] = digest
+    return digest
+
+
+def code_version():
+    """ 代码版本：仓库顶层所有 .py 文件内容的联合哈希（任何算法改动都会使缓存失效） """
+    global _code_version
+    if _code_version is None:
+        h = hashlib.sha256()
+        for path in sorted(glob.glob(os.path.join(_REPO_DIR, "*.py"))):
+            h.update(os.path.basename(path).encode("utf-8"))
+            h.update(file_digest(path).encode("ascii"))
+        _code_version = h.hexdigest()
+    return _code_version
+
+
+def cache_key(topology_file, traffic_file, config):
+    """
+    一次完整仿真的内容地址：拓扑文件、流量文件的内容哈希 + 策略配置（含需求排序方式） + 代码版本
+    :param config: 可 JSON 序列化的字典，例如 {"selector": ..., "assigner": ..., "k": 5, "order": "desc"}
+    """
+    payload = json.dumps({
+        "topology": file_digest(topology_file),
+        "traffic": file_digest(traffic_file),
+        "config": config,
+        "code": code_version(),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def save_spectrum(path, spectrum):
+    """ 频谱状态写入压缩 npz：链路列表、占用位图 (packbits) 和网格配置 """
+    links = list(spectrum.keys())
+    grid = spectrum_grid.grid_of(spectrum)
+    occupied = np.stack([np.asarray(spectrum[link]) == 0 for link in links]) if links else np.zeros((0, 0), bool)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, links=np.array(links, dtype=np.int64).reshape(-1, 2),
+                            occupied=np.packbits(occupied, axis=1), num_slots=grid.num_slots,
+                            grid=json.dumps(grid.to_dict()))
+
+
+def load_spectrum(path):
+    """ save_spectrum 的逆操作，返回 SpectrumState """
+    with np.load(path) as data:
+        spec = json.loads(str(data["grid"]))
+        grid = spectrum_grid.SpectrumGrid(spec["bands"], spec["slot_width_ghz"])
+        occupied = np.unpackbits(data["occupied"], axis=1, count=int(data["num_slots"])).astype(bool)
+        spectrum = spectrum_grid.SpectrumState(grid=grid)
+        for (u, v), row in zip(data["links"].tolist(), occupied):
+            spectrum[(u, v)] = np.where(row, 0.0, 1.0)
+    return spectrum
+
+
+class RunCache:
+    """
+    基于内容地址的仿真结果缓存：
+      - <directory>/<key[:2]>/<key>.npz   最终频谱状态
+      - <directory>/<key[:2]>/<key>.json  指标记录
+    命中时更新文件的修改时间；总大小超过 max_bytes 时按最久未使用的顺序淘汰 (LRU)。
+    """
+
+    def __init__(self, directory=".rmsa_cache", max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".npz", base + ".json"
+
+    def get(self, key, with_spectrum=False):
+        """
+        :return: 指标记录字典（with_spectrum=True 时为 (spectrum, 指标记录)）；未命中返回 None
+        """
+        npz_path, json_path = self._paths(key)
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            spectrum = load_spectrum(npz_path) if with_spectrum else None
+        except (OSError, ValueError):
+            return None
+        for path in (npz_path, json_path):
+            try:
+                os.utime(path)  # LRU：记录最近一次使用
+            except OSError:
+                pass
+        return (spectrum, record) if with_spectrum else record
+
+    def put(self, key, spectrum, record):
+        """ 写入一次仿真结果（先写临时文件再原子替换，多进程并发写入同一键也安全） """
+        npz_path, json_path = self._paths(key)
+        os.makedirs(os.path.dirname(npz_path), exist_ok=True)
+        suffix = f".tmp{os.getpid()}"
+        save_spectrum(npz_path + suffix, spectrum)
+        with open(json_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(npz_path + suffix, npz_path)
+        os.replace(json_path + suffix, json_path)
+        self.evict()
+
+    def entries(self):
+        """ [(最近使用时间, 总字节数, 键)] """
+        sizes, used = {}, {}
+        for path in glob.glob(os.path.join(self.directory, "*", "*.*")):
+            key, ext = os.path.splitext(os.path.basename(path))
+            if ext not in (".npz", ".json"):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            sizes[key] = sizes.get(key, 0) + stat.st_size
+            used[key] = max(used.get(key, 0), stat.st_mtime)
+        return [(used[key], sizes[key], key) for key in sizes]
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """ 总大小超过上限时，从最久未使用的条目开始删除 """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+    def clear(self):
+        for _, _, key in self.entries():
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
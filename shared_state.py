@@ -0,0 +1,268 @@
+"""
+共享内存中的只读网络状态快照，供多进程 what-if 评估（排序搜索、策略比较、生存性分析）使用：
+    publisher = SnapshotPublisher()
+    handle = publisher.publish(spectrum, csr, table)          # 父进程：发布版本 1
+    with ProcessPoolExecutor(4) as pool:
+        results = map_snapshot(pool, evaluate_ordering, handle, orderings)
+        ...                                                    # 父进程继续分配
+        handle = publisher.publish(spectrum, csr, table)      # 发布版本 2，进程池不必重启
+        results = map_snapshot(pool, evaluate_ordering, handle, orderings)
+    publisher.close()
+每个版本是一块 multiprocessing.shared_memory：频谱占用矩阵 (links × slots, uint8, 1=空闲)、CSR 拓扑数组
+和可选的 path_table.PathTable 数组。任务只携带很小的 SnapshotHandle（名称 + 布局），
+worker 按名称映射同一块内存（每个版本只映射一次），不再对 spectrum 字典逐任务序列化。
+worker 中的修改写入 SpectrumOverlay（写时复制的逐链路增量），快照本身是只读的。
+"""
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import csr_graph
+import path_table
+import spectrum_grid
+
+_ALIGN = 64
+
+
+@dataclass(frozen=True)
+class SnapshotHandle:
+    """ 快照描述（可序列化，随任务传递）：共享内存名称、版本号、各数组的 (偏移, dtype, 形状)、频谱网格 """
+    name: str
+    version: int
+    layout: tuple
+    grid: object
+
+
+def _pack(arrays):
+    """ 各数组按 64 字节对齐依次排列，返回 (布局, 总字节数) """
+    layout, offset = [], 0
+    for key, array in arrays.items():
+        layout.append((key, offset, array.dtype.str, array.shape))
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    return tuple(layout), max(offset, 1)
+
+
+def _attach(name):
+    """ 映射已有的共享内存；不向 resource_tracker 登记（由发布方负责释放，worker 退出时不能将其删除） """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SnapshotPublisher:
+    """
+    父进程一侧：把网络状态发布为带版本号的共享内存快照。
+    最近 keep 个版本保持可用（仍在处理旧版本任务的 worker 不受影响），更早的版本在发布新版本时释放。
+    """
+
+    def __init__(self, keep=2):
+        self.keep = keep
+        self.version = 0
+        self._segments = []  # [(version, SharedMemory)]
+
+    def publish(self, spectrum, csr, table=None):
+        """
+        :param spectrum: 频谱状态字典；行顺序取 csr.links
+        :param csr: csr_graph.CSRGraph（worker 由此重建拓扑）
+        :param table: 可选的 path_table.PathTable
+        :return: SnapshotHandle
+        """
+        arrays = {
+            "occupancy": np.stack([np.asarray(spectrum[link]) == 1 for link in csr.links]).astype(np.uint8),
+            "nodes": csr.nodes, "indptr": csr.indptr, "indices": csr.indices, "weights": csr.weights,
+            "arc_link": csr.arc_link, "links": np.array(csr.links, dtype=np.int64).reshape(-1, 2),
+        }
+        if table is not None:
+            arrays.update({f"paths.{key}": value for key, value in table.arrays().items()})
+        layout, size = _pack(arrays)
+
+        self.version += 1
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        for key, offset, dtype, shape in layout:
+            np.ndarray(shape, dtype, buffer=shm.buf, offset=offset)[...] = arrays[key]
+        self._segments.append((self.version, shm))
+        while len(self._segments) > self.keep:
+            self._release(self._segments.pop(0)[1])
+        return SnapshotHandle(shm.name, self.version, layout, spectrum_grid.grid_of(spectrum))
+
+    @staticmethod
+    def _release(shm):
+        shm.close()
+        shm.unlink()
+
+    def close(self):
+        for _, shm in self._segments:
+            self._release(shm)
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Snapshot:
+    """
+    worker 一侧映射的快照：所有数组都是共享内存上的只读视图
+      - occupancy: links × slots（1=空闲），行顺序与 links 一致
+      - csr:       csr_graph.CSRGraph
+      - table:     path_table.PathTable 或 None
+    """
+
+    def __init__(self, handle, shm=None):
+        self.handle = handle
+        self.version = handle.version
+        self.grid = handle.grid
+        self._shm = shm or _attach(handle.name)
+        arrays = {}
+        for key, offset, dtype, shape in handle.layout:
+            view = np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[key] = view
+        self.occupancy = arrays["occupancy"]
+        self.links = [tuple(link) for link in arrays["links"].tolist()]
+        self.link_index = {link: i for i, link in enumerate(self.links)}
+        self.csr = csr_graph.CSRGraph(arrays["nodes"], arrays["indptr"], arrays["indices"], arrays["weights"],
+                                      arrays["arc_link"], self.links)
+        paths = {key[len("paths."):]: value for key, value in arrays.items() if key.startswith("paths.")}
+        self.table = path_table.PathTable.from_arrays(self.csr, paths) if paths else None
+        self._graph = None
+
+    def graph(self):
+        """ networkx 图（allocator / routing 的接口需要），按需构建一次 """
+        if self._graph is None:
+            import networkx as nx
+            G = nx.Graph()
+            for (u, v), length in zip(self.links, self.csr.link_length.tolist()):
+                G.add_edge(u, v, weight=length)
+            self._graph = G
+        return self._graph
+
+    def overlay(self):
+        """ 新的写时复制频谱视图 """
+        return SpectrumOverlay(self)
+
+    def close(self):
+        self.occupancy = self.csr = self.table = None
+        try:
+            self._shm.close()
+        except BufferError:
+            pass  # 调用方仍持有视图时由垃圾回收释放
+
+
+class SpectrumOverlay(Mapping):
+    """
+    快照之上的写时复制频谱状态，接口与频谱字典 {(u, v): np.array} 相同（附带 grid）：
+    某条链路第一次被访问时复制该行（一行只有 num_slots 字节），之后的读写都作用于副本；
+    未访问的链路不复制。reset() 丢弃所有修改，以便在同一快照上尝试下一个假设。
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.grid = snapshot.grid
+        self._rows = {}
+
+    def __getitem__(self, link):
+        row = self._rows.get(link)
+        if row is None:
+            # 与 network.init_spectrum 相同的 dtype
+            row = self.snapshot.occupancy[self.snapshot.link_index[link]].astype(float)
+            self._rows[link] = row
+        return row
+
+    def __contains__(self, link):
+        return link in self.snapshot.link_index
+
+    def __iter__(self):
+        return iter(self.snapshot.links)
+
+    def __len__(self):
+        return len(self.snapshot.links)
+
+    def delta(self):
+        """ 与快照不同的链路 {link: 新的行} """
+        base, index = self.snapshot.occupancy, self.snapshot.link_index
+        return {link: row for link, row in self._rows.items() if not np.array_equal(row, base[index[link]])}
+
+    def matrix(self):
+        """ 叠加增量后的 links × slots 占用矩阵（复制一次快照） """
+        matrix = self.snapshot.occupancy.astype(float)
+        for link, row in self._rows.items():
+            matrix[self.snapshot.link_index[link]] = row
+        return matrix
+
+    def reset(self):
+        self._rows = {}
+
+
+def apply_delta(spectrum, delta):
+    """ 父进程采纳某个 worker 的结果：把 SpectrumOverlay.delta() 写回频谱状态 """
+    for link, row in delta.items():
+        spectrum[link][:] = row
+
+
+# ----------------------------------------- worker 侧 -----------------------------------------
+_attached = None
+
+
+def attach(handle):
+    """ 当前进程中 handle 对应的 Snapshot；版本变化时映射新版本并释放旧的映射 """
+    global _attached
+    if _attached is None or _attached.handle.name != handle.name:
+        if _attached is not None:
+            _attached.close()
+        _attached = Snapshot(handle)
+    return _attached
+
+
+def _call(args):
+    function, handle, item = args
+    return function(attach(handle), item)
+
+
+def map_snapshot(executor, function, handle, items):
+    """
+    在进程池中对每个 item 调用 function(snapshot, item)；每个任务只序列化 handle 和 item
+    :param function: 模块级函数（可被序列化）
+    :return: 结果列表，顺序与 items 一致
+    """
+    return list(executor.map(_call, [(function, handle, item) for item in items]))
+
+
+def evaluate_ordering(snapshot, args):
+    """
+    what-if 评估：在快照之上按给定顺序分配一批流量，返回结果而不修改快照
+    :param args: (demands, selector, assigner, k)，demands 为 [(src, dst, Gbps), ...]
+    :return: {blocked, blocked_gbps, lightpaths, used_fsus, delta}
+    """
+    import allocator
+    demands, selector, assigner, k = args
+    G = snapshot.graph()
+    spectrum = snapshot.overlay()
+    path_cache = {}
+    blocked = blocked_gbps = lightpaths = 0
+    for src, dst, demand in demands:
+        if snapshot.table is not None:
+            paths = snapshot.table.paths(src, dst)[:k]
+        else:
+            paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        allocated, failed = allocator.allocate_demand(G, paths, src, dst, demand, spectrum, selector, assigner)
+        lightpaths += len(allocated)
+        blocked += len(failed)
+        blocked_gbps += sum(failed)
+    return {
+        "blocked": blocked,
+        "blocked_gbps": float(blocked_gbps),
+        "lightpaths": lightpaths,
+        "used_fsus": int((spectrum.matrix() == 0).sum()),
+        "delta": spectrum.delta(),
+    }
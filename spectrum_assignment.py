@@ -1,5 +1,6 @@
 import numpy as np
 import modulation  # 用于计算 FSU 数量
+import spectrum_grid  # 频谱网格配置（FSU 数量、宽度、波段）
 
 
 def split_traffic(demand_gbps, link_length_km):
@@ -17,46 +18,76 @@ def split_traffic(demand_gbps, link_length_km):
         return [demand_gbps]  # 如果小于最大容量，则不拆分
 
 
-def first_fit_spectrum_assignment(G, path, demand, spectrum):
+def path_available_slots(path, spectrum, total_slots):
+    """
+    路径上所有链路都空闲的 FSU（Spectrum Continuity）
+    :return: 布尔数组，长度 total_slots
+    """
+    available_slots = np.ones(total_slots, dtype=bool)  # 初始化全部可用
+    for i in range(len(path) - 1):
+        link = (path[i], path[i + 1])
+        if link in spectrum:
+            available_slots &= spectrum[link] == 1
+    return available_slots
+
+
+def feasible_window_starts(available_slots, num_slots, grid):
+    """
+    Spectrum Contiguity：所有 [s, s+num_slots) 全部可用且不跨越波段边界的起点 s
+    :return: 布尔数组，长度 total_slots - num_slots + 1（num_slots 超过总数时为空）；
+             num_slots <= 0 时不存在可行窗口，返回长度为 total_slots 的全 False 数组
+    """
+    if num_slots <= 0:
+        return np.zeros(len(available_slots), dtype=bool)
+    if num_slots > len(available_slots):
+        return np.zeros(0, dtype=bool)
+    free_count = np.concatenate(([0], np.cumsum(available_slots)))
+    feasible = (free_count[num_slots:] - free_count[:-num_slots]) == num_slots
+    return feasible & grid.valid_starts(num_slots)
+
+
+def first_fit_spectrum_assignment(G, path, demand, spectrum, num_slots=None):
     """
     First-Fit 频谱分配算法
     Input:
         - G:        解析出的Topology，用于找出path中的最大link长度，以便确定调制方式
         - path:     routing.py的输出，即找出的最短路径
         - demand：  本次的流量需求，单位：Gbps
-        - spectrum: 字典{(u, v): np.ones(320) for u, v in G.edges()}；用于记录某段link的FSU使用情况，在主函数中定义
+        - spectrum: 频谱状态 network.init_spectrum(G)（{(u, v): np.ones(num_slots)}，附带网格配置）；用于记录某段link的FSU使用情况，在主函数中定义
+        - num_slots: 可选，调用方已经算好的 FSU 数（提供时不再计算路径长度和调制格式）
 
     Output:
         - i:        FSU的索引
     """
-    total_slots = 320  # 总共 320 个 FSU
-    path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1)) # 计算path的长度（确定Modulation）
+    grid = spectrum_grid.grid_of(spectrum)  # FSU 数量 / 宽度 / 波段都取自频谱状态
+    total_slots = grid.num_slots
+    if num_slots is None:  # 调用方已按路径算好 FSU 数时（如 ReachTable 查表）不再重复计算
+        path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1)) # 计算path的长度（确定Modulation）
 
-    num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km)
+        num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km, grid.slot_width_ghz)
+
+    if num_slots <= 0:
+        return -1  # 无需占用 FSU 的请求不分配（与 feasible_window_starts 一致，四种策略都返回失败）
 
     # 1️⃣ **找到所有链路的可用频谱**
     # Spectrum Continuity (对应第3️⃣步）
     # 考虑所有的link，找出所有link都能用的FSU
-    available_slots = np.ones(total_slots)  # 初始化全部可用
-
-    for i in range(len(path) - 1):
-        link = (path[i], path[i+1])
-        if link in spectrum:
-            available_slots *= spectrum[link]
+    available_slots = path_available_slots(path, spectrum, total_slots)
 
     # 2️⃣ **搜索第一个连续的 num_slots 可用频谱块**
-    # Spectrum Contiguity：被分配的FSUs必须是连续的
-    for i in range(total_slots - num_slots + 1):
-        if np.all(available_slots[i:i+num_slots] == 1):  # 该范围内所有槽位都可用
-            # 3️⃣ **在路径上的所有链路上分配该频谱槽**
-            for j in range(len(path) - 1):
-                link = (path[j], path[j+1])
-                spectrum[link][i:i+num_slots] = 0  # 标记已占用
-            return i  # 返回起始频谱槽索引
+    # Spectrum Contiguity：被分配的FSUs必须是连续的（一次向量化计算所有窗口）
+    feasible = feasible_window_starts(available_slots, num_slots, grid)
+    if not feasible.any():
+        return -1  # **如果找不到合适的频谱块，返回失败**
 
-    return -1  # **如果找不到合适的频谱块，返回失败**
+    i = int(np.argmax(feasible))
+    # 3️⃣ **在路径上的所有链路上分配该频谱槽**
+    for j in range(len(path) - 1):
+        link = (path[j], path[j+1])
+        spectrum[link][i:i+num_slots] = 0  # 标记已占用
+    return i  # 返回起始频谱槽索引
 
-def most_used_spectrum_assignment(G, path, demand, spectrum):
+def most_used_spectrum_assignment(G, path, demand, spectrum, num_slots=None):
     """
     Most-Used 频谱分配算法：
     1) 计算所需的FSU数目
@@ -69,18 +100,22 @@ def most_used_spectrum_assignment(G, path, demand, spectrum):
         - path:     由routing.py等模块输出的路由（节点列表）
         - demand:   本次的流量需求 (Gbps)
         - spectrum: 字典, 记录各链路的频谱使用情况
-                    形如 {(u, v): np.ones(320) for u, v in G.edges()}；
+                    形如 network.init_spectrum(G)，即 {(u, v): np.ones(num_slots)}；
                     其中 1 表示空闲，0 表示已占用
     Output:
         - i:        成功时，返回分配的FSU的起始索引；若无可用分配块，则返回 -1
     """
 
     # ====== 1. 计算所需FSU数目 ======
-    total_slots = 320
+    grid = spectrum_grid.grid_of(spectrum)
+    total_slots = grid.num_slots
     # 计算路径长度
-    path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
-    # 计算所需FSU数量
-    num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km)
+    if num_slots is None:  # 调用方已按路径算好 FSU 数时（如 ReachTable 查表）不再重复计算
+        path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+        # 计算所需FSU数量
+        num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km, grid.slot_width_ghz)
+    if num_slots <= 0:
+        return -1
 
     # ====== 2. 统计每个FSU在“整个网络”上的使用情况 ======
     # spectrum[link][s] = 1 表示空闲, 0 表示被占用
@@ -90,89 +125,62 @@ def most_used_spectrum_assignment(G, path, demand, spectrum):
         # 1 - fsu_array[s] 表示该slot是否被占用(1占用,0空闲)
         usage += (1 - fsu_array)  # element-wise 相加
 
-    # ====== 3. 对所有“连续 num_slots 大小”的候选区段, 计算其 usage 之和并从高到低排序 ======
-    block_usage_list = []
-    for start_slot in range(total_slots - num_slots + 1):
-        # 计算 [start_slot, start_slot + num_slots) 的 usage 之和
-        block_usage_sum = np.sum(usage[start_slot : start_slot + num_slots])
-        block_usage_list.append((block_usage_sum, start_slot))
-
-    # 按使用度从高到低排序（“最拥挤”的优先）
-    block_usage_list.sort(key=lambda x: x[0], reverse=True)
-
-    # ====== 4. 逐一检查这些区段在 path 上是否都空闲；若空闲则分配并返回 ======
-    for block_usage_sum, start_idx in block_usage_list:
-        # 检查在 path 上所有link的该区段是否可用
-        can_allocate = True
-        for i in range(len(path) - 1):
-            link = (path[i], path[i+1])
-            # 如果有任意一个slot被占用，则无法分配
-            if not np.all(spectrum[link][start_idx : start_idx + num_slots] == 1):
-                can_allocate = False
-                break
-
-        if can_allocate:
-            # 执行分配：将该区段标记为占用(0)
-            for i in range(len(path) - 1):
-                link = (path[i], path[i+1])
-                spectrum[link][start_idx : start_idx + num_slots] = 0
-            return start_idx  # 成功分配，返回该区段的首位索引
-
-    # 如果遍历完所有区段都无法分配，则返回 -1
-    return -1
-
-def best_fit_spectrum_assignment(G, path, demand, spectrum):
+    # ====== 3. 对所有“连续 num_slots 大小”的候选区段, 计算其 usage 之和 ======
+    usage_sum = np.concatenate(([0.0], np.cumsum(usage)))
+    block_usage = usage_sum[num_slots:] - usage_sum[:-num_slots]
+
+    # ====== 4. 在 path 上所有link都空闲的区段中，选择使用度最高（“最拥挤”）的；同分取最靠前 ======
+    available_slots = np.ones(total_slots, dtype=bool)
+    for i in range(len(path) - 1):
+        available_slots &= spectrum[(path[i], path[i+1])] == 1
+    feasible = feasible_window_starts(available_slots, num_slots, grid)
+    if not feasible.any():
+        # 如果遍历完所有区段都无法分配，则返回 -1
+        return -1
+
+    start_idx = int(np.argmax(np.where(feasible, block_usage, -1.0)))
+    # 执行分配：将该区段标记为占用(0)
+    for i in range(len(path) - 1):
+        link = (path[i], path[i+1])
+        spectrum[link][start_idx : start_idx + num_slots] = 0
+    return start_idx  # 成功分配，返回该区段的首位索引
+
+def best_fit_spectrum_assignment(G, path, demand, spectrum, num_slots=None):
     """
     Best-Fit 频谱分配算法
     Input:
         - G:        解析出的Topology，用于找出path中的最大link长度，以便确定调制方式
         - path:     routing.py的输出，即找出的最短路径
         - demand：  本次的流量需求，单位：Gbps
-        - spectrum: 字典{(u, v): np.ones(320) for u, v in G.edges()}；用于记录某段link的FSU使用情况，在主函数中定义
+        - spectrum: 频谱状态 network.init_spectrum(G)（{(u, v): np.ones(num_slots)}，附带网格配置）；用于记录某段link的FSU使用情况，在主函数中定义
 
     Output:
         - i:        FSU的起始索引
     """
-    total_slots = 320  # 总共 320 个 FSU
-    path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))  # 计算路径长度
+    grid = spectrum_grid.grid_of(spectrum)  # FSU 数量 / 宽度 / 波段都取自频谱状态
+    total_slots = grid.num_slots
+    if num_slots is None:  # 调用方已按路径算好 FSU 数时（如 ReachTable 查表）不再重复计算
+        path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))  # 计算路径长度
 
-    # 计算所需 FSU 数量和调制格式
-    num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km)
+        # 计算所需 FSU 数量和调制格式
+        num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km, grid.slot_width_ghz)
+    if num_slots <= 0:
+        return -1
 
     # 获取所有链路的可用频谱
-    available_slots = np.ones(total_slots)  # 初始化全部可用
-    for i in range(len(path) - 1):
-        link = (path[i], path[i+1])
-        if link in spectrum:
-            available_slots *= spectrum[link]  # 只保留所有链路均可用的FSU
+    available_slots = path_available_slots(path, spectrum, total_slots)  # 只保留所有链路均可用的FSU
 
-    # 查找所有连续的可用频谱块
+    # 查找所有连续的可用频谱块（在波段边界处切断）
     # 记录所有符合 `num_slots` 条件的可用块 (start_index, 块大小)
-    candidate_blocks = []
-    start = -1
-    length = 0
-
-    for i in range(total_slots):
-        if available_slots[i] == 1:
-            if start == -1:
-                start = i
-            length += 1
-        else:
-            if length >= num_slots:
-                candidate_blocks.append((start, length))
-            start = -1
-            length = 0
-
-    # 如果循环结束时仍有一个可用块
-    if length >= num_slots:
-        candidate_blocks.append((start, length))
+    block_starts, block_lengths = grid.free_runs(available_slots)
+    fitting = block_lengths >= num_slots
 
     # 选择最小可用块（Best Fit）
-    if not candidate_blocks:
+    if not fitting.any():
         return -1  # 没有可用的 FSU 块，分配失败
 
-    best_block = min(candidate_blocks, key=lambda x: x[1])  # 选择最小合适的可用块
-    start_index = best_block[0]
+    # 选择最小合适的可用块（同样大小时取最靠前的）
+    start_index = int(block_starts[np.argmin(np.where(fitting, block_lengths, total_slots + 1))])
 
     # 在路径上的所有链路上分配该频谱块
     for j in range(len(path) - 1):
@@ -181,8 +189,85 @@ def best_fit_spectrum_assignment(G, path, demand, spectrum):
 
     return start_index  # 返回分配的起始 FSU 索引
 
+def _entropy_term(lengths, total_slots):
+    """ 空闲块长度对碎片化熵的贡献 -p·log2(p)，p = 长度 / 总 FSU 数；长度为 0 时为 0 """
+    p = np.maximum(lengths, 1) / total_slots
+    return np.where(lengths > 0, -p * np.log2(p), 0.0)
+
+
+def window_entropy_delta(free, num_slots):
+    """
+    在所有链路上占用每个候选窗口 [s, s+num_slots) 后，碎片化熵与利用率熵的变化量（按链路求和）
+    只用游程边界计算，不复制频谱：窗口落在某个空闲块 [a, b) 内，占用后该块被拆成左右两段
+      - 碎片化熵（calculate_fragmentation_entropy）：S - f(b-a) + f(s-a) + f(b-s-num_slots)，空闲块不超过 1 个时为 0
+      - 利用率熵（utilization_entropy）：窗口两端各新增一次状态变化（s > a / s+num_slots < b），
+        或恰好贴住已占用的 FSU 时消去一次，除以 (总 FSU 数 - 1)
+    :param free: links × slots 的布尔矩阵（True=空闲）
+    :return: 长度 slots - num_slots + 1 的数组；窗口不是在所有链路上都空闲时取值无意义
+    """
+    num_links, total_slots = free.shape
+    positions = np.arange(total_slots)
+    prev_free = np.zeros_like(free)
+    prev_free[:, 1:] = free[:, :-1]
+    next_free = np.zeros_like(free)
+    next_free[:, :-1] = free[:, 1:]
+    run_head = free & ~prev_free
+    run_tail = free & ~next_free
+    # 每个 FSU 所在空闲块的起点 a 与终点 b（开区间）
+    run_start = np.maximum.accumulate(np.where(run_head, positions, 0), axis=1)
+    run_end = np.minimum.accumulate(np.where(run_tail, positions + 1, total_slots)[:, ::-1], axis=1)[:, ::-1]
+
+    # 当前各链路的空闲块数与熵之和
+    num_runs = run_head.sum(axis=1)
+    entropy_sum = (_entropy_term(run_end - run_start, total_slots) * run_head).sum(axis=1)
+    entropy_before = np.where(num_runs >= 2, entropy_sum, 0.0)
+
+    starts = positions[:total_slots - num_slots + 1]
+    a, b = run_start[:, starts], run_end[:, starts]
+    left = np.maximum(starts - a, 0)
+    right = np.maximum(b - starts - num_slots, 0)
+    runs_after = num_runs[:, None] - 1 + (left > 0) + (right > 0)
+    sum_after = (entropy_sum[:, None] - _entropy_term(b - a, total_slots)
+                 + _entropy_term(left, total_slots) + _entropy_term(right, total_slots))
+    delta_fragmentation = np.where(runs_after >= 2, sum_after, 0.0) - entropy_before[:, None]
+
+    transitions = (np.where(left > 0, 1, np.where(a > 0, -1, 0))
+                   + np.where(right > 0, 1, np.where(b < total_slots, -1, 0)))
+    delta_utilization = transitions / (total_slots - 1) if total_slots > 1 else np.zeros_like(delta_fragmentation)
+    return (delta_fragmentation + delta_utilization).sum(axis=0)
+
+
+def fragmentation_aware_spectrum_assignment(G, path, demand, spectrum, num_slots=None):
+    """
+    碎片感知的频谱分配：在路径上所有可行的窗口中，选择占用后路径各链路
+    碎片化熵 + 利用率熵 增量之和最小的窗口（同分取最靠前）
+    所有候选窗口由 window_entropy_delta 一次向量化计算
+    Input / Output: 同 first_fit_spectrum_assignment；失败返回 -1
+    """
+    grid = spectrum_grid.grid_of(spectrum)
+    total_slots = grid.num_slots
+    if num_slots is None:  # 调用方已按路径算好 FSU 数时（如 ReachTable 查表）不再重复计算
+        path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
+        num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km, grid.slot_width_ghz)
+    if num_slots <= 0:
+        return -1
+
+    available_slots = path_available_slots(path, spectrum, total_slots)
+    feasible = feasible_window_starts(available_slots, num_slots, grid)
+    if not feasible.any():
+        return -1
+
+    links = [(path[i], path[i + 1]) for i in range(len(path) - 1)]
+    free = np.stack([spectrum[link] == 1 for link in links])
+    # 舍入消除浮点误差，使数值相同的窗口按起点先后决出
+    score = np.round(window_entropy_delta(free, num_slots), 12)
+    start_index = int(np.argmin(np.where(feasible, score, np.inf)))
+    for link in links:
+        spectrum[link][start_index:start_index + num_slots] = 0
+    return start_index
+
 # -------------------------------------------- Task 5 -------------------------------------------------
-def can_reuse_fsu(G, path, fsu_start, shared_spectrum, active_primary_paths):
+def can_reuse_fsu(G, path, fsu_start, shared_spectrum, active_primary_paths, flow=None):
     """
     检查是否可以复用某个 FSU
     Input:
@@ -192,6 +277,7 @@ def can_reuse_fsu(G, path, fsu_start, shared_spectrum, active_primary_paths):
         - num_slots: 该流量所需的 FSU 数量
         - shared_spectrum: 记录哪些 FSU 被哪些流量共享
         - active_primary_paths: 记录主路径流量的占用情况 {流量: [主路径上的链路]}
+        - flow: 当前流量在 active_primary_paths 中的键（None 时视为没有主路径记录）
 
     Output:
         - True: 可以复用
@@ -212,7 +298,7 @@ def can_reuse_fsu(G, path, fsu_start, shared_spectrum, active_primary_paths):
             # 检查主路径是否重叠（如果主路径冲突，则不能复用）
             if existing_flow in active_primary_paths:
                 existing_primary_links = set(active_primary_paths[existing_flow])
-                current_primary_links = set(active_primary_paths.get(path, []))  # 获取当前流量的主路径
+                current_primary_links = set(active_primary_paths.get(flow, []))  # 获取当前流量的主路径
                 if existing_primary_links & current_primary_links:  # 两个路径有交集
                     conflicting = True
                     break
@@ -223,33 +309,39 @@ def can_reuse_fsu(G, path, fsu_start, shared_spectrum, active_primary_paths):
     return True  # 没有冲突，可以复用
 
 
-def shared_fit_spectrum_assignment(G, path, demand, spectrum, shared_spectrum, active_primary_paths):
+def shared_fit_spectrum_assignment(G, path, demand, spectrum, shared_spectrum, active_primary_paths, flow=None):
     """
     共享保护的 Best-Fit 频谱分配算法
     Input:
         - G:              网络拓扑
         - path:           备用路径
         - demand:         需要分配的流量需求，单位：Gbps
-        - spectrum:       记录所有链路的FSU使用情况 {(u, v): np.ones(320) for u, v in G.edges()}
+        - spectrum:       记录所有链路的FSU使用情况 network.init_spectrum(G)
         - shared_spectrum: 记录备用路径上的FSU共享情况 {(u, v): {fsu_start: [流量1, 流量2]}}
         - active_primary_paths: 记录主路径流量的占用情况 {流量: [主路径上的链路]}
+        - flow:           当前流量的键（与 active_primary_paths / shared_spectrum 中记录的一致），默认为 demand
 
     Output:
         - i:              分配的FSU起始索引，失败返回 -1
     """
-    total_slots = 320
+    grid = spectrum_grid.grid_of(spectrum)
+    total_slots = grid.num_slots
     path_length_km = sum(G[path[i]][path[i + 1]]["weight"] for i in range(len(path) - 1))
 
     # 计算所需 FSU 数量和调制格式
-    num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km)
+    num_slots, modulation_used = modulation.compute_required_fsus(demand, path_length_km, grid.slot_width_ghz)
+
+    if flow is None:
+        flow = demand
 
     # 尝试复用共享 FSU
+    valid_starts = grid.valid_starts(num_slots)  # 不跨越波段边界的起点
     for i in range(total_slots - num_slots + 1):  # 遍历所有可能的 FSU 起点
-        if can_reuse_fsu(G, path, i, shared_spectrum, active_primary_paths):
+        if valid_starts[i] and can_reuse_fsu(G, path, i, shared_spectrum, active_primary_paths, flow):
             # 复用已有 FSU
             for j in range(len(path) - 1):
                 link = (path[j], path[j+1])
-                shared_spectrum[link][i].append(demand)  # 记录该 FSU 复用于当前流量
+                shared_spectrum[link][i].append(flow)  # 记录该 FSU 复用于当前流量
             return i  # 返回复用的 FSU 起始索引
 
     # 如果没有可复用的 FSU，则执行 Best Fit 方式
@@ -268,7 +360,7 @@ def shared_fit_spectrum_assignment(G, path, demand, spectrum, shared_spectrum, a
         for k in range(start_index, start_index + num_slots):
             if k not in shared_spectrum[link]:
                 shared_spectrum[link][k] = []
-            shared_spectrum[link][k].append(demand)  # 记录流量共享情况
+            shared_spectrum[link][k].append(flow)  # 记录流量共享情况
 
     return start_index  # 返回分配的起始 FSU 索引
 
@@ -0,0 +1,127 @@
+import numpy as np
+
+# 常用波段宽度 (GHz)
+BAND_WIDTH_GHZ = {
+    "C": 4000.0,   # 默认 C 波段：12.5 GHz 网格下为 320 个 FSU
+    "L": 4750.0,
+    "S": 6000.0,
+}
+
+
+class SpectrumGrid:
+    """
+    频谱网格配置：FSU 宽度 (GHz) 与按频率顺序排列的若干波段
+      - bands:          [(波段名, FSU 数), ...]，各波段在 FSU 索引上依次相连
+      - slot_width_ghz: 每个 FSU 的宽度
+    一条光路的 FSU 块不能跨越波段边界。
+    """
+
+    def __init__(self, bands=(("C", 320),), slot_width_ghz=12.5):
+        self.bands = [(str(name), int(slots)) for name, slots in bands]
+        self.slot_width_ghz = float(slot_width_ghz)
+        self.num_slots = sum(slots for _, slots in self.bands)
+        edges = np.cumsum([0] + [slots for _, slots in self.bands])
+        self.band_ranges = [(int(edges[i]), int(edges[i + 1])) for i in range(len(self.bands))]
+        self._valid_starts = {}
+
+    @classmethod
+    def from_bands(cls, band_names=("C",), slot_width_ghz=12.5):
+        """ 按波段名称构造网格，例如 from_bands(("C", "L"), 6.25) """
+        return cls([(name, int(round(BAND_WIDTH_GHZ[name] / slot_width_ghz))) for name in band_names],
+                   slot_width_ghz)
+
+    def valid_starts(self, width):
+        """
+        长度为 num_slots - width + 1 的布尔数组：起点 s 的 [s, s+width) 是否完整落在某个波段内
+        （结果按 width 缓存）
+        """
+        valid = self._valid_starts.get(width)
+        if valid is None:
+            valid = np.zeros(max(self.num_slots - width + 1, 0), dtype=bool)
+            for start, end in self.band_ranges:
+                if end - start >= width:
+                    valid[start:end - width + 1] = True
+            self._valid_starts[width] = valid
+        return valid
+
+    def free_runs(self, free_mask):
+        """
+        布尔掩码中的连续空闲块，在波段边界处切断
+        :return: (起点数组, 长度数组)，按起点升序
+        """
+        starts, lengths = [], []
+        for band_start, band_end in self.band_ranges:
+            padded = np.concatenate(([False], free_mask[band_start:band_end], [False])).astype(np.int8)
+            edges = np.diff(padded)
+            run_starts = np.flatnonzero(edges == 1)
+            starts.append(run_starts + band_start)
+            lengths.append(np.flatnonzero(edges == -1) - run_starts)
+        return np.concatenate(starts), np.concatenate(lengths)
+
+    def to_dict(self):
+        return {"bands": [list(b) for b in self.bands], "slot_width_ghz": self.slot_width_ghz}
+
+    def __eq__(self, other):
+        return isinstance(other, SpectrumGrid) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((tuple(self.bands), self.slot_width_ghz))
+
+    def __repr__(self):
+        bands = "+".join(f"{name}:{slots}" for name, slots in self.bands)
+        return f"SpectrumGrid({bands} @ {self.slot_width_ghz} GHz)"
+
+
+# 预置网格
+PRESETS = {
+    "C": SpectrumGrid.from_bands(("C",), 12.5),
+    "C+L": SpectrumGrid.from_bands(("C", "L"), 12.5),
+    "C-6.25": SpectrumGrid.from_bands(("C",), 6.25),
+    "C+L-6.25": SpectrumGrid.from_bands(("C", "L"), 6.25),
+}
+
+DEFAULT_GRID = PRESETS["C"]
+
+
+class SpectrumState(dict):
+    """
+    频谱状态：与原来的频谱字典 {(u, v): np.array} 完全兼容，额外携带 grid 配置，
+    所有算法和指标都从这里读取 FSU 数量、FSU 宽度和波段划分
+    """
+
+    def __init__(self, *args, grid=DEFAULT_GRID, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.grid = grid
+
+    def copy(self):
+        """ 浅拷贝（与 dict.copy 相同），保留 grid """
+        return SpectrumState(self, grid=self.grid)
+
+
+_implicit_grids = {}
+
+
+def make_grid(grid=None):
+    """ 把 None / FSU 数 / 预置名称 / SpectrumGrid 统一转换为 SpectrumGrid """
+    if grid is None:
+        return DEFAULT_GRID
+    if isinstance(grid, SpectrumGrid):
+        return grid
+    if isinstance(grid, str):
+        return PRESETS[grid]
+    return SpectrumGrid([("C", int(grid))])
+
+
+def grid_of(spectrum):
+    """
+    获取频谱状态的网格配置；对普通字典，按数组长度推断为 12.5 GHz 单波段网格
+    """
+    grid = getattr(spectrum, "grid", None)
+    if grid is not None:
+        return grid
+    num_slots = len(next(iter(spectrum.values()))) if spectrum else DEFAULT_GRID.num_slots
+    if num_slots == DEFAULT_GRID.num_slots:
+        return DEFAULT_GRID
+    if num_slots not in _implicit_grids:
+        _implicit_grids[num_slots] = SpectrumGrid([("C", num_slots)])
+    return _implicit_grids[num_slots]
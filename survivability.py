@@ -0,0 +1,305 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.sparse import csr_matrix, csc_matrix
+
+import network
+import routing
+import allocator
+import modulation
+import spectrum_assignment
+import spectrum_grid
+
+PROTECTION_SCHEMES = ("1+1", "shared")
+
+
+def fiber(link):
+    """ 有向链路 → 无向光纤（一次光纤中断同时影响两个方向） """
+    u, v = link
+    return (u, v) if u <= v else (v, u)
+
+
+# ----------------------------------------- 保护光路记录 -----------------------------------------
+def _shared_fit(G, path, sub_demand, spectrum, reserved, owners, primary_fibers, demand_id):
+    """
+    共享保护的备份频谱分配：优先复用已预留给备份的 FSU 窗口，要求窗口上已有的备份所保护的主路径
+    与当前主路径光纤不相交（单光纤故障时不会被同时激活），否则按 Best-Fit 新占用频谱
+    :param reserved: {link: bool 数组}，预留给备份的 FSU
+    :param owners:   {link: [(start, end, demand_id), ...]}，预留区间及其所属流量
+    :param primary_fibers: {demand_id: 主路径光纤集合}
+    :return: (起点, FSU 数)；失败返回 (-1, FSU 数)
+    """
+    grid = spectrum_grid.grid_of(spectrum)
+    length_km = allocator.path_length(G, path)
+    num_slots, _ = modulation.compute_required_fsus(sub_demand, length_km, grid.slot_width_ghz)
+    links = allocator.path_links(path)
+
+    pooled = np.logical_and.reduce([reserved[link] for link in links])
+    counts = np.concatenate(([0], np.cumsum(pooled)))
+    candidates = np.flatnonzero(((counts[num_slots:] - counts[:-num_slots]) == num_slots)
+                                & grid.valid_starts(num_slots)) if num_slots <= grid.num_slots else []
+    mine = primary_fibers[demand_id]
+    for start in candidates.tolist() if len(candidates) else []:
+        end = start + num_slots
+        sharers = {d for link in links for s, e, d in owners[link] if s < end and start < e}
+        if all(not (primary_fibers[d] & mine) for d in sharers):  # 包括本流量自己的其他子备份
+            for link in links:
+                owners[link].append((start, end, demand_id))
+            return start, num_slots
+
+    start = spectrum_assignment.best_fit_spectrum_assignment(G, path, sub_demand, spectrum)
+    if start == -1:
+        return -1, num_slots
+    for link in links:
+        reserved[link][start:start + num_slots] = True
+        owners[link].append((start, start + num_slots, demand_id))
+    return start, num_slots
+
+
+def build_protected(G, traffic_matrix, scheme="1+1", grid=None, k=5, selector="least_loaded", assigner="best_fit"):
+    """
+    与 Task4_1+1 / Task5_shared 相同的选路流程（least loaded + mod_aware 主路径，routing.find_backup_path 备份路径），
+    但把主用 / 备份光路分别记录下来，供故障分析使用
+    :param scheme: "1+1"（专用备份频谱）或 "shared"（主路径光纤不相交的备份共享频谱）
+    :return: (records, spectrum)
+             records: 光路字典列表，格式同 allocator.allocate_on_path，另含
+                      "demand_id"（在 traffic_matrix 中的下标）和 "role"（"primary" / "backup"）
+    """
+    if scheme not in PROTECTION_SCHEMES:
+        raise ValueError(f"unknown protection scheme {scheme!r}")
+    spectrum = network.init_spectrum(G, grid)
+    slot_width = spectrum.grid.slot_width_ghz
+    reserved = {link: np.zeros(spectrum.grid.num_slots, dtype=bool) for link in spectrum}
+    owners = {link: [] for link in spectrum}
+    primary_fibers = {}
+    path_cache = {}
+    records = []
+
+    for demand_id, (src, dst, demand) in enumerate(traffic_matrix):
+        paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        if not paths:
+            continue
+        primary_path = allocator.select_path(G, paths, spectrum, selector)
+        backup_path = routing.find_backup_path(G, paths, spectrum, primary_path)
+
+        lightpaths, _ = allocator.allocate_on_path(G, primary_path, src, dst, demand, spectrum, assigner)
+        for lightpath in lightpaths:
+            records.append(dict(lightpath, demand_id=demand_id, role="primary"))
+        primary_fibers[demand_id] = {fiber(link) for link in allocator.path_links(primary_path)}
+        if backup_path is None:
+            continue
+
+        if scheme == "1+1":
+            lightpaths, _ = allocator.allocate_on_path(G, backup_path, src, dst, demand, spectrum, assigner)
+        else:
+            length_km = allocator.path_length(G, backup_path)
+            lightpaths = []
+            for sub_demand in spectrum_assignment.split_traffic(demand, length_km):
+                start, num_slots = _shared_fit(G, backup_path, sub_demand, spectrum, reserved, owners,
+                                               primary_fibers, demand_id)
+                if start != -1:
+                    lightpaths.append({
+                        "src": src, "dst": dst, "demand": sub_demand, "path": list(backup_path),
+                        "modulation": modulation.compute_required_fsus(sub_demand, length_km, slot_width)[1],
+                        "start": int(start), "num_slots": int(num_slots),
+                    })
+        for lightpath in lightpaths:
+            records.append(dict(lightpath, demand_id=demand_id, role="backup"))
+    return records, spectrum
+
+
+# ----------------------------------------- 稀疏关联矩阵 -----------------------------------------
+def build_incidence(records, links, num_slots):
+    """
+    构造故障分析所需的稀疏矩阵
+    :param links: 有向链路列表（列顺序）
+    :return: dict
+             fiber_inc:   CSC (光路 × 光纤)，故障场景即列切片
+             link_inc:    CSR (光路 × 有向链路)，用于备份冲突检查
+             slot_mask:   CSR (光路 × FSU)，光路占用的 FSU
+             fibers:      光纤列表；demand_id / is_primary：每条光路的属性数组
+    """
+    link_index = {link: i for i, link in enumerate(links)}
+    fibers = sorted({fiber(link) for link in links})
+    fiber_index = {f: i for i, f in enumerate(fibers)}
+
+    link_rows, link_cols, fiber_rows, fiber_cols, slot_rows, slot_cols = [], [], [], [], [], []
+    for row, record in enumerate(records):
+        for link in allocator.path_links(record["path"]):
+            link_rows.append(row)
+            link_cols.append(link_index[link])
+            fiber_rows.append(row)
+            fiber_cols.append(fiber_index[fiber(link)])
+        slot_rows.extend([row] * record["num_slots"])
+        slot_cols.extend(range(record["start"], record["start"] + record["num_slots"]))
+
+    n = len(records)
+    ones = lambda rows: np.ones(len(rows), dtype=np.int32)
+    fiber_inc = csc_matrix((ones(fiber_rows), (fiber_rows, fiber_cols)), shape=(n, len(fibers)))
+    fiber_inc.data[:] = 1  # 同一光纤双向都经过时去重
+    return {
+        "fiber_inc": fiber_inc,
+        "link_inc": csr_matrix((ones(link_rows), (link_rows, link_cols)), shape=(n, len(links))),
+        "slot_mask": csr_matrix((ones(slot_rows), (slot_rows, slot_cols)), shape=(n, num_slots)),
+        "fibers": fibers,
+        "links": list(links),
+        "demand_id": np.array([r["demand_id"] for r in records], dtype=np.int64),
+        "is_primary": np.array([r["role"] == "primary" for r in records], dtype=bool),
+        "protected": _protected_demands(records),
+        "endpoints": [(r["src"], r["dst"]) for r in records],
+    }
+
+
+def _protected_demands(records):
+    """ 备份光路的总容量不小于主用光路总容量的流量编号（部分备份被阻塞的流量视为未保护） """
+    carried = {}
+    for record in records:
+        totals = carried.setdefault(record["demand_id"], [0.0, 0.0])
+        totals[record["role"] == "backup"] += record["demand"]
+    return np.array(sorted(d for d, (primary, backup) in carried.items() if backup >= primary - 1e-9),
+                    dtype=np.int64)
+
+
+def failure_scenarios(G, kind="link", srlgs=None):
+    """
+    故障场景列表 [(名称, 失效光纤列表)]
+    :param kind: "link"（每条光纤单独失效）、"node"（节点的所有光纤失效）或 "srlg"
+    :param srlgs: kind="srlg" 时的共享风险链路组 {名称: [(u, v), ...]}
+    """
+    if kind == "link":
+        return [(f"link {fiber((u, v))}", [fiber((u, v))]) for u, v in sorted(G.edges())]
+    if kind == "node":
+        return [(f"node {n}", [fiber((n, v)) for v in G.neighbors(n)]) for n in sorted(G.nodes())]
+    if kind == "srlg":
+        return [(str(name), [fiber(link) for link in group]) for name, group in (srlgs or {}).items()]
+    raise ValueError(f"unknown failure kind {kind!r}")
+
+
+# ----------------------------------------- 故障分析 -----------------------------------------
+def analyze_scenario(data, failed_fibers, failed_nodes=()):
+    """
+    分析一个故障场景：
+      1. 受影响的主用光路 = 关联矩阵中失效光纤列的切片里有非零元的行
+      2. 其所属流量的备份光路必须不经过失效光纤
+      3. 被同时激活的备份之间不能在同一有向链路的同一 FSU 上冲突：
+         占用计数 = link_inc[A].T @ slot_mask[A]，计数 > 1 即冲突
+    源 / 目的节点本身失效的流量无法保护，单独计数，不算作丢失。
+    :return: 场景结果字典
+    """
+    fiber_index = {f: i for i, f in enumerate(data["fibers"])}
+    cols = [fiber_index[f] for f in failed_fibers if f in fiber_index]
+    hit = np.asarray(data["fiber_inc"][:, cols].sum(axis=1)).ravel() > 0 if cols else \
+        np.zeros(len(data["demand_id"]), dtype=bool)
+
+    demand_id, is_primary = data["demand_id"], data["is_primary"]
+    affected = np.unique(demand_id[hit & is_primary])
+    if failed_nodes:
+        ends = np.array([s in failed_nodes or d in failed_nodes for s, d in data["endpoints"]], dtype=bool)
+        terminated = np.unique(demand_id[ends])
+        affected = np.setdiff1d(affected, terminated)
+    else:
+        terminated = np.zeros(0, dtype=np.int64)
+
+    has_backup = np.isin(affected, data["protected"])
+    backup_rows = np.flatnonzero(~is_primary & np.isin(demand_id, affected[has_backup]))
+    broken = np.unique(demand_id[backup_rows[hit[backup_rows]]])
+    active = backup_rows[~np.isin(demand_id[backup_rows], broken)]
+
+    colliding = np.zeros(0, dtype=np.int64)
+    collision_cells = 0
+    if len(active) > 1:
+        links_a, slots_a = data["link_inc"][active], data["slot_mask"][active]
+        usage = (links_a.T @ slots_a).tocoo()
+        over = usage.data > 1
+        collision_cells = int(np.sum(over))
+        if collision_cells:
+            rows = set()
+            for link, slot in zip(usage.row[over].tolist(), usage.col[over].tolist()):
+                on_both = links_a[:, link].multiply(slots_a[:, slot]).tocoo().row
+                rows.update(active[on_both].tolist())
+            colliding = np.unique(demand_id[sorted(rows)])
+
+    lost = np.union1d(np.union1d(affected[~has_backup], broken), colliding)
+    return {
+        "affected_demands": int(len(affected)),
+        "recovered": int(len(affected) - len(lost)),
+        "lost": int(len(lost)),
+        "unprotected": int(np.sum(~has_backup)),
+        "broken_backups": int(len(broken)),
+        "colliding_demands": int(len(colliding)),
+        "collision_cells": collision_cells,
+        "terminated": int(len(terminated)),
+    }
+
+
+_worker_data = None
+
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+
+def _analyze_chunk(chunk):
+    return [(name, analyze_scenario(_worker_data, fibers, nodes)) for name, fibers, nodes in chunk]
+
+
+def analyze(G, records, spectrum, kind="link", srlgs=None, workers=1, chunk_size=64):
+    """
+    对所有故障场景做生存性分析；workers > 1 时把场景分块分发到进程池（关联矩阵每个进程只传一次）
+    :return: [(场景名称, 结果字典)]，顺序与 failure_scenarios 一致
+    """
+    data = build_incidence(records, list(spectrum.keys()), spectrum_grid.grid_of(spectrum).num_slots)
+    scenarios = [(name, fibers, (int(name.split()[1]),) if kind == "node" else ())
+                 for name, fibers in failure_scenarios(G, kind, srlgs)]
+    if workers <= 1 or len(scenarios) <= chunk_size:
+        return [(name, analyze_scenario(data, fibers, nodes)) for name, fibers, nodes in scenarios]
+
+    chunks = [scenarios[i:i + chunk_size] for i in range(0, len(scenarios), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as pool:
+        return [item for part in pool.map(_analyze_chunk, chunks) for item in part]
+
+
+def summarize(outcomes):
+    """ 汇总所有场景：最坏场景与总体恢复比例 """
+    affected = sum(r["affected_demands"] for _, r in outcomes)
+    recovered = sum(r["recovered"] for _, r in outcomes)
+    worst = max(outcomes, key=lambda item: item[1]["lost"], default=(None, {"lost": 0}))
+    return {
+        "scenarios": len(outcomes),
+        "affected_demands": affected,
+        "recovered_fraction": recovered / affected if affected else 1.0,
+        "scenarios_with_loss": sum(1 for _, r in outcomes if r["lost"]),
+        "scenarios_with_collision": sum(1 for _, r in outcomes if r["collision_cells"]),
+        "worst_scenario": worst[0],
+        "worst_lost": worst[1]["lost"],
+    }
+
+
+def run_survivability(topology_file, traffic_file, scheme="1+1", kind="link", grid=None, workers=1):
+    """ 构建保护光路并分析所有故障场景，返回 (outcomes, summary, records, spectrum) """
+    G = network.load_topology(topology_file)
+    traffic_matrix = network.load_traffic(traffic_file)
+    records, spectrum = build_protected(G, traffic_matrix, scheme, grid)
+    outcomes = analyze(G, records, spectrum, kind, workers=workers)
+    return outcomes, summarize(outcomes), records, spectrum
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Survivability analysis of protected allocations")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", default="Germany-7nodes/G7-matrix-5.txt")
+    parser.add_argument("--scheme", default="1+1", choices=PROTECTION_SCHEMES)
+    parser.add_argument("--kind", default="link", choices=("link", "node"))
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    outcomes, summary, records, spectrum = run_survivability(args.topology, args.traffic, args.scheme,
+                                                             args.kind, workers=args.workers)
+    print(f"{'scenario':<16} {'affected':>8} {'recovered':>9} {'lost':>5} {'unprot':>6} {'broken':>6} "
+          f"{'collide':>7} {'ends':>5}")
+    for name, r in outcomes:
+        print(f"{name:<16} {r['affected_demands']:>8} {r['recovered']:>9} {r['lost']:>5} {r['unprotected']:>6} "
+              f"{r['broken_backups']:>6} {r['colliding_demands']:>7} {r['terminated']:>5}")
+    print(f"\n📊 {summary}")
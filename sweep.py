@@ -0,0 +1,177 @@
+import argparse
+import csv
+import importlib
+import itertools
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import network
+import metrics
+import allocator
+import reach_tables
+import run_cache
+
+# 默认网格：2 个拓扑 × 5 个负载等级 × 5 种选路（含固定最短路） × 4 种频谱分配 = 200 个单元
+DEFAULT_GRID = {
+    "scenario": [("Germany-7nodes/G7-topology.txt", f"Germany-7nodes/G7-matrix-{i}.txt") for i in range(1, 6)]
+                + [("Italian-10nodes/IT10-topology.txt", f"Italian-10nodes/IT10-matrix-{i}.txt") for i in range(1, 6)],
+    "selector": ["fixed"] + sorted(allocator.PATH_SELECTORS),
+    "assigner": sorted(allocator.SPECTRUM_ASSIGNERS),
+    "k": [5],
+    "grid": ["C"],
+    "order": ["desc"],
+}
+
+# 需求排序方式
+ORDERS = {
+    "desc": lambda traffic: sorted(traffic, key=lambda x: x[2], reverse=True),  # network.load_traffic 的默认顺序
+    "asc": lambda traffic: sorted(traffic, key=lambda x: x[2]),
+    "pair": lambda traffic: sorted(traffic, key=lambda x: (x[0], x[1])),
+}
+
+
+# 其他仿真模式 → 提供 run_rmsa(topology_file, traffic_file, grid=...) 的模块（用到时才导入）
+RUNNER_MODULES = {
+    "fs": "fs_main",
+    "ks": "ks_main",
+    "task4": "Task4_1+1",
+    "task5": "Task5_shared",
+    "joint": "joint_rsa",
+    "batch": "batch_planner",
+}
+MODES = ("two_stage",) + tuple(RUNNER_MODULES)
+
+
+def expand_grid(spec):
+    """
+    把 {参数: [取值, ...]} 展开为单元列表；"scenario" 为 (拓扑文件, 流量文件) 对
+    """
+    names = list(spec)
+    cells = []
+    for values in itertools.product(*(spec[name] for name in names)):
+        cell = dict(zip(names, values))
+        topology, traffic = cell.pop("scenario")
+        cells.append({"topology": topology, "traffic": traffic, **cell})
+    return cells
+
+
+def cell_config(cell):
+    """ 参与缓存键的策略配置（不含文件路径，文件按内容哈希） """
+    return {name: value for name, value in cell.items() if name not in ("topology", "traffic")}
+
+
+def simulate(cell):
+    """
+    运行一个单元。mode="two_stage"（默认）为两阶段 RMSA（selector="fixed" 时只用最短路，等价于 fs_main 的流程）；
+    其他 mode 调用对应 runner 的 run_rmsa（不记录事件日志）
+    :return: (spectrum, 指标记录字典)
+    """
+    mode = cell.get("mode", "two_stage")
+    if mode != "two_stage":
+        runner = importlib.import_module(RUNNER_MODULES[mode])
+        results, spectrum = runner.run_rmsa(cell["topology"], cell["traffic"], grid=cell.get("grid"))
+        record = metrics.report(spectrum).summary()
+        record.update({"lightpaths": sum(len(r[5]) for r in results), "blocked": None})
+        return spectrum, record
+
+    G = network.load_topology(cell["topology"])
+    traffic_matrix = ORDERS[cell.get("order", "desc")](network.load_traffic(cell["traffic"]))
+    spectrum = network.init_spectrum(G, cell.get("grid"))
+    fixed = cell["selector"] == "fixed"
+    k = 1 if fixed else cell.get("k", 5)
+    selector = "least_loaded" if fixed else cell["selector"]
+    path_cache = {}
+    reach = reach_tables.ReachTable(G, spectrum.grid)
+    blocked = 0
+    lightpaths = 0
+    for src, dst, demand in traffic_matrix:
+        paths = allocator.get_candidate_paths(G, src, dst, path_cache, k)
+        allocated, failed = allocator.allocate_demand(G, paths, src, dst, demand, spectrum, selector,
+                                                      cell["assigner"], use_mod_aware=not fixed, reach=reach)
+        lightpaths += len(allocated)
+        blocked += len(failed)
+    record = metrics.report(spectrum).summary()
+    record.update({"lightpaths": lightpaths, "blocked": blocked})
+    return spectrum, record
+
+
+def run_cell(cell, cache=None):
+    """ 先查缓存，未命中时仿真并写入缓存；返回结果行（单元配置 + 指标 + cached / seconds） """
+    t0 = time.perf_counter()
+    key = run_cache.cache_key(cell["topology"], cell["traffic"], cell_config(cell)) if cache else None
+    record = cache.get(key) if cache else None
+    cached = record is not None
+    if not cached:
+        spectrum, record = simulate(cell)
+        if cache:
+            cache.put(key, spectrum, record)
+    return {**cell, **record, "cached": cached, "seconds": time.perf_counter() - t0}
+
+
+def _run_cell_worker(args):
+    cell, cache_dir, max_bytes = args
+    return run_cell(cell, run_cache.RunCache(cache_dir, max_bytes) if cache_dir else None)
+
+
+def run_sweep(cells, cache_dir=".rmsa_cache", max_bytes=512 * 1024 * 1024, workers=1):
+    """
+    运行整个网格；cache_dir=None 时不使用缓存。workers > 1 时单元分发到进程池（各进程共享同一缓存目录）
+    :return: 结果行列表，顺序与 cells 一致
+    """
+    if workers <= 1:
+        cache = run_cache.RunCache(cache_dir, max_bytes) if cache_dir else None
+        return [run_cell(cell, cache) for cell in cells]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_cell_worker, [(cell, cache_dir, max_bytes) for cell in cells]))
+
+
+def write_csv(rows, out):
+    if not rows:
+        return
+    writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def smoke_modes(topology="Germany-7nodes/G7-topology.txt", traffic="Germany-7nodes/G7-matrix-1.txt"):
+    """ 冒烟测试：每种仿真模式 (MODES) 各运行一次，返回 [(mode, 错误或 None, 指标记录)] """
+    import rmsa_cli
+    outcomes = []
+    for mode in MODES:
+        cell = {"topology": rmsa_cli.resolve_path(topology), "traffic": rmsa_cli.resolve_path(traffic),
+                "mode": mode, "selector": "least_loaded", "assigner": "best_fit", "k": 5, "grid": "C"}
+        try:
+            outcomes.append((mode, None, simulate(cell)[1]))
+        except Exception as e:
+            outcomes.append((mode, f"{type(e).__name__}: {e}", None))
+    return outcomes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a strategy / load grid with a result cache")
+    parser.add_argument("--cache-dir", default=".rmsa_cache")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--max-cache-mb", type=float, default=512)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--out", default=None, help="结果 CSV 路径（默认输出到标准输出）")
+    parser.add_argument("--smoke", action="store_true", help="只把每种仿真模式各运行一次，检查能否正常完成")
+    args = parser.parse_args()
+
+    if args.smoke:
+        failed = 0
+        for mode, error, record in smoke_modes():
+            failed += error is not None
+            print(f"{mode:<10} " + (f"FAILED {error}" if error else f"ok  {record['total_used_fsus']} FSUs"))
+        sys.exit(1 if failed else 0)
+
+    t0 = time.perf_counter()
+    rows = run_sweep(expand_grid(DEFAULT_GRID), None if args.no_cache else args.cache_dir,
+                     int(args.max_cache_mb * 1024 * 1024), args.workers)
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            write_csv(rows, f)
+    else:
+        write_csv(rows, sys.stdout)
+    hits = sum(row["cached"] for row in rows)
+    print(f"⏱️ {len(rows)} 个单元，缓存命中 {hits}，总耗时 {time.perf_counter() - t0:.2f} s", file=sys.stderr)
@@ -0,0 +1,285 @@
+"""
+分片执行的参数扫描：基于共享文件系统的任务队列，不依赖任何外部服务
+    python sweep_queue.py split  QUEUE_DIR [--config cfg.toml] [--shard-size 10]
+    python sweep_queue.py work   QUEUE_DIR [--cache-dir .rmsa_cache]     # 可在多台机器上同时运行
+    python sweep_queue.py local  QUEUE_DIR --workers 4                   # 本机启动多个独立的 worker 进程
+    python sweep_queue.py status QUEUE_DIR
+    python sweep_queue.py merge  QUEUE_DIR --out results.csv
+队列目录结构：
+    manifest.json                    网格说明（单元总数、分片数）
+    pending/shard-00000.json         待处理的分片（单元列表）
+    claimed/shard-00000.json@<id>    已被 worker <id> 领取；worker 每完成一个单元更新一次修改时间（心跳）
+    done/shard-00000.json            分片的结果行
+    failed/shard-00000.json          出错的分片及错误信息
+领取通过 os.rename(pending → claimed) 完成：同一文件系统上 rename 是原子的，只有一个 worker 能成功。
+所有文件都先写临时文件再 os.replace，读到的文件总是完整的。
+"""
+import argparse
+import glob
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import traceback
+
+import rmsa_cli
+import sweep
+
+SUBDIRS = ("pending", "claimed", "done", "failed")
+
+
+def _write_json(path, data):
+    """ 原子写入：先写同目录下的临时文件再替换 """
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# ----------------------------------------- 拆分 -----------------------------------------
+def split(cells, queue_dir, shard_size=10):
+    """
+    把单元列表拆成分片写入 pending/；每个单元记录它在网格中的序号 "cell"，合并时按序号还原顺序
+    :return: 分片数
+    """
+    for sub in SUBDIRS:
+        os.makedirs(os.path.join(queue_dir, sub), exist_ok=True)
+    if glob.glob(os.path.join(queue_dir, "*", "shard-*")):
+        raise FileExistsError(f"queue {queue_dir} is not empty")
+
+    shards = [cells[i:i + shard_size] for i in range(0, len(cells), shard_size)]
+    for n, shard in enumerate(shards):
+        payload = [{"cell": n * shard_size + i, **cell} for i, cell in enumerate(shard)]
+        _write_json(os.path.join(queue_dir, "pending", f"shard-{n:05d}.json"), payload)
+    _write_json(os.path.join(queue_dir, "manifest.json"),
+                {"cells": len(cells), "shards": len(shards), "shard_size": shard_size, "created": time.time()})
+    return len(shards)
+
+
+# ----------------------------------------- 领取与执行 -----------------------------------------
+def claim(queue_dir, worker_id):
+    """
+    领取一个待处理的分片（按名称顺序尝试，rename 失败说明已被其他 worker 领取）
+    :return: (分片名, claimed 文件路径)；没有待处理分片时返回 None
+    """
+    for path in sorted(glob.glob(os.path.join(queue_dir, "pending", "shard-*.json"))):
+        name = os.path.basename(path)
+        target = os.path.join(queue_dir, "claimed", f"{name}@{worker_id}")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        return name, target
+    return None
+
+
+class ClaimLost(Exception):
+    """ 已领取的分片被收回（心跳超时后由 requeue_stale 放回 pending/），当前 worker 应放弃该分片 """
+
+
+def run_shard(cells, claimed_path, cache=None):
+    """
+    逐个运行分片中的单元，每完成一个单元更新 claimed 文件的修改时间作为心跳
+    :raises ClaimLost: claimed 文件已不存在
+    """
+    rows = []
+    for cell in cells:
+        index = cell["cell"]
+        spec = {key: value for key, value in cell.items() if key != "cell"}
+        # 分片中保存相对路径，各机器在自己的当前目录 / 仓库目录中查找（挂载点可以不同）
+        spec["topology"] = rmsa_cli.resolve_path(spec["topology"])
+        spec["traffic"] = rmsa_cli.resolve_path(spec["traffic"])
+        row = sweep.run_cell(spec, cache)
+        row.update({"cell": index, "topology": cell["topology"], "traffic": cell["traffic"]})
+        rows.append(row)
+        try:
+            os.utime(claimed_path)
+        except FileNotFoundError:
+            raise ClaimLost(claimed_path) from None
+    return rows
+
+
+def work(queue_dir, worker_id=None, cache_dir=None, max_bytes=512 * 1024 * 1024, max_shards=None):
+    """
+    worker 主循环：不断领取分片、运行、写出结果，直到队列为空（或处理了 max_shards 个分片）。
+    分片在运行期间被收回（见 requeue_stale）时直接放弃，不写 done/ 或 failed/，由重新领取它的 worker 完成
+    :return: 本 worker 完成的分片数
+    """
+    import run_cache
+    worker_id = worker_id or default_worker_id()
+    cache = run_cache.RunCache(cache_dir, max_bytes) if cache_dir else None
+    completed = 0
+    while max_shards is None or completed < max_shards:
+        claimed = claim(queue_dir, worker_id)
+        if claimed is None:
+            break
+        name, claimed_path = claimed
+        try:
+            cells = _read_json(claimed_path)
+        except FileNotFoundError:
+            continue  # 领取后立即被收回
+        try:
+            rows = run_shard(cells, claimed_path, cache)
+            for row in rows:
+                row["worker"] = worker_id
+            _write_json(os.path.join(queue_dir, "done", name), rows)
+        except ClaimLost:
+            continue
+        except Exception:
+            _write_json(os.path.join(queue_dir, "failed", name),
+                        {"worker": worker_id, "cells": cells, "error": traceback.format_exc()})
+        try:
+            os.remove(claimed_path)
+        except FileNotFoundError:
+            pass  # 最后一次心跳之后被收回，结果已写出，重新运行得到相同的结果
+        completed += 1
+    return completed
+
+
+def requeue_stale(queue_dir, timeout=600.0):
+    """
+    把心跳超过 timeout 秒的已领取分片放回 pending/（worker 崩溃或机器离线时使用）
+    :return: 放回的分片名列表
+    """
+    now = time.time()
+    requeued = []
+    for path in glob.glob(os.path.join(queue_dir, "claimed", "shard-*.json@*")):
+        try:
+            if now - os.stat(path).st_mtime < timeout:
+                continue
+            name = os.path.basename(path).split("@", 1)[0]
+            os.rename(path, os.path.join(queue_dir, "pending", name))
+        except FileNotFoundError:
+            continue  # 刚好完成或已被其他进程放回
+        requeued.append(name)
+    return requeued
+
+
+def requeue_failed(queue_dir):
+    """ 把出错的分片放回 pending/ 重新运行 """
+    names = []
+    for path in sorted(glob.glob(os.path.join(queue_dir, "failed", "shard-*.json"))):
+        name = os.path.basename(path)
+        _write_json(os.path.join(queue_dir, "pending", name), _read_json(path)["cells"])
+        os.remove(path)
+        names.append(name)
+    return names
+
+
+# ----------------------------------------- 状态与合并 -----------------------------------------
+def status(queue_dir):
+    """ {manifest, pending, claimed, done, failed, workers} """
+    counts = {sub: len(glob.glob(os.path.join(queue_dir, sub, "shard-*.json*"))) for sub in SUBDIRS}
+    workers = sorted({os.path.basename(p).split("@", 1)[1]
+                      for p in glob.glob(os.path.join(queue_dir, "claimed", "shard-*.json@*"))})
+    return {"manifest": _read_json(os.path.join(queue_dir, "manifest.json")), **counts, "workers": workers}
+
+
+def merge(queue_dir, allow_partial=False):
+    """
+    合并所有已完成分片的结果行，按单元序号排序
+    :param allow_partial: False 时若有单元缺失则抛出 RuntimeError
+    :return: (rows, missing)，missing 为缺失的单元序号列表
+    """
+    rows = []
+    for path in sorted(glob.glob(os.path.join(queue_dir, "done", "shard-*.json"))):
+        rows.extend(_read_json(path))
+    rows.sort(key=lambda row: row["cell"])
+    total = _read_json(os.path.join(queue_dir, "manifest.json"))["cells"]
+    present = {row["cell"] for row in rows}
+    missing = [i for i in range(total) if i not in present]
+    if missing and not allow_partial:
+        raise RuntimeError(f"{len(missing)} of {total} cells have no results yet (first: {missing[:10]})")
+    return rows, missing
+
+
+def run_local(queue_dir, workers, cache_dir=None):
+    """ 在本机启动 workers 个独立的 worker 进程（与其他机器上的 worker 完全相同），等待全部结束 """
+    command = [sys.executable, os.path.abspath(__file__), "work", queue_dir]
+    if cache_dir:
+        command += ["--cache-dir", cache_dir]
+    processes = [subprocess.Popen(command + ["--worker-id", f"{default_worker_id()}-{i}"]) for i in range(workers)]
+    return [process.wait() for process in processes]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Sharded sweep over a shared-filesystem work queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("split", help="把网格拆分为分片任务文件")
+    p.add_argument("queue_dir")
+    p.add_argument("--config", default=None, help="TOML / JSON 配置，使用其中的 [sweep.grid]；默认 sweep.DEFAULT_GRID")
+    p.add_argument("--shard-size", type=int, default=10)
+
+    for name, help_text in (("work", "领取并运行分片，直到队列为空"), ("local", "在本机启动多个 worker 进程")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("queue_dir")
+        p.add_argument("--cache-dir", default=None)
+        if name == "work":
+            p.add_argument("--worker-id", default=None)
+            p.add_argument("--max-shards", type=int, default=None)
+        else:
+            p.add_argument("--workers", type=int, default=os.cpu_count())
+
+    p = sub.add_parser("status", help="查看队列状态")
+    p.add_argument("queue_dir")
+
+    p = sub.add_parser("requeue", help="放回超时未心跳的分片（以及出错的分片）")
+    p.add_argument("queue_dir")
+    p.add_argument("--timeout", type=float, default=600.0)
+    p.add_argument("--failed", action="store_true")
+
+    p = sub.add_parser("merge", help="合并所有分片的结果")
+    p.add_argument("queue_dir")
+    p.add_argument("--out", default=None, help="结果 CSV 路径（默认输出到标准输出）")
+    p.add_argument("--allow-partial", action="store_true")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "split":
+        spec = dict(sweep.DEFAULT_GRID)
+        if args.config:
+            spec.update(rmsa_cli.load_config(args.config).get("sweep", {}).get("grid", {}))
+            spec["scenario"] = [tuple(pair) for pair in spec["scenario"]]
+        cells = sweep.expand_grid(spec)
+        print(f"{len(cells)} cells → {split(cells, args.queue_dir, args.shard_size)} shards")
+    elif args.command == "work":
+        done = work(args.queue_dir, args.worker_id, args.cache_dir, max_shards=args.max_shards)
+        print(f"{args.worker_id or default_worker_id()}: {done} shards", file=sys.stderr)
+    elif args.command == "local":
+        codes = run_local(args.queue_dir, args.workers, args.cache_dir)
+        print(json.dumps(status(args.queue_dir)))
+        if any(codes):
+            raise SystemExit(1)
+    elif args.command == "status":
+        print(json.dumps(status(args.queue_dir), indent=2))
+    elif args.command == "requeue":
+        names = requeue_stale(args.queue_dir, args.timeout)
+        if args.failed:
+            names += requeue_failed(args.queue_dir)
+        print(f"requeued {len(names)} shards")
+    elif args.command == "merge":
+        rows, missing = merge(args.queue_dir, args.allow_partial)
+        if args.out:
+            with open(args.out, "w", newline="") as f:
+                sweep.write_csv(rows, f)
+        else:
+            sweep.write_csv(rows, sys.stdout)
+        print(f"{len(rows)} rows, {len(missing)} missing", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
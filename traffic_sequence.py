@@ -0,0 +1,204 @@
+import argparse
+import glob
+import os
+import re
+import time
+
+import numpy as np
+import network
+import metrics
+import allocator
+
+
+def matrix_files(sources):
+    """
+    流量矩阵序列：sources 为文件列表，或单个目录（取其中的 *-matrix-N.txt，按 N 排序）
+    """
+    if isinstance(sources, str):
+        sources = [sources]
+    if len(sources) == 1 and os.path.isdir(sources[0]):
+        files = glob.glob(os.path.join(sources[0], "*-matrix-*.txt"))
+        return sorted(files, key=lambda f: int(re.search(r"-matrix-(\d+)\.txt$", f).group(1)))
+    return list(sources)
+
+
+class TrafficSequencePlanner:
+    """
+    时变流量矩阵的增量规划：频谱状态、候选路径缓存和每个节点对的光路在各时段之间保留，
+    每个时段只处理流量发生变化的节点对：
+      - 流量减少：按后建先拆 (LIFO) 释放该节点对的光路，直到承载量不超过新的流量，不足部分再补分配
+      - 流量增加：只分配新流量与当前承载量之差
+      - 流量不变：不做任何处理（即使之前有阻塞也不重试）
+    逐节点对的变化量由矩阵相减一次得到，每个时段的开销与变化的节点对数成正比，与总流量无关。
+      - offered:     上一时段的流量矩阵 (Gbps)
+      - carried:     各节点对当前由光路承载的流量 (Gbps)
+      - connections: {(src, dst): [lightpath, ...]}，按建立顺序排列
+    """
+
+    def __init__(self, G, spectrum, selector="least_loaded", assigner="best_fit", k=5, use_mod_aware=True,
+                 log=None):
+        self.G = G
+        self.spectrum = spectrum
+        self.selector = selector
+        self.assigner = assigner
+        self.k = k
+        self.use_mod_aware = use_mod_aware
+        self.log = log  # 可选的 event_log.EventLog
+        self.path_cache = {}
+        self.connections = {}
+        self.offered = None
+        self.carried = None
+
+    def _release_to(self, pair, target):
+        """ 后建先拆，直到该节点对的承载量不超过 target，返回 (释放的光路数, 释放的流量) """
+        lightpaths = self.connections.get(pair, [])
+        released, released_gbps = 0, 0.0
+        i, j = pair[0] - 1, pair[1] - 1
+        while lightpaths and self.carried[i, j] > target + 1e-9:
+            lightpath = lightpaths.pop()
+            allocator.release_lightpath(self.spectrum, lightpath, log=self.log)
+            self.carried[i, j] -= lightpath["demand"]
+            released += 1
+            released_gbps += lightpath["demand"]
+        return released, released_gbps
+
+    def _allocate(self, pair, demand):
+        """ 为节点对追加 demand Gbps，返回 (新光路数, 新承载流量, 阻塞的子流量数) """
+        src, dst = pair
+        paths = allocator.get_candidate_paths(self.G, src, dst, self.path_cache, self.k)
+        lightpaths, failed = allocator.allocate_demand(self.G, paths, src, dst, demand, self.spectrum, self.selector,
+                                                       self.assigner, self.use_mod_aware, log=self.log)
+        self.connections.setdefault(pair, []).extend(lightpaths)
+        added = sum(lp["demand"] for lp in lightpaths)
+        self.carried[src - 1, dst - 1] += added
+        return len(lightpaths), added, len(failed)
+
+    def step(self, matrix):
+        """
+        处理一个时段的流量矩阵（单位 10 Gbps，与 network.load_traffic 相同）
+        :return: 时段记录 {offered_gbps, changed_pairs, increased_pairs, decreased_pairs,
+                 released_lightpaths, released_gbps, new_lightpaths, added_gbps, blocked, carried_gbps, seconds}
+        """
+        t0 = time.perf_counter()
+        target = 10.0 * np.asarray(matrix, dtype=float)
+        np.fill_diagonal(target, 0.0)
+        if self.offered is None:
+            self.offered = np.zeros_like(target)
+            self.carried = np.zeros_like(target)
+
+        # 逐节点对的变化量（向量化），只有变化的节点对进入下面的循环
+        delta = target - self.offered
+        rows, cols = np.nonzero(delta)
+        decreased = delta[rows, cols] < 0
+        self.offered = target
+
+        released = released_gbps = 0
+        new_lightpaths, added_gbps, blocked = 0, 0.0, 0
+        # 先释放（腾出频谱），再按需求从大到小分配
+        pending = []
+        for i, j in zip(rows.tolist(), cols.tolist()):
+            pair = (i + 1, j + 1)
+            if delta[i, j] < 0:
+                n, gbps = self._release_to(pair, target[i, j])
+                released += n
+                released_gbps += gbps
+            need = target[i, j] - self.carried[i, j]
+            if need > 1e-9:
+                pending.append((need, pair))
+        for need, pair in sorted(pending, key=lambda x: x[0], reverse=True):
+            n, gbps, failed = self._allocate(pair, need)
+            new_lightpaths += n
+            added_gbps += gbps
+            blocked += failed
+
+        return {
+            "offered_gbps": float(target.sum()),
+            "changed_pairs": int(len(rows)),
+            "increased_pairs": int((~decreased).sum()),
+            "decreased_pairs": int(decreased.sum()),
+            "released_lightpaths": released,
+            "released_gbps": float(released_gbps),
+            "new_lightpaths": new_lightpaths,
+            "added_gbps": float(added_gbps),
+            "blocked": blocked,
+            "carried_gbps": float(self.carried.sum()),
+            "seconds": time.perf_counter() - t0,
+        }
+
+
+def run_sequence(topology_file, sources, selector="least_loaded", assigner="best_fit", k=5, grid=None,
+                 use_mod_aware=True, with_report=True, log=None):
+    """
+    依次处理流量矩阵序列
+    :param sources: 流量矩阵文件列表，或包含 *-matrix-N.txt 的目录
+    :param with_report: 每个时段结束后记录 metrics.report 快照（不计入该时段的 seconds）
+    :return: (intervals, planner)；intervals 每个时段一条 step 记录，附加 traffic_file 和 report
+    """
+    G = network.load_topology(topology_file)
+    planner = TrafficSequencePlanner(G, network.init_spectrum(G, grid), selector, assigner, k, use_mod_aware, log)
+    intervals = []
+    for traffic_file in matrix_files(sources):
+        record = planner.step(np.loadtxt(traffic_file, dtype=int))
+        record["traffic_file"] = traffic_file
+        record["report"] = metrics.report(planner.spectrum) if with_report else None
+        intervals.append(record)
+    return intervals, planner
+
+
+def format_intervals(intervals):
+    """ 每个时段一行：流量变化、释放 / 新建光路、阻塞与频谱指标 """
+    header = f"{'interval':<32} {'offered':>8} {'changed':>7} {'-LPs':>5} {'+LPs':>5} {'blocked':>7} " \
+             f"{'carried':>8} {'FSUs':>6} {'frag H':>7} {'ms':>7}"
+    lines = [header, "-" * len(header)]
+    for record in intervals:
+        report = record["report"]
+        fsus = f"{report.total_used_fsus:>6}" if report is not None else f"{'-':>6}"
+        frag = f"{report.max_fragmentation_entropy:>7.4f}" if report is not None else f"{'-':>7}"
+        lines.append(f"{os.path.basename(record['traffic_file']):<32} {record['offered_gbps']:>8.0f} "
+                     f"{record['changed_pairs']:>7} {record['released_lightpaths']:>5} {record['new_lightpaths']:>5} "
+                     f"{record['blocked']:>7} {record['carried_gbps']:>8.0f} {fsus} {frag} "
+                     f"{1000 * record['seconds']:>7.1f}")
+    return "\n".join(lines)
+
+
+def random_sequence(base, intervals, churn=0.1, max_change=3, seed=0):
+    """
+    合成时变流量：每个时段随机选取 churn 比例的节点对，流量在 [-max_change, +max_change] 内变化（不小于 0）
+    :param base: 初始流量矩阵（单位 10 Gbps）
+    :return: 矩阵列表（含 base）
+    """
+    rng = np.random.default_rng(seed)
+    matrices = [np.array(base, dtype=int)]
+    off_diagonal = ~np.eye(len(base), dtype=bool)
+    for _ in range(intervals - 1):
+        current = matrices[-1].copy()
+        pick = (rng.random(current.shape) < churn) & off_diagonal
+        current[pick] = np.maximum(current[pick] + rng.integers(-max_change, max_change + 1, pick.sum()), 0)
+        matrices.append(current)
+    return matrices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental planning over a sequence of traffic matrices")
+    parser.add_argument("--topology", default="Germany-7nodes/G7-topology.txt")
+    parser.add_argument("--traffic", nargs="+", default=["Germany-7nodes"],
+                        help="按时间顺序排列的流量矩阵文件，或包含 *-matrix-N.txt 的目录")
+    parser.add_argument("--selector", default="least_loaded", choices=sorted(allocator.PATH_SELECTORS))
+    parser.add_argument("--assigner", default="best_fit", choices=sorted(allocator.SPECTRUM_ASSIGNERS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--grid", default=None, help="频谱网格预置名称，如 C, C+L, C-6.25")
+    parser.add_argument("--compare-cold", action="store_true", help="同时对每个时段从空网络重新规划，对比耗时")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    intervals, planner = run_sequence(args.topology, args.traffic, args.selector, args.assigner, args.k, args.grid)
+    print(format_intervals(intervals))
+    print(f"\n⏱️ 总耗时: {time.perf_counter() - t0:.3f} s，"
+          f"释放 {sum(r['released_lightpaths'] for r in intervals)} 条 / 新建 {sum(r['new_lightpaths'] for r in intervals)} 条光路")
+
+    if args.compare_cold:
+        import load_sweep
+        t0 = time.perf_counter()
+        for record in intervals:
+            load_sweep.run_cold(args.topology, record["traffic_file"], args.selector, args.assigner, args.k, args.grid)
+        print(f"⏱️ 逐时段重新规划总耗时: {time.perf_counter() - t0:.3f} s")
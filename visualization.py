@@ -1,10 +1,10 @@
-import matplotlib.pyplot as plt
-
 def plot_highest_fsu_distribution(link_fsu):
     """
     绘制最高 FSU 索引的分布直方图
     :param link_fsu: 每条链路的最高 FSU 字典 { (u,v): highest_used_fsu }
     """
+    import matplotlib.pyplot as plt  # 只在绘图时才加载 matplotlib
+
     fsu_values = list(link_fsu.values())
 
     plt.figure(figsize=(8, 5))